@@ -9,3 +9,19 @@ def pckg_xml_path (file_name):
     if file_name[-4:] != '.xml':
         file_name += '.xml'
     return _PATH_XML_FILES + file_name
+
+
+def resolve_xml_path (path):
+    """Returns path, or the path of the XML file named path in xml-files when
+    no such file exists."""
+    if os.path.exists(path) or os.path.exists(path + '.xml'):
+        return path
+    return pckg_xml_path(path)
+
+
+def __getattr__ (name):
+    # chemkin.submit_solve, imported on first use so that importing chemkin stays light.
+    if name == 'submit_solve':
+        from chemkin.jobs import submit_solve
+        return submit_solve
+    raise AttributeError("module 'chemkin' has no attribute {!r}".format(name))
@@ -9,3 +9,7 @@ class ChemKinError(Exception):
 
         self.method = method
         self.info = info
+
+    def __reduce__(self):
+        # Pickle from the constructor arguments, e.g. to raise worker errors in the parent process.
+        return (type(self), (self.method, self.info))
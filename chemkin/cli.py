@@ -0,0 +1,293 @@
+"""
+Contains the chemkin command-line runner: it solves a mechanism over a list
+or range of temperatures and initial states, and streams the results as CSV
+or JSON Lines rows, one row per initial state and temperature, as soon as
+they are computed.
+
+    chemkin rxns_reversible -T 900:2500:100 --initial state.json -j 4 \\
+        --quantities rates concentrations equilibrium stats --format jsonl
+
+Temperatures are solved in chunks of --chunk-size, each parsing the
+mechanism once, by a process pool of --jobs workers. At most 2 * jobs chunks
+are in flight and rows are written in input order, so memory does not grow
+with the number of temperatures.
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from chemkin import resolve_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.non_elementary_rxn import rxn_from_parsed_data
+from chemkin.solver.ODEint_solver import ODE_int_solver, POSITIVITY_STRATEGIES
+
+QUANTITIES = ('rates', 'concentrations', 'equilibrium', 'stats')
+FORMATS = ('csv', 'jsonl')
+STATS_FIELDS = ('n_steps', 'n_rhs', 'n_jac', 'wall_time')
+
+
+def iter_temperatures (specs):
+    """Yields the temperatures of specs, each a temperature or an inclusive
+    range start:stop:step, in order.
+
+    >>> list(iter_temperatures(['300', '1000:1200:100']))
+    [300.0, 1000.0, 1100.0, 1200.0]
+    """
+    for spec in specs:
+        parts = spec.split(':')
+        try:
+            values = [float(part) for part in parts]
+        except ValueError:
+            raise ChemKinError('iter_temperatures()', 'Invalid temperature {}.'.format(spec))
+        if len(values) == 1:
+            yield values[0]
+        elif len(values) == 3 and values[2] > 0:
+            start, stop, step = values
+            for i in itertools.count():
+                T = start + i * step
+                if T > stop + 1e-9 * step:
+                    break
+                yield T
+        else:
+            raise ChemKinError('iter_temperatures()',
+                               'Invalid temperature range {}; expected start:stop:step.'.format(spec))
+
+
+def check_initial_state (xi, species, caller):
+    """Raises a ChemKinError for caller unless xi holds one concentration per
+    species.
+    """
+    if len(xi) != len(species):
+        raise ChemKinError(caller, 'Expected {} initial concentrations ({}), got {}.'.format(
+            len(species), ' '.join(species), len(xi)))
+
+
+def load_initial_state (path, species):
+    """Returns the initial concentrations of species (list of floats) read
+    from path: a JSON object mapping species to concentrations, or a text file
+    of 'species concentration' lines (whitespace or comma separated, #
+    comments). Species not listed start at 0.
+    """
+    with open(path) as f:
+        if path.endswith('.json'):
+            values = json.load(f)
+        else:
+            values = {}
+            for line in f:
+                fields = line.split('#')[0].replace(',', ' ').split()
+                if not fields:
+                    continue
+                if len(fields) != 2:
+                    raise ChemKinError('load_initial_state()',
+                                       'Invalid line in {}: {}'.format(path, line.strip()))
+                values[fields[0]] = fields[1]
+    unknown = set(values) - set(species)
+    if unknown:
+        raise ChemKinError('load_initial_state()',
+                           'Unknown species in {}: {}.'.format(path, ', '.join(sorted(unknown))))
+    return [float(values.get(s, 0.0)) for s in species]
+
+
+def columns (species, n_rxns, quantities):
+    """Returns the names of the columns of the rows for species, n_rxns
+    reactions and the requested quantities.
+    """
+    names = ['state', 'T', 'status']
+    if 'rates' in quantities:
+        names += ['rate_{}'.format(s) for s in species]
+    if 'concentrations' in quantities:
+        names += ['conc_{}'.format(s) for s in species]
+    if 'equilibrium' in quantities:
+        names += ['t_eq_{}'.format(j) for j in range(n_rxns)] + ['t_eq_overall']
+    if 'stats' in quantities:
+        names += list(STATS_FIELDS)
+    return names
+
+
+def solve_chunk (path, temperatures, states, quantities, end_t=1e-12, n_steps=101, positivity='zero'):
+    """Returns the rows (list of dicts) of the temperatures of a chunk, for
+    every (name, xi) initial state of states. Runs in a worker process.
+
+    Rows of temperatures where the backward coefficients are not defined have
+    status 'undefined' and no values; equilibrium times not reached are None.
+    """
+    rows = []
+    for parsed_data in XmlParser(path).parsed_data_list(temperatures):
+        T = parsed_data['T']
+        defined = str(parsed_data['b_ki']) != 'Not Defined'
+        for name, xi in states:
+            row = {'state': name, 'T': T, 'status': 'ok' if defined else 'undefined'}
+            if defined:
+                row.update(_solve_state(parsed_data, xi, quantities, end_t, n_steps, positivity))
+            rows.append(row)
+    return rows
+
+
+def _solve_state (parsed_data, xi, quantities, end_t, n_steps, positivity):
+    species = parsed_data['species']
+    T = parsed_data['T']
+    rxn = rxn_from_parsed_data(parsed_data, xi)
+    row = {}
+    if 'rates' in quantities:
+        rates, _, _ = rxn.evaluate(np.array(xi, dtype=float))
+        row.update(('rate_{}'.format(s), rate) for s, rate in zip(species, rates))
+    if 'concentrations' in quantities or 'stats' in quantities:
+        solver = ODE_int_solver(T, rxn, positivity=positivity)
+        sol, _, _, stats = solver.solve(np.linspace(0, end_t, n_steps), full_output=True)
+        if 'concentrations' in quantities:
+            row.update(('conc_{}'.format(s), x) for s, x in zip(species, sol[-1]))
+        if 'stats' in quantities:
+            row.update((field, getattr(stats, field)) for field in STATS_FIELDS)
+    if 'equilibrium' in quantities:
+        _, critical_t, overall_critical_t = rxn.time_to_equilibrium(T, n_steps)
+        row.update(('t_eq_{}'.format(j), None if t == -100 else t) for j, t in enumerate(critical_t))
+        row['t_eq_overall'] = None if overall_critical_t == -100 else overall_critical_t
+    return row
+
+
+class RowWriter():
+    """Writes rows with the given columns to a text stream, flushing after
+    each row so that consumers see them as soon as they are computed.
+
+    Attributes:
+        stream (file): Output stream.
+        columns (list of str): Columns of the rows; missing values are empty
+            (CSV) or null (JSON Lines).
+        format (str): 'csv' or 'jsonl'.
+    """
+
+    def __init__ (self, stream, columns, format='csv'):
+        if format not in FORMATS:
+            raise ChemKinError('RowWriter()', 'Unknown output format {}.'.format(format))
+        self.stream = stream
+        self.columns = columns
+        self.format = format
+        if format == 'csv':
+            self._writer = csv.writer(stream, lineterminator='\n')
+            self._writer.writerow(columns)
+
+    def write (self, row):
+        values = [plain(row.get(name)) for name in self.columns]
+        if self.format == 'csv':
+            self._writer.writerow(['' if v is None else v for v in values])
+        else:
+            self.stream.write(json.dumps(dict(zip(self.columns, values))) + '\n')
+        self.stream.flush()
+
+
+def plain (value):
+    """Returns value as a Python scalar, with non-finite floats as None."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _chunks (iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run (path, temperatures, states, quantities, writer, jobs=1, chunk_size=16, **solve_kwargs):
+    """Solves the temperatures (iterable of floats) chunk by chunk with
+    solve_chunk() and writes the rows with writer, in input order. jobs=1
+    solves in this process; otherwise at most 2 * jobs chunks are in flight
+    in a process pool of jobs workers (None for one per CPU). Returns the
+    number of rows written.
+    """
+    n_rows = 0
+    chunks = _chunks(temperatures, chunk_size)
+    if jobs == 1:
+        for chunk in chunks:
+            for row in solve_chunk(path, chunk, states, quantities, **solve_kwargs):
+                writer.write(row)
+                n_rows += 1
+        return n_rows
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = collections.deque()
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                pending.append(executor.submit(solve_chunk, path, chunk, states, quantities, **solve_kwargs))
+            while pending and (chunk is None or len(pending) >= 2 * jobs or pending[0].done()):
+                for row in pending.popleft().result():
+                    writer.write(row)
+                    n_rows += 1
+    return n_rows
+
+
+def _parser ():
+    parser = argparse.ArgumentParser(
+        prog='chemkin',
+        description='Solve a reaction mechanism over temperatures and initial states, '
+                    'streaming one CSV or JSON Lines row per state and temperature.')
+    parser.add_argument('mechanism',
+                        help='XML mechanism file, or the name of a mechanism shipped with chemkin')
+    parser.add_argument('-T', '--temperatures', nargs='+', required=True, metavar='T',
+                        help='temperatures (K), or inclusive ranges start:stop:step')
+    states = parser.add_mutually_exclusive_group(required=True)
+    states.add_argument('--xi', nargs='+', type=float,
+                        help='initial concentrations, in the order of the species of the mechanism')
+    states.add_argument('--initial', nargs='+', metavar='FILE',
+                        help='initial state files (JSON object or "species concentration" lines); '
+                             'each is solved at every temperature')
+    parser.add_argument('-q', '--quantities', nargs='+', choices=QUANTITIES,
+                        default=['rates', 'concentrations'], help='quantities to compute')
+    parser.add_argument('--end-t', type=float, default=1e-12,
+                        help='end time of the concentrations (default: 1e-12)')
+    parser.add_argument('--n-steps', type=int, default=101,
+                        help='number of time steps of the solver (default: 101)')
+    parser.add_argument('--positivity', choices=POSITIVITY_STRATEGIES, default='zero',
+                        help='non-negativity strategy of the solver (default: zero)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv', help='output format')
+    parser.add_argument('-o', '--output', help='output file (default: standard output)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes; 0 for one per CPU (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=16,
+                        help='temperatures per worker task (default: 16)')
+    return parser
+
+
+def main (argv=None):
+    """Entry point of the chemkin command; returns the exit status."""
+    args = _parser().parse_args(argv)
+    path = resolve_xml_path(args.mechanism)
+
+    try:
+        species, rxn_data_list = XmlParser(path).load()
+        if args.xi is not None:
+            check_initial_state(args.xi, species, 'chemkin')
+            states = [('xi', args.xi)]
+        else:
+            states = [(os.path.splitext(os.path.basename(f))[0], load_initial_state(f, species))
+                      for f in args.initial]
+
+        output = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+        try:
+            writer = RowWriter(output, columns(species, len(rxn_data_list), args.quantities), args.format)
+            run(path, iter_temperatures(args.temperatures), states, args.quantities, writer,
+                jobs=args.jobs or None, chunk_size=args.chunk_size, end_t=args.end_t,
+                n_steps=args.n_steps, positivity=args.positivity)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    except (ChemKinError, OSError, ValueError) as err:
+        print('chemkin: error: {}'.format(err), file=sys.stderr)
+        return 1
+    return 0
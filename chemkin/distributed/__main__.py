@@ -0,0 +1,92 @@
+"""
+Runs a distributed sweep, see the coordinator and worker modules:
+
+    python -m chemkin.distributed coordinator rxns_reversible -T 900:2500:10 \\
+        --xi 2 1 .5 1 1 1 .5 1 --end-t 1e-12 1e-9 --host 0.0.0.0 --port 8208 -o sweep.npz
+    python -m chemkin.distributed worker coordinator-host:8208 -j 8
+"""
+import argparse
+import itertools
+import os
+import sys
+
+from chemkin import resolve_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.cli import QUANTITIES, check_initial_state, iter_temperatures, load_initial_state
+from chemkin.distributed.coordinator import SweepCoordinator
+from chemkin.distributed.worker import run_worker
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.solver.ODEint_solver import POSITIVITY_STRATEGIES
+
+
+def _parser ():
+    parser = argparse.ArgumentParser(prog='python -m chemkin.distributed',
+                                     description='Distribute a sweep over workers on several hosts.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help='split a sweep into chunks and serve them')
+    coordinator.add_argument('mechanism', help='XML mechanism file, or the name of a shipped mechanism')
+    coordinator.add_argument('-T', '--temperatures', nargs='+', required=True, metavar='T',
+                             help='temperatures (K), or inclusive ranges start:stop:step')
+    states = coordinator.add_mutually_exclusive_group(required=True)
+    states.add_argument('--xi', nargs='+', type=float, help='initial concentrations')
+    states.add_argument('--initial', nargs='+', metavar='FILE', help='initial state files')
+    coordinator.add_argument('-q', '--quantities', nargs='+', choices=QUANTITIES,
+                             default=['rates', 'concentrations'], help='quantities to compute')
+    coordinator.add_argument('--end-t', nargs='+', type=float, default=[1e-12],
+                             help='end times of the concentrations; each is a parameter of the sweep')
+    coordinator.add_argument('--n-steps', nargs='+', type=int, default=[101],
+                             help='numbers of time steps; each is a parameter of the sweep')
+    coordinator.add_argument('--positivity', nargs='+', choices=POSITIVITY_STRATEGIES, default=['zero'],
+                             help='non-negativity strategies; each is a parameter of the sweep')
+    coordinator.add_argument('--chunk-size', type=int, default=16, help='temperatures per chunk')
+    coordinator.add_argument('--lease-timeout', type=float, default=60.0,
+                             help='seconds without news from a worker before its chunks are re-queued')
+    coordinator.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    coordinator.add_argument('--port', type=int, default=8208, help='port to listen on')
+    coordinator.add_argument('-o', '--output', required=True, help='output .npz file of the columns')
+
+    worker = commands.add_parser('worker', help='solve chunks pulled from a coordinator')
+    worker.add_argument('address', help='HOST:PORT of the coordinator')
+    worker.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes; 0 for one per CPU (default: 1)')
+    return parser
+
+
+def main (argv=None):
+    args = _parser().parse_args(argv)
+    try:
+        if args.command == 'worker':
+            host, _, port = args.address.rpartition(':')
+            n_solved = run_worker(host or '127.0.0.1', int(port), jobs=args.jobs or None)
+            print('{} chunks solved'.format(n_solved), file=sys.stderr)
+            return 0
+
+        path = resolve_xml_path(args.mechanism)
+        species, _ = XmlParser(path).load()
+        if args.xi is not None:
+            check_initial_state(args.xi, species, 'chemkin.distributed')
+            states = [('xi', args.xi)]
+        else:
+            states = [(os.path.splitext(os.path.basename(f))[0], load_initial_state(f, species))
+                      for f in args.initial]
+        params = [{'end_t': end_t, 'n_steps': n_steps, 'positivity': positivity}
+                  for end_t, n_steps, positivity in itertools.product(args.end_t, args.n_steps, args.positivity)]
+        coordinator = SweepCoordinator(path, list(iter_temperatures(args.temperatures)), states,
+                                       args.quantities, params, chunk_size=args.chunk_size,
+                                       lease_timeout=args.lease_timeout, host=args.host, port=args.port)
+        print('Serving {} chunks on {}:{}'.format(coordinator.n_chunks, *coordinator.address), file=sys.stderr)
+        coordinator.start()
+        try:
+            coordinator.wait().save(args.output)
+        finally:
+            coordinator.shutdown()
+        print('{} chunks re-queued'.format(coordinator.n_requeued), file=sys.stderr)
+    except (ChemKinError, OSError, ValueError) as err:
+        print('chemkin.distributed: error: {}'.format(err), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
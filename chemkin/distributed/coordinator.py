@@ -0,0 +1,264 @@
+"""
+Contains the coordinator of distributed sweeps: it splits a sweep (a
+mechanism, temperatures, initial states and solver parameter sets) into
+chunks of temperatures, serves them to workers over TCP, and merges the rows
+they push back into one columnar SweepResult.
+
+The protocol exchanges one JSON object per line over a connection kept open
+by each worker:
+
+    {"op": "job"}                         -> the sweep: mechanism XML, states, quantities
+    {"op": "pull"}                        -> {"chunk": {"id", "T", "params"}}, or
+                                             {"chunk": null, "done": ...} when none is pending
+    {"op": "push", "id": ..., "rows": [...]} -> {"ok": true}
+    {"op": "heartbeat"}                   -> {"ok": true}
+
+A pulled chunk is leased to the connection. It is re-queued when the
+connection closes before the chunk is pushed (the worker died), or when the
+lease expires because the worker has not sent anything for lease_timeout
+seconds (the worker hangs, or its host is unreachable). A chunk pushed twice
+keeps its first rows.
+"""
+import collections
+import itertools
+import json
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from chemkin import resolve_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.cli import check_initial_state, columns
+from chemkin.preprocessing.parse_xml import XmlParser
+
+
+def _chunks (temperatures, params, chunk_size):
+    """Returns the chunks of a sweep: every parameter set with consecutive
+    temperatures, chunk_size at a time.
+    """
+    chunks = []
+    for p, param in enumerate(params):
+        for start in range(0, len(temperatures), chunk_size):
+            chunks.append({'id': len(chunks), 'param': p, 'T': temperatures[start:start + chunk_size],
+                           'params': param})
+    return chunks
+
+
+class SweepResult():
+    """Columnar results of a sweep: one numpy array per column, one row per
+    parameter set, temperature and initial state, in sweep order.
+
+    Numeric columns are float arrays with NaN for missing values; 'state',
+    'status' and string parameters are string arrays.
+
+    Attributes:
+        columns (dict of numpy arrays): The columns, by name.
+    """
+
+    def __init__ (self, columns):
+        self.columns = columns
+
+    def __len__ (self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__ (self, name):
+        return self.columns[name]
+
+    @classmethod
+    def from_rows (cls, rows, names):
+        """Returns the SweepResult of rows (list of dicts) with columns names."""
+        result = {}
+        for name in names:
+            values = [row.get(name) for row in rows]
+            if any(isinstance(v, str) for v in values):
+                result[name] = np.array(['' if v is None else v for v in values], dtype=str)
+            else:
+                result[name] = np.array([np.nan if v is None else v for v in values], dtype=float)
+        return cls(result)
+
+    def save (self, path):
+        """Writes the columns to the .npz file at path."""
+        np.savez(path, **self.columns)
+
+    @classmethod
+    def load (cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle (self):
+        coordinator = self.server.coordinator
+        worker = coordinator._connect()
+        try:
+            for line in self.rfile:
+                try:
+                    response = coordinator._dispatch(worker, json.loads(line))
+                except (ValueError, KeyError, TypeError) as err:
+                    response = {'error': 'Invalid request: {}'.format(err)}
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            coordinator._disconnect(worker)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SweepCoordinator():
+    """Serves the chunks of a sweep to workers (see the worker module) and
+    collects their rows.
+
+        coordinator = SweepCoordinator('rxns_reversible', temperatures, [('xi', xi)])
+        coordinator.start()                 # serves on coordinator.address
+        result = coordinator.wait()         # SweepResult, once every chunk is pushed
+        coordinator.shutdown()
+
+    Args:
+        path (str): XML file of the mechanism, or the name of a mechanism
+            shipped with chemkin; its content is sent to the workers, which
+            need no shared file system.
+        temperatures (list of floats): Temperatures of the sweep.
+        states (list of (name, xi)): Initial states, solved at every
+            temperature.
+        quantities (list of str): Quantities of the rows, see cli.QUANTITIES.
+        params (list of dicts, optional): Solver parameter sets (end_t,
+            n_steps, positivity of cli.solve_chunk), each solved at every
+            temperature; defaults to one set of defaults.
+        chunk_size (int, default 16): Temperatures per chunk.
+        lease_timeout (float, default 60): Seconds without news from a
+            worker after which its chunks are re-queued.
+        host, port: Address to listen on; port 0 picks a free port.
+
+    Attributes:
+        address ((str, int)): Address the coordinator listens on.
+        n_chunks (int): Number of chunks of the sweep.
+        n_requeued (int): Number of times a chunk was re-queued.
+    """
+
+    def __init__ (self, path, temperatures, states, quantities=('rates', 'concentrations'), params=None,
+                  chunk_size=16, lease_timeout=60.0, host='127.0.0.1', port=0):
+        path = resolve_xml_path(path)
+        with open(path) as f:
+            self.mechanism = f.read()
+        species, rxn_data_list = XmlParser(path).load()
+        self.states = [(name, [float(x) for x in xi]) for name, xi in states]
+        for _, xi in self.states:
+            check_initial_state(xi, species, 'SweepCoordinator()')
+        self.quantities = list(quantities)
+        self.params = [dict(param) for param in (params or [{}])]
+        self.lease_timeout = lease_timeout
+        param_names = sorted(set(itertools.chain.from_iterable(self.params)))
+        self.names = ['param'] + param_names + columns(species, len(rxn_data_list), self.quantities)
+        self._chunks = _chunks([float(T) for T in temperatures], self.params, chunk_size)
+        self.n_chunks = len(self._chunks)
+        self.n_requeued = 0
+        self._pending = collections.deque(range(self.n_chunks))
+        self._leases = {}  # chunk id -> [worker, deadline]
+        self._rows = {}
+        self._workers = itertools.count()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self._chunks:
+            self._done.set()
+        self._server = _TCPServer((host, port), _Handler)
+        self._server.coordinator = self
+        self.address = self._server.server_address
+
+    def start (self):
+        """Serves the workers in a background thread."""
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever (self):
+        self._server.serve_forever()
+
+    def shutdown (self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def n_done (self):
+        return len(self._rows)
+
+    def wait (self, timeout=None):
+        """Waits until every chunk is pushed, and returns the SweepResult, or
+        raises a ChemKinError after timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._done.wait(timeout=min(self.lease_timeout, 1.0)):
+            # expire the leases of silent workers even when no worker pulls
+            with self._lock:
+                self._expire_leases()
+            if deadline is not None and time.monotonic() > deadline:
+                raise ChemKinError('SweepCoordinator.wait()', '{} of {} chunks done.'.format(
+                    self.n_done, self.n_chunks))
+        return self.result()
+
+    def result (self):
+        """Returns the SweepResult of the chunks pushed so far, in sweep order."""
+        with self._lock:
+            rows = [row for chunk_id in sorted(self._rows) for row in self._rows[chunk_id]]
+        return SweepResult.from_rows(rows, self.names)
+
+    def _connect (self):
+        with self._lock:
+            return next(self._workers)
+
+    def _disconnect (self, worker):
+        with self._lock:
+            for chunk_id, (owner, _) in list(self._leases.items()):
+                if owner == worker:
+                    self._requeue(chunk_id)
+
+    def _dispatch (self, worker, request):
+        op = request['op']
+        with self._lock:
+            for lease in self._leases.values():
+                if lease[0] == worker:
+                    lease[1] = time.monotonic() + self.lease_timeout
+            if op == 'job':
+                return {'mechanism': self.mechanism, 'states': self.states, 'quantities': self.quantities,
+                        'lease_timeout': self.lease_timeout}
+            if op == 'pull':
+                self._expire_leases()
+                if not self._pending:
+                    return {'chunk': None, 'done': self._done.is_set()}
+                chunk_id = self._pending.popleft()
+                self._leases[chunk_id] = [worker, time.monotonic() + self.lease_timeout]
+                return {'chunk': self._chunks[chunk_id]}
+            if op == 'push':
+                chunk_id = request['id']
+                if not isinstance(chunk_id, int) or not 0 <= chunk_id < self.n_chunks:
+                    return {'error': 'Unknown chunk {}.'.format(chunk_id)}
+                self._leases.pop(chunk_id, None)
+                if chunk_id not in self._rows:
+                    chunk = self._chunks[chunk_id]
+                    extra = dict(chunk['params'], param=chunk['param'])
+                    self._rows[chunk_id] = [dict(row, **extra) for row in request['rows']]
+                    if chunk_id in self._pending:
+                        self._pending.remove(chunk_id)
+                    if len(self._rows) == self.n_chunks:
+                        self._done.set()
+                return {'ok': True}
+            if op == 'heartbeat':
+                return {'ok': True}
+        return {'error': 'Unknown op {}.'.format(op)}
+
+    def _expire_leases (self):
+        now = time.monotonic()
+        for chunk_id, (_, deadline) in list(self._leases.items()):
+            if deadline < now:
+                self._requeue(chunk_id)
+
+    def _requeue (self, chunk_id):
+        del self._leases[chunk_id]
+        if chunk_id not in self._rows:
+            self._pending.appendleft(chunk_id)
+            self.n_requeued += 1
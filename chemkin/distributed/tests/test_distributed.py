@@ -0,0 +1,176 @@
+"""
+Tests for the distributed sweep modules coordinator.py and worker.py
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.cli import solve_chunk
+from chemkin.distributed import __main__ as distributed_main
+from chemkin.distributed.coordinator import SweepCoordinator, SweepResult
+from chemkin.distributed.worker import run_worker
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.]
+TEMPERATURES = list(np.arange(700.0, 1600.0, 50.0))
+PARAMS = [{'end_t': 1e-12}, {'end_t': 1e-10}]
+
+
+def new_coordinator(**kwargs):
+    return SweepCoordinator('rxns_reversible', TEMPERATURES, [('xi', XI)], ['rates', 'concentrations'],
+                            PARAMS, chunk_size=4, **kwargs).start()
+
+
+def check_result(result):
+    assert len(result) == len(PARAMS) * len(TEMPERATURES)
+    for p, param in enumerate(PARAMS):
+        expected = solve_chunk(pckg_xml_path('rxns_reversible'), TEMPERATURES, [('xi', XI)],
+                               ['rates', 'concentrations'], **param)
+        rows = result['param'] == p
+        assert np.array_equal(result['T'][rows], TEMPERATURES)
+        assert np.all(result['end_t'][rows] == param['end_t'])
+        assert list(result['status'][rows]) == [row['status'] for row in expected]
+        for name in ('rate_H', 'conc_O2'):
+            values = np.array([np.nan if row.get(name) is None else row[name] for row in expected])
+            assert np.allclose(result[name][rows], values, equal_nan=True)
+
+
+class RawWorker():
+    """Pulls chunks without ever pushing them."""
+
+    def __init__(self, address):
+        self.socket = socket.create_connection(address)
+        self.file = self.socket.makefile('rwb')
+
+    def request(self, request):
+        self.file.write(json.dumps(request).encode() + b'\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def pull(self):
+        return self.request({'op': 'pull'})['chunk']
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+def test_workers_merge_columnar_result():
+    coordinator = new_coordinator()
+    try:
+        threads = [threading.Thread(target=run_worker, args=coordinator.address) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        result = coordinator.wait(timeout=60)
+        for thread in threads:
+            thread.join()
+    finally:
+        coordinator.shutdown()
+    check_result(result)
+
+    path = os.path.join(tempfile.mkdtemp(), 'sweep.npz')
+    result.save(path)
+    loaded = SweepResult.load(path)
+    assert set(loaded.columns) == set(result.columns)
+    assert np.array_equal(loaded['state'], result['state'])
+    os.remove(path)
+
+
+def test_chunks_of_dead_worker_are_requeued():
+    coordinator = new_coordinator()
+    try:
+        dead = RawWorker(coordinator.address)
+        assert dead.pull() is not None and dead.pull() is not None
+        dead.close()  # dies holding two chunks
+        process = multiprocessing.Process(target=run_worker, args=coordinator.address, kwargs={'jobs': 2})
+        process.start()
+        result = coordinator.wait(timeout=60)
+        process.join()
+    finally:
+        coordinator.shutdown()
+    assert coordinator.n_requeued == 2 and process.exitcode == 0
+    check_result(result)
+
+
+def test_chunks_of_silent_worker_are_requeued():
+    coordinator = new_coordinator(lease_timeout=0.5)
+    try:
+        silent = RawWorker(coordinator.address)
+        assert silent.pull() is not None  # then hangs, connection open
+        n_solved = run_worker(*coordinator.address, poll_every=0.1)
+        result = coordinator.wait(timeout=60)
+        silent.close()
+    finally:
+        coordinator.shutdown()
+    assert coordinator.n_requeued == 1 and n_solved == coordinator.n_chunks
+    check_result(result)
+
+
+def test_push_of_unknown_chunk():
+    coordinator = new_coordinator()
+    try:
+        worker = RawWorker(coordinator.address)
+        for chunk_id in [coordinator.n_chunks, -1, 'first', [0]]:
+            response = worker.request({'op': 'push', 'id': chunk_id, 'rows': []})
+            assert 'error' in response
+        # the connection is still served
+        assert worker.pull() is not None
+        worker.close()
+    finally:
+        coordinator.shutdown()
+
+
+def test_failing_chunk_is_pushed_as_error():
+    coordinator = SweepCoordinator('rxns_reversible', [900., 1000.], [('xi', [-1.] + XI[1:])], ['rates'],
+                                   chunk_size=1).start()
+    try:
+        n_solved = run_worker(*coordinator.address)
+        result = coordinator.wait(timeout=10)
+    finally:
+        coordinator.shutdown()
+    assert n_solved == 2 and coordinator.n_requeued == 0
+    assert list(result['status']) == ['error', 'error']
+    assert np.all(np.isnan(result['rate_H']))
+
+
+def test_coordinator_checks_initial_states():
+    with pytest.raises(ChemKinError):
+        SweepCoordinator('rxns_reversible', [900., 1000.], [('xi', [1., 2., 3.])])
+    assert distributed_main.main(['coordinator', 'rxns_reversible', '-T', '900', '--xi', '1', '2', '3',
+                                  '--port', '0', '-o', os.devnull]) == 1
+
+
+def test_coordinator_wait_timeout():
+    coordinator = new_coordinator()
+    try:
+        with pytest.raises(ChemKinError):
+            coordinator.wait(timeout=0.1)
+    finally:
+        coordinator.shutdown()
+
+
+def test_main_coordinator_and_worker():
+    path = os.path.join(tempfile.mkdtemp(), 'sweep.npz')
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    coordinator = threading.Thread(target=distributed_main.main, args=(
+        ['coordinator', 'rxns_reversible', '-T', '900:1100:100', '--xi'] + [str(x) for x in XI]
+        + ['--end-t', '1e-12', '1e-11', '--port', str(port), '-o', path],))
+    coordinator.start()
+    for _ in range(100):
+        if distributed_main.main(['worker', '127.0.0.1:{}'.format(port)]) == 0:
+            break
+        time.sleep(0.1)  # not listening yet
+    coordinator.join(timeout=60)
+    result = SweepResult.load(path)
+    assert len(result['T']) == 6 and set(result['end_t']) == {1e-12, 1e-11}
+    os.remove(path)
@@ -0,0 +1,119 @@
+"""
+Contains the worker of distributed sweeps: it pulls chunks from a
+SweepCoordinator, solves them with cli.solve_chunk in a local process pool,
+and pushes their rows back.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.cli import plain, solve_chunk
+
+
+class _Connection():
+    """JSON-lines connection to a coordinator."""
+
+    def __init__ (self, host, port, timeout=None):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._socket.makefile('rwb')
+
+    def request (self, op, **fields):
+        self._file.write(json.dumps(dict(fields, op=op)).encode() + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ChemKinError('run_worker()', 'The coordinator closed the connection.')
+        response = json.loads(line)
+        if 'error' in response:
+            raise ChemKinError('run_worker()', response['error'])
+        return response
+
+    def close (self):
+        self._file.close()
+        self._socket.close()
+
+
+def _mechanism_file (xml):
+    """Writes the mechanism xml to a file named after its hash in the
+    temporary directory, once, and returns its path.
+    """
+    path = os.path.join(tempfile.gettempdir(),
+                        'chemkin-{}.xml'.format(hashlib.sha256(xml.encode()).hexdigest()[:16]))
+    if not os.path.exists(path):
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(xml)
+        os.replace(tmp_path, path)
+    return path
+
+
+def _rows (rows):
+    return [{name: plain(value) for name, value in row.items()} for row in rows]
+
+
+def run_worker (host, port, jobs=1, poll_every=0.5):
+    """Pulls chunks from the coordinator at host:port and solves them, up to
+    jobs at a time in a process pool (jobs=1 solves in this process, None
+    uses one process per CPU), until the sweep is done. Sends heartbeats
+    while chunks are being solved, so that the coordinator keeps their
+    leases. A chunk whose solve raises is pushed with rows of status 'error'
+    and no values, so that it is not re-queued forever. Returns the number
+    of chunks solved.
+    """
+    connection = _Connection(host, port)
+    try:
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        job = connection.request('job')
+        path = _mechanism_file(job['mechanism'])
+        states = [(name, xi) for name, xi in job['states']]
+        heartbeat_every = job['lease_timeout'] / 3
+
+        if jobs == 1:
+            # one solve at a time in a thread, so that heartbeats go on meanwhile
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        with executor:
+            return _solve_chunks(connection, executor, path, states, job['quantities'], jobs,
+                                 heartbeat_every, poll_every)
+    finally:
+        connection.close()
+
+
+def _solve_chunks (connection, executor, path, states, quantities, jobs, heartbeat_every, poll_every):
+    running = {}
+    n_solved = 0
+    done = False
+    while True:
+        while not done and len(running) < jobs:
+            response = connection.request('pull')
+            chunk = response['chunk']
+            if chunk is None:
+                done = response['done']
+                break
+            future = executor.submit(solve_chunk, path, chunk['T'], states, quantities, **chunk['params'])
+            running[future] = chunk
+        if not running:
+            if done:
+                return n_solved
+            time.sleep(poll_every)
+            continue
+        finished, _ = concurrent.futures.wait(running, timeout=min(heartbeat_every, poll_every),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+        if not finished:
+            connection.request('heartbeat')
+        for future in finished:
+            chunk = running.pop(future)
+            try:
+                rows = future.result()
+            except Exception:
+                # a chunk that cannot be solved is pushed with status 'error' rather than retried
+                rows = [{'state': name, 'T': T, 'status': 'error'} for T in chunk['T'] for name, _ in states]
+            connection.request('push', id=chunk['id'], rows=_rows(rows))
+            n_solved += 1
@@ -0,0 +1,337 @@
+"""
+Contains the asyncio facade of the solver: solves submitted from a coroutine
+run on a managed pool of worker processes, with a concurrency limit, progress
+events, cancellation and timeouts.
+
+    sol, critical_t, overall_critical_t = await chemkin.submit_solve(
+        'rxns_reversible', 1500.0, xi, end_t=1e-9, timeout=60,
+        progress=lambda event: print(event.t, event.n_rhs))
+
+A solve returns the same results as the synchronous path
+(parsed_data_list, ElementaryRxn, ODE_int_solver.solve). Progress events are
+sent by the worker at most every progress_every seconds, through the same
+pipe as the results, and handed to the progress callback in the event loop;
+progress=queue.put_nowait streams them to an asyncio.Queue.
+
+Cancelling the awaiting task, or reaching timeout, first asks the worker to
+stop: it checks for the request at each progress tick and aborts the
+integration. A worker that has not stopped grace seconds later is terminated
+and replaced, so runaway integrations never keep a worker busy. Pipes are
+watched with loop.add_reader(), so no thread is tied up per running solve;
+this requires a selector event loop (the default on Unix).
+"""
+import asyncio
+import collections
+import itertools
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from chemkin import resolve_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.non_elementary_rxn import rxn_from_parsed_data
+from chemkin.solver.ODEint_solver import ODE_int_solver
+
+ProgressEvent = collections.namedtuple('ProgressEvent', ['job_id', 'T', 't', 'n_rhs', 'elapsed'])
+ProgressEvent.__doc__ = """Progress of a running solve: current time t of the integration, number of
+RHS evaluations n_rhs of the run so far, and wall time elapsed in
+the worker."""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _worker_main (conn, progress_every):
+    """Runs the solves received on conn until None is received."""
+    parsers = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        kind, job_id, job = message
+        if kind != 'solve':
+            continue  # a late cancellation of a finished job
+        try:
+            path = job['path']
+            if path not in parsers:
+                parsers[path] = XmlParser(path)
+            result = _solve(conn, job_id, job, parsers[path], progress_every)
+        except _Cancelled:
+            conn.send(('cancelled', job_id, None))
+        except Exception as err:
+            conn.send(('error', job_id, err))
+        else:
+            conn.send(('done', job_id, result))
+
+
+def _solve (conn, job_id, job, parser, progress_every):
+    parsed_data = parser.parsed_data_list([job['T']])[0]
+    if str(parsed_data['b_ki']) == 'Not Defined':
+        raise ChemKinError('submit_solve()', 'Backward coefficients are not defined at T={}.'.format(job['T']))
+    rxn = rxn_from_parsed_data(parsed_data, job['xi'])
+    solver = ODE_int_solver(job['T'], rxn, positivity=job['positivity'])
+    start = time.perf_counter()
+
+    def progress (t, n_rhs):
+        while conn.poll():
+            kind, cancelled_id, _ = conn.recv()
+            if kind == 'cancel' and cancelled_id == job_id:
+                raise _Cancelled()
+        if job['report']:
+            conn.send(('progress', job_id, ProgressEvent(job_id, job['T'], float(t), n_rhs,
+                                                         time.perf_counter() - start)))
+
+    solver.progress = progress
+    solver.progress_every = progress_every
+    return solver.solve(job['time_int'], full_output=job['full_output'])
+
+
+class _Worker():
+    """A worker process and the pipe to it; runs one solve at a time."""
+
+    def __init__ (self, context, progress_every):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, progress_every), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job_id = None
+        self.future = None
+        self.progress = None
+        self.loop = None
+
+    @property
+    def alive (self):
+        return self.process.is_alive()
+
+    def start (self, loop, job_id, job, progress):
+        self.loop = loop
+        self.job_id = job_id
+        self.future = loop.create_future()
+        self.progress = progress
+        loop.add_reader(self.conn.fileno(), self._on_readable)
+        self.conn.send(('solve', job_id, job))
+        return self.future
+
+    def cancel (self):
+        try:
+            self.conn.send(('cancel', self.job_id, None))
+        except OSError:
+            pass
+
+    def finish (self):
+        """Stops watching the pipe once the job is done."""
+        if self.loop is not None:
+            self.loop.remove_reader(self.conn.fileno())
+            self.loop = None
+        self.job_id = self.future = self.progress = None
+
+    def kill (self):
+        self.finish()
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+    def close (self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+    def _on_readable (self):
+        try:
+            while self.conn.poll():
+                kind, job_id, payload = self.conn.recv()
+                if job_id != self.job_id or self.future.done():
+                    continue
+                if kind == 'progress':
+                    if self.progress is not None:
+                        self.progress(payload)
+                elif kind == 'done':
+                    self.future.set_result(payload)
+                elif kind == 'error':
+                    self.future.set_exception(payload)
+                else:
+                    self.future.cancel()
+        except (EOFError, OSError):
+            self.loop.remove_reader(self.conn.fileno())
+            self.loop = None
+            if not self.future.done():
+                self.future.set_exception(ChemKinError('submit_solve()', 'The worker process died.'))
+
+
+class SolvePool():
+    """Pool of worker processes running solves submitted from coroutines.
+
+    Workers are started on demand, up to max_workers, and reused; a pool is
+    bound to the event loop of its first submit_solve() call. Use it as an
+    async context manager, or call close(), to stop the workers.
+
+    Attributes:
+        max_workers (int): Largest number of solves running at once; other
+            submissions wait. Defaults to the number of CPUs.
+        progress_every (float, default 0.1): Seconds between progress events,
+            and between checks for cancellation in the workers.
+        grace (float, default 1.0): Seconds a worker is given to stop after a
+            cancellation or a timeout before it is terminated.
+    """
+
+    def __init__ (self, max_workers=None, progress_every=0.1, grace=1.0, mp_context=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.progress_every = progress_every
+        self.grace = grace
+        self._context = mp_context or multiprocessing.get_context()
+        self._semaphore = None
+        self._loop = None
+        self._idle = []
+        self._workers = set()
+        self._ids = itertools.count()
+        self._closed = False
+
+    async def __aenter__ (self):
+        return self
+
+    async def __aexit__ (self, *exc_info):
+        self.close()
+        return False
+
+    @property
+    def loop (self):
+        """The event loop the pool is bound to, or None."""
+        return self._loop
+
+    async def submit_solve (self, mech, T, xi, time_int=None, end_t=1e-12, n_steps=101,
+                            positivity='zero', full_output=False, progress=None, timeout=None):
+        """Solves the evolution of the species concentrations of mechanism
+        mech at temperature T from concentrations xi in a worker process.
+
+        Args:
+            mech (str): XML file of the mechanism, or the name of a mechanism
+                shipped with chemkin.
+            T (float): Temperature.
+            xi (list of floats): Initial concentrations.
+            time_int (list of floats, optional): Time steps; defaults to
+                n_steps evenly spaced times from 0 to end_t.
+            positivity (str, default 'zero'): Non-negativity strategy of
+                ODE_int_solver.
+            full_output (bool, default False): Also return the SolverStats.
+            progress (function, optional): Called with a ProgressEvent in the
+                event loop while the solve runs.
+            timeout (float, optional): Seconds after which the solve is
+                stopped and asyncio.TimeoutError raised.
+
+        Returns:
+            The results of ODE_int_solver.solve(): sol, critical_t,
+            overall_critical_t, and stats if full_output.
+
+        Raises:
+            asyncio.TimeoutError if timeout is reached, asyncio.CancelledError
+            if the awaiting task is cancelled, ChemKinError if the worker
+            died, and any error of the solve.
+        """
+        if self._closed:
+            raise ChemKinError('SolvePool.submit_solve()', 'The pool is closed.')
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        elif self._loop is not loop:
+            raise ChemKinError('SolvePool.submit_solve()', 'The pool is bound to another event loop.')
+        if time_int is None:
+            time_int = np.linspace(0, end_t, n_steps)
+        job = {'path': resolve_xml_path(mech), 'T': float(T), 'xi': np.asarray(xi, dtype=float),
+               'time_int': np.asarray(time_int, dtype=float), 'positivity': positivity,
+               'full_output': full_output, 'report': progress is not None}
+
+        async with self._semaphore:
+            worker = self._acquire()
+            future = worker.start(loop, next(self._ids), job, progress)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                await self._stop(worker, future)
+                raise
+            finally:
+                self._release(worker)
+
+    def close (self):
+        """Stops the idle workers and terminates the busy ones."""
+        self._closed = True
+        for worker in list(self._workers):
+            if worker.future is None:
+                worker.close()
+            else:
+                worker.kill()
+        self._workers.clear()
+        self._idle = []
+
+    def _acquire (self):
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            self._workers.discard(worker)
+        worker = _Worker(self._context, self.progress_every)
+        self._workers.add(worker)
+        return worker
+
+    def _release (self, worker):
+        if worker not in self._workers:
+            return
+        if worker.alive and (worker.future is None or worker.future.done()):
+            worker.finish()
+            self._idle.append(worker)
+        else:
+            self._workers.discard(worker)
+            worker.kill()
+
+    async def _stop (self, worker, future):
+        """Asks worker to stop its job, and terminates it if it has not
+        stopped within the grace period.
+        """
+        if not future.done():
+            worker.cancel()
+            await asyncio.wait([future], timeout=self.grace)
+        if not future.done():
+            future.cancel()
+            self._workers.discard(worker)
+            worker.kill()
+        elif not future.cancelled():
+            future.exception()  # the job finished meanwhile; its result is dropped
+
+
+_default_pool = None
+
+
+def default_pool (max_workers=None):
+    """Returns the pool used by submit_solve(), creating it on first use or
+    when the running event loop has changed; max_workers (default: one per
+    CPU) applies when the pool is created.
+    """
+    global _default_pool
+    loop = asyncio.get_running_loop()
+    if _default_pool is None or _default_pool._closed or _default_pool.loop not in (None, loop):
+        if _default_pool is not None:
+            _default_pool.close()
+        _default_pool = SolvePool(max_workers)
+    return _default_pool
+
+
+async def submit_solve (mech, T, xi, pool=None, **kwargs):
+    """Solves mech at temperature T from concentrations xi in a worker process
+    of pool (default: default_pool()); see SolvePool.submit_solve().
+    """
+    if pool is None:
+        pool = default_pool()
+    return await pool.submit_solve(mech, T, xi, **kwargs)
@@ -3,14 +3,18 @@ import xml.etree.ElementTree as ET
 
 import numpy as np
 
+from chemkin import profiling
 from chemkin.chemkin_errors import ChemKinError
 from chemkin.reaction.reaction_coefficients import ArrheniusCoefficient, \
-    ConstantCoefficient, ModifiedArrheniusCoefficient, BackwardCoefficient
+    ConstantCoefficient, ModifiedArrheniusCoefficient, BackwardCoefficient, \
+    troe_centering
 
 
 
 class RxnType(Enum):
     Elementary = 1
+    ThreeBody = 2
+    Falloff = 3
 
 
 class XmlParser():
@@ -35,6 +39,7 @@ class XmlParser():
             path += '.xml'
         self.path = path
 
+    @profiling.timed('XmlParser.load')
     def load (self):
         """ Parses XML file contents to create list of RxnData objects
         representing the reactions in the file.
@@ -76,6 +81,10 @@ class XmlParser():
         rnx_type = rxn.get('type').lower().strip()
         if rnx_type == 'elementary':
             result.type = RxnType.Elementary
+        elif rnx_type in ['threebody', 'three-body', 'three_body']:
+            result.type = RxnType.ThreeBody
+        elif rnx_type == 'falloff':
+            result.type = RxnType.Falloff
         else:
             raise ChemKinError(
                   'XmlParser.load()',
@@ -89,32 +98,28 @@ class XmlParser():
                                'No <rateCoeff> element found in one of the '
                                'reactions.')
 
-        if rate_coeff.find('Arrhenius') is not None:
-            arrhenius = rate_coeff.find('Arrhenius')
-            A = float(arrhenius.find('A').text.strip())
-            if A < 0:
-                raise ChemKinError('XmlParser.load()',
-                                   'A coeff < 0 in reaction with ' \
-                                   'id = {}'.format(result.rxn_id))
-            E = float(arrhenius.find('E').text.strip())
-            result.rate_coeff = [A, E]
-        elif rate_coeff.find('modifiedArrhenius') is not None:
-            mod_arrhenius = rate_coeff.find('modifiedArrhenius')
-            A = float(mod_arrhenius.find('A').text.strip())
-            if A < 0:
-                raise ChemKinError(
-                      'A coeff < 0 in reaction with id = {}'.format(
-                            result.rxn_id))
-            b = float(mod_arrhenius.find('b').text.strip())
-            E = float(mod_arrhenius.find('E').text.strip())
-            result.rate_coeff = [A, b, E]
-        elif rate_coeff.find('Constant') is not None:
-            const = rate_coeff.find('Constant')
-            result.rate_coeff = float(const.find('k').text.strip())
-        else:
+        result.rate_coeff = self.__parse_rate_coeff(rate_coeff, result.rxn_id)
+        if result.rate_coeff is None:
             raise ChemKinError('XmlParser.load()',
                                'No recognized child of <rateCoeff> found '
                                'from which to parse coefficients.')
+
+        # pressure dependence: the coefficients above are the high-pressure
+        # limit of falloff reactions, the low-pressure limit is named k0
+        if result.type == RxnType.Falloff:
+            result.low_rate_coeff = self.__parse_rate_coeff(rate_coeff, result.rxn_id, 'k0')
+            if result.low_rate_coeff is None:
+                raise ChemKinError('XmlParser.load()',
+                                   'No low-pressure (name="k0") coefficients '
+                                   'in falloff reaction {}.'.format(result.rxn_id))
+            result.troe = self.__parse_falloff(rate_coeff.find('falloff'), result.rxn_id)
+        if result.type != RxnType.Elementary:
+            efficiencies = rate_coeff.find('efficiencies')
+            if efficiencies is not None:
+                result.default_efficiency = float(efficiencies.get('default', 1.0))
+                for item in (efficiencies.text or '').split():
+                    species, efficiency = item.split(':')
+                    result.efficiencies[species.upper()] = float(efficiency)
         
         #equation
         
@@ -125,6 +130,59 @@ class XmlParser():
         result.rxn_equation = result.equation()
         return result
 
+    @staticmethod
+    def __parse_rate_coeff (rate_coeff, rxn_id, name=None):
+        """Returns the coefficients of the child of the <rateCoeff> element
+        whose name attribute is name (see RxnData.rate_coeff), or None.
+        """
+        def child (tag):
+            for element in rate_coeff.findall(tag):
+                if element.get('name') == name:
+                    return element
+            return None
+
+        if child('Arrhenius') is not None:
+            arrhenius = child('Arrhenius')
+            A = float(arrhenius.find('A').text.strip())
+            if A < 0:
+                raise ChemKinError('XmlParser.load()',
+                                   'A coeff < 0 in reaction with ' \
+                                   'id = {}'.format(rxn_id))
+            E = float(arrhenius.find('E').text.strip())
+            return [A, E]
+        elif child('modifiedArrhenius') is not None:
+            mod_arrhenius = child('modifiedArrhenius')
+            A = float(mod_arrhenius.find('A').text.strip())
+            if A < 0:
+                raise ChemKinError(
+                      'A coeff < 0 in reaction with id = {}'.format(
+                            rxn_id))
+            b = float(mod_arrhenius.find('b').text.strip())
+            E = float(mod_arrhenius.find('E').text.strip())
+            return [A, b, E]
+        elif child('Constant') is not None:
+            const = child('Constant')
+            return float(const.find('k').text.strip())
+        return None
+
+    @staticmethod
+    def __parse_falloff (falloff, rxn_id):
+        """Returns the Troe parameters [a, T3, T1, T2] of a <falloff> element
+        (T2 is NaN when not given), or None for Lindemann falloff.
+        """
+        if falloff is None or falloff.get('type', 'Lindemann').lower() == 'lindemann':
+            return None
+        if falloff.get('type').lower() != 'troe':
+            raise ChemKinError('XmlParser.load()',
+                               'Unknown falloff type {} in reaction {}.'.format(
+                                     falloff.get('type'), rxn_id))
+        params = [float(value) for value in falloff.text.split()]
+        if len(params) not in [3, 4]:
+            raise ChemKinError('XmlParser.load()',
+                               'Troe falloff takes 3 or 4 parameters in '
+                               'reaction {}.'.format(rxn_id))
+        return params + [np.nan] * (4 - len(params))
+
     @staticmethod
     def __map_conc_to_species (tag):
         """ Creates dict mapping the species to concentration where tag is
@@ -138,6 +196,7 @@ class XmlParser():
             result[species] = conc
         return result
 
+    @profiling.timed('XmlParser.parsed_data_list')
     def parsed_data_list (self, Ti):
         """ Returns a list of dictionaries where each dictionary contains
         reaction parameters for
@@ -167,6 +226,16 @@ class XmlParser():
                 parsed_data_dic['is_reversible'] = a boolean indicating
                 whether the raction is reversible
                 parsed_data_dic['T'] = a float of temperature
+                parsed_data_dic['third_body'] = a list of booleans indicating
+                whether each reaction is a three-body or falloff reaction
+                parsed_data_dic['efficiencies'] = a list of third-body
+                efficiencies of the species, ith item for ith reaction (zeros
+                for elementary reactions)
+                parsed_data_dic['k0'] = a list of low-pressure rate
+                coefficients of falloff reactions (NaN for the others); ki
+                holds their high-pressure coefficients
+                parsed_data_dic['fcent'] = a list of Troe centerings of
+                falloff reactions (NaN for Lindemann falloff and the others)
 
         """
         species, rxn_data_list = self.load()
@@ -177,6 +246,20 @@ class XmlParser():
         for i, s in enumerate(species):
             species_idx_dict[s] = i
 
+        # third-body efficiencies do not depend on the temperature
+        third_body = [rxn_data.type != RxnType.Elementary
+                      for rxn_data in rxn_data_list]
+        efficiencies = []
+        for rxn_data in rxn_data_list:
+            rxn_eff = np.zeros((n_species,))
+            if rxn_data.type != RxnType.Elementary:
+                rxn_eff[:] = rxn_data.default_efficiency
+                for s, eff in rxn_data.efficiencies.items():
+                    # species absent from the mechanism are no third bodies
+                    if s in species_idx_dict:
+                        rxn_eff[species_idx_dict[s]] = eff
+            efficiencies.append(list(rxn_eff))
+
         parsed_data_dic_list = []  # list of dicts, one for each 1 set of
         # rxns (1 xml file) under one temperature
         for T in Ti:
@@ -188,12 +271,9 @@ class XmlParser():
             is_reversible = []  # list of indicators of each reaction in the system
             # being irreversible/reversible
             equations = []
+            k0 = []  # low-pressure coefficients, NaN but for falloff reactions
+            fcent = []  # Troe centering, NaN but for Troe falloff reactions
             for rxn_data in rxn_data_list:  # 1 rxn per rxn_data
-                if rxn_data.type != RxnType.Elementary:
-                    raise ChemKinError('XmlParser.parsed_data_list(Ti)',
-                                       'Non-elementary reactions cannot be '
-                                       'parsed now.')
-
                 if rxn_data.reversible:
                     is_reversible.append(True)
                 else:
@@ -217,21 +297,15 @@ class XmlParser():
                     rxn_vi_dp[idx] = vi
                 sys_vi_dp.append(list(rxn_vi_dp))
                 
-                coef_params = rxn_data.rate_coeff
-                if isinstance(coef_params, list):
-                    if len(coef_params) == 3:  # modified arrhenius coef
-                        A = coef_params[0]
-                        b = coef_params[1]
-                        E = coef_params[2]
-                        ki.append(
-                              ModifiedArrheniusCoefficient(A, b, E,
-                                                           T).get_coef())
-                    else:  # arrhenius coef
-                        A = coef_params[0]
-                        E = coef_params[1]
-                        ki.append(ArrheniusCoefficient(A, E, T).get_coef())
-                else:  # const coef
-                    ki.append(ConstantCoefficient(coef_params).get_coef())
+                with profiling.span('XmlParser.rate_coefficients'):
+                    ki.append(self.__rate_coefficient(rxn_data.rate_coeff, T))
+                    if rxn_data.type == RxnType.Falloff:
+                        k0.append(self.__rate_coefficient(rxn_data.low_rate_coeff, T))
+                        fcent.append(np.nan if rxn_data.troe is None
+                                     else float(troe_centering(rxn_data.troe, T)))
+                    else:
+                        k0.append(np.nan)
+                        fcent.append(np.nan)
                 if rxn_data.rxn_equation == None:
                     rxn_data.rxn_equation = "Reaction equation not specified"
                 equations.append(rxn_data.rxn_equation)
@@ -244,6 +318,10 @@ class XmlParser():
             parsed_data_dic['sys_vi_dp'] = sys_vi_dp
             parsed_data_dic['is_reversible'] = is_reversible
             parsed_data_dic['T'] = T
+            parsed_data_dic['third_body'] = third_body
+            parsed_data_dic['efficiencies'] = efficiencies
+            parsed_data_dic['k0'] = k0
+            parsed_data_dic['fcent'] = fcent
 
             try:
                 b_ki = BackwardCoefficient(species, T, ki, is_reversible, sys_vi_p,
@@ -257,6 +335,22 @@ class XmlParser():
 
         return parsed_data_dic_list
 
+    @staticmethod
+    def __rate_coefficient (coef_params, T):
+        """Returns the rate coefficient at T of RxnData.rate_coeff coef_params."""
+        if isinstance(coef_params, list):
+            if len(coef_params) == 3:  # modified arrhenius coef
+                A = coef_params[0]
+                b = coef_params[1]
+                E = coef_params[2]
+                return ModifiedArrheniusCoefficient(A, b, E, T).get_coef()
+            else:  # arrhenius coef
+                A = coef_params[0]
+                E = coef_params[1]
+                return ArrheniusCoefficient(A, E, T).get_coef()
+        else:  # const coef
+            return ConstantCoefficient(coef_params).get_coef()
+
 
 class RxnData():
     """ Container for individual reaction data.
@@ -279,9 +373,20 @@ class RxnData():
             Arrhenius: [A, E]
             modifiedArrhenius: [A, b, E]
             Constant: k
+        For falloff reactions, the high-pressure limit.
     equation: Contains the equation of the reaction
     type : RxnType
         Enum value for reaction type.
+    efficiencies : Dict[str, float]
+        Third-body efficiencies of three-body and falloff reactions, of the
+        species whose efficiency is not default_efficiency.
+    default_efficiency : float
+        Third-body efficiency of the other species.
+    low_rate_coeff : List[float] or float
+        Low-pressure limit of falloff reactions, as rate_coeff.
+    troe : List[float]
+        Troe parameters [a, T3, T1, T2] of falloff reactions (T2 may be
+        NaN); None for Lindemann falloff.
     """
 
     def __init__ (self, rxn_id=None, reversible=None, reactants=None,
@@ -293,16 +398,24 @@ class RxnData():
         self.rate_coeff = rate_coeff
         self.rxn_equation = rxn_equation
         self.type = type
+        self.efficiencies = {}
+        self.default_efficiency = 1.0
+        self.low_rate_coeff = None
+        self.troe = None
 
     def equation (self):
         """ Returns equation representation of reactants and products.
 
         Species are listed in alphabetical order on both reactant and product
-        side.
+        side; the third body is appended to both sides of three-body ('+ M')
+        and falloff ('(+M)') reactions.
         """
         reactant_side = self.__build_equation_side(self.reactants)
         product_side = self.__build_equation_side(self.products)
-        return '{0} [=] {1}'.format(reactant_side, product_side)
+        third_body = {RxnType.ThreeBody: ' + M',
+                      RxnType.Falloff: ' (+M)'}.get(self.type, '')
+        return '{0}{2} [=] {1}{2}'.format(reactant_side, product_side,
+                                          third_body)
 
     @staticmethod
     def __build_equation_side (species_dict):
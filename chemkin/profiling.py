@@ -0,0 +1,249 @@
+"""
+Contains the stage timing and profiling hooks of the chemkin pipeline.
+
+The stages of the pipeline (XML parsing, rate coefficients, thermodynamic
+queries, reaction rates, integration, plotting) are wrapped in named spans.
+Spans do nothing until a sink is installed with enable(), so instrumentation
+costs a single check per stage when profiling is off:
+
+    >>> sink = MemorySink()
+    >>> with profile_run(sink):
+    ...     with span('my stage'):
+    ...         pass
+    >>> sink.count('my stage')
+    1
+    >>> is_enabled()
+    False
+"""
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+
+_sink = None
+
+
+def enable (sink):
+    """Installs sink to receive the spans of all stages, and starts it.
+    Returns the previously installed sink, or None.
+    """
+    global _sink
+    previous = _sink
+    _sink = sink
+    sink.start()
+    return previous
+
+
+def disable (previous=None):
+    """Stops the installed sink, and reinstalls previous (None turns
+    profiling off). Returns the stopped sink.
+    """
+    global _sink
+    sink = _sink
+    _sink = previous
+    if sink is not None:
+        sink.stop()
+    return sink
+
+
+def is_enabled ():
+    return _sink is not None
+
+
+class profile_run():
+    """Context manager installing sink for the duration of a run, e.g.
+
+        with profile_run(MemorySink()) as sink:
+            ...
+        print(sink.report())
+    """
+
+    def __init__ (self, sink):
+        self.sink = sink
+        self._previous = None
+
+    def __enter__ (self):
+        self._previous = enable(self.sink)
+        return self.sink
+
+    def __exit__ (self, *exc_info):
+        disable(self._previous)
+        return False
+
+
+class _NullSpan():
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span():
+    def __init__ (self, name, sink):
+        self.name = name
+        self.sink = sink
+        self.start = None
+
+    def __enter__ (self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.sink.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+def span (name):
+    """Returns a context manager timing the stage name, if profiling is on."""
+    if _sink is None:
+        return _NULL_SPAN
+    return _Span(name, _sink)
+
+
+def timed (name):
+    """Decorator wrapping every call of the decorated function in span(name)."""
+    def decorator (func):
+        @functools.wraps(func)
+        def wrapper (*args, **kwargs):
+            if _sink is None:
+                return func(*args, **kwargs)
+            with _Span(name, _sink):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MemorySink():
+    """Aggregates the spans of each stage in memory: number of calls, total,
+    min and max duration in seconds.
+    """
+
+    def __init__ (self):
+        self.stages = {}
+
+    def start (self):
+        pass
+
+    def stop (self):
+        pass
+
+    def record (self, name, start, duration):
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [1, duration, duration, duration]
+        else:
+            stage[0] += 1
+            stage[1] += duration
+            stage[2] = min(stage[2], duration)
+            stage[3] = max(stage[3], duration)
+
+    def count (self, name):
+        return self.stages[name][0] if name in self.stages else 0
+
+    def total (self, name):
+        return self.stages[name][1] if name in self.stages else 0.0
+
+    def summary (self):
+        """Returns {stage: {'count', 'total', 'mean', 'min', 'max'}}."""
+        return {name: {'count': count, 'total': total, 'mean': total / count,
+                       'min': min_t, 'max': max_t}
+                for name, (count, total, min_t, max_t) in self.stages.items()}
+
+    def report (self):
+        """Returns the summary as a table, slowest stage (by total) first.
+        Spans are inclusive, so nested stages are counted in their parents.
+        """
+        lines = ['{:<40} {:>10} {:>12} {:>12} {:>12}'.format(
+              'Stage', 'Calls', 'Total (s)', 'Mean (s)', 'Max (s)')]
+        for name, stage in sorted(self.summary().items(), key=lambda item: -item[1]['total']):
+            lines.append('{:<40} {:>10} {:>12.4g} {:>12.4g} {:>12.4g}'.format(
+                  name, stage['count'], stage['total'], stage['mean'], stage['max']))
+        return '\n'.join(lines)
+
+
+class JsonLinesSink(MemorySink):
+    """Writes every span as a JSON line {"name", "start", "duration"} to the
+    file at path while also aggregating it in memory. The file is opened by
+    start() (in append mode) and closed by stop().
+    """
+
+    def __init__ (self, path):
+        super().__init__()
+        self.path = path
+        self._file = None
+
+    def start (self):
+        self._file = open(self.path, 'a')
+
+    def stop (self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record (self, name, start, duration):
+        super().record(name, start, duration)
+        if self._file is not None:
+            self._file.write(json.dumps({'name': name, 'start': start,
+                                         'duration': duration}) + '\n')
+
+
+class ProfileSink(MemorySink):
+    """Aggregates spans in memory, and captures a cProfile profile and/or
+    tracemalloc memory snapshot between start() and stop().
+
+    Attributes:
+        profile (pstats.Stats): Profile of the run, if cprofile is True.
+        snapshot (tracemalloc.Snapshot): Memory allocations still alive at
+            the end of the run, if trace_memory is True.
+        peak_memory (int): Peak traced memory in bytes, if trace_memory is
+            True.
+    """
+
+    def __init__ (self, cprofile=True, trace_memory=False):
+        super().__init__()
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.profile = None
+        self.snapshot = None
+        self.peak_memory = None
+        self._profiler = None
+
+    def start (self):
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop (self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile = pstats.Stats(self._profiler, stream=io.StringIO())
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def report (self, n_functions=20):
+        """Returns the summary of the spans followed by the n_functions
+        functions with the largest cumulative time and, if traced, the peak
+        memory.
+        """
+        report = super().report()
+        if self.profile is not None:
+            stream = io.StringIO()
+            self.profile.stream = stream
+            self.profile.sort_stats('cumulative').print_stats(n_functions)
+            report += '\n\n' + stream.getvalue()
+        if self.peak_memory is not None:
+            report += '\nPeak traced memory: {} bytes'.format(self.peak_memory)
+        return report
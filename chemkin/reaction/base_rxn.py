@@ -1,5 +1,8 @@
 import numpy as np
 from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.equilibrium_solver import EquilibriumSolver
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.solver.time_grid import STEP_GRIDS, output_grid
 
 class RxnBase():
     """Base class of reactions
@@ -32,6 +35,10 @@ class RxnBase():
 
     reaction_rate(): Calculates and returns the reaction rate
         This should be implemented in its subclass.
+
+    evaluate(xi): Returns the reaction rate and the forward and backward progress rates at
+        concentrations xi, without modifying the object
+        This should be implemented in its subclass.
     """
 
     def __init__(self, ki, b_ki, xi, vi_p, vi_dp):
@@ -88,6 +95,15 @@ class RxnBase():
         """
         raise NotImplementedError('Subclass must implement this method')
 
+    def evaluate (self, xi):
+        """ Returns the reaction rate and the forward and backward progress rates at
+        concentrations xi, without modifying the object
+
+        Method is not implemented in this base class, but should be
+        implemented in its subclasses.
+        """
+        raise NotImplementedError('Subclass must implement this method')
+
 
     def species_concentration(self, T, end_t, n_steps=101):
         """ Return the list of the species concentration at Temperatrue = T and time = end_t
@@ -98,22 +114,66 @@ class RxnBase():
         sol, _, _ = solver.solve(time_steps)
         return sol[-1, :]
 
-    def species_concentration_evolution(self, T, end_t, n_steps=101):
+    def species_concentration_evolution(self, T, end_t, n_steps=101, path=None, chunk_size=10000,
+                                        grid='linear', start_t=None, return_time=False):
         """ Return the list of the species concentration evolution at Temperatrue = T and from start to end_t
+
+        If path is given, the evolution is streamed to disk in chunks of chunk_size time steps and
+        a lazy Trajectory handle is returned instead of an array
+
+        The n_steps output times are evenly spaced (grid='linear'), or 0 followed by logarithmically
+        spaced times from start_t to end_t (grid='log', see time_grid.log_grid()). With grid='steps' or
+        'adaptive', at most n_steps output times are selected among the solver's steps (see
+        ODE_int_solver.solve_adaptive()); they cannot be streamed to path
+
+        If return_time is True, the output times are returned with the evolution
         """
-        time_steps = np.linspace(0, end_t, n_steps)
-        # solver = ODE_int_solver(T, self.xi, self.ki, self.b_ki, self.vi_p, self.vi_dp)
         solver = ODE_int_solver(T, self)
+        if grid in STEP_GRIDS:
+            if path is not None:
+                raise ChemKinError('RxnBase.species_concentration_evolution()',
+                                   'The {} grid cannot be streamed to disk.'.format(grid))
+            time_steps, sol, _, _ = solver.solve_adaptive(end_t, grid, max_points=n_steps)
+            return (time_steps, sol) if return_time else sol
+
+        time_steps = output_grid(grid, end_t, n_steps, start_t)
+        # solver = ODE_int_solver(T, self.xi, self.ki, self.b_ki, self.vi_p, self.vi_dp)
+        if path is not None:
+            traj, _, _ = solver.solve_streaming(time_steps, path, chunk_size)
+            return (time_steps, traj) if return_time else traj
         sol, _, _ = solver.solve(time_steps)
-        return sol
+        return (time_steps, sol) if return_time else sol
 
-    def time_to_equilibrium(self, T, n_steps=101):
+    def time_to_equilibrium(self, T, n_steps=101, checkpoint_path=None, grid='linear', start_t=None):
         """ Return the list of time to equilibrium of all the reactions and the time to equilibrium of the overall system
+
+        If checkpoint_path is given, the integration is checkpointed to that file and resumed from it if it
+        already exists (see ODE_int_solver.solve_checkpointed())
+
+        grid and start_t select the output times as in species_concentration_evolution(); the 'steps' and
+        'adaptive' grids cannot be checkpointed
         """
         end_t = 1e10
-        time_steps = np.linspace(0, end_t, n_steps)
         solver = ODE_int_solver(T, self)
-        _, critical_t, overall_critical_t = solver.solve(time_steps)
+        if grid in STEP_GRIDS:
+            if checkpoint_path is not None:
+                raise ChemKinError('RxnBase.time_to_equilibrium()',
+                                   'The {} grid cannot be checkpointed.'.format(grid))
+            _, _, critical_t, overall_critical_t = solver.solve_adaptive(end_t, grid, max_points=n_steps)
+            return end_t, critical_t, overall_critical_t
+
+        time_steps = output_grid(grid, end_t, n_steps, start_t)
+        if checkpoint_path is not None:
+            _, critical_t, overall_critical_t = solver.solve_checkpointed(time_steps, checkpoint_path)
+        else:
+            _, critical_t, overall_critical_t = solver.solve(time_steps)
         return end_t, critical_t, overall_critical_t
 
+    def equilibrium_concentration(self, T, guess=None):
+        """ Return the list of the species concentration at equilibrium at Temperature = T,
+        solved for directly instead of integrating the transient
+        """
+        solver = EquilibriumSolver(T, self)
+        return solver.solve(guess)
+
 
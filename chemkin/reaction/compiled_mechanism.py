@@ -0,0 +1,405 @@
+import numpy as np
+from scipy import sparse
+from chemkin import profiling
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import RxnType
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reaction.non_elementary_rxn import NonElementaryRxn, pressure_modifiers
+from chemkin.reaction.reaction_coefficients import arrhenius_coefficients, check_float_dtype, \
+    log_arrhenius_coefficients, troe_centering
+from chemkin.thermodynamics.thermo import ThermoDAO
+
+
+class CompiledMechanism():
+    """Mechanism compiled to numpy arrays, to evaluate rate coefficients and
+    reaction rates at many temperatures and concentrations in one vectorized
+    pass, without parsing XML or querying the thermodynamics database again
+
+    Gives the same results as XmlParser.parsed_data_list(Ti) followed by
+    ElementaryRxn(...).reaction_rate() (NonElementaryRxn for three-body and
+    falloff reactions), temperature by temperature.
+
+    dtype is the floating-point policy of the arrays and batch kernels. The
+    default, float64, follows the per-temperature classes. float32 (opt-in,
+    from_parser(..., dtype=np.float32) or astype(np.float32)) halves the
+    memory traffic of large batches: the arrays are stored in float32, and
+    coefficients() and reaction_rates() compute in float32, in log space
+    where the coefficients or concentration products could overflow it. The
+    forward and backward coefficients are then within 2e-5 of their float64
+    values, relative, and the reaction rate of each species within 2e-5 of
+    the sum of the magnitudes of the progress rates it adds up (the net rate
+    of a species near equilibrium is a small difference of large terms, and
+    has no relative bound). These bounds hold for values within
+    the range of float32, about 1e-38 to 3.4e38: smaller progress rates
+    underflow to 0, larger ones overflow to inf. Prefactors A must be below
+    3.4e38. The solvers integrate in float64 whatever the policy.
+
+    ATTRIBUTES:
+    ========
+    species: list of str
+        Species of the mechanism
+    equations: list of str
+        Equation of each reaction
+    vi_p, vi_dp: numpy arrays of floats, shape (n_rxns, n_species)
+        Stoichiometric coefficients of the reactants and products
+    reversible: numpy array of bools, shape (n_rxns,)
+    A, b, E: numpy arrays of floats, shape (n_rxns,)
+        Modified Arrhenius parameters of each reaction; constant coefficients
+        have A = k and b = E = 0
+    nasa_low, nasa_high: numpy arrays of floats, shape (n_species, 7)
+        NASA polynomial coefficients below and above 1000 K (NaN for species
+        missing from the database)
+    t_low, t_high: numpy arrays of floats, shape (n_species,)
+        Lower bound of the low range and upper bound of the high range of
+        each species
+    third_body: numpy array of bools, shape (n_rxns,)
+        Whether each reaction is a three-body or falloff reaction
+    efficiencies: scipy.sparse CSR matrix of floats, shape (n_rxns, n_species)
+        Third-body efficiencies; rows of elementary reactions are empty
+    A0, b0, E0: numpy arrays of floats, shape (n_rxns,)
+        Low-pressure modified Arrhenius parameters of falloff reactions (A,
+        b, E being the high-pressure ones), NaN for the others
+    troe: numpy array of floats, shape (n_rxns, 4)
+        Troe parameters (a, T3, T1, T2) of falloff reactions, NaN for
+        Lindemann falloff and the others
+    dtype: numpy dtype
+        float64 or float32, floating-point type of the arrays and results
+
+    METHODS:
+    ========
+    from_parser(xml_parser, db_name, dtype): Compiles the mechanism of an XmlParser
+    astype(dtype): Copy of the mechanism with another dtype policy
+    defined(T): Whether the backward coefficients are defined at T
+    coefficients(T): Forward and backward coefficients at T
+    log_coefficients(T): Natural logarithms of the coefficients at T
+    thermo(T): Enthalpy over RT and entropy over R of the species at T
+    equilibrium_constants(T): Equilibrium constants at T
+    log_equilibrium_constants(T): Natural logarithms of the equilibrium constants at T
+    jacobian_sparsity(): Sparsity of the Jacobian of the reaction rates
+    modifiers(T, ki, xi): Pressure modifiers of the progress rates
+    reaction_rates(T, xi): Reaction rates at temperatures T and concentrations xi
+    rxn(T, xi): Reaction system at temperature T, for the solvers
+    """
+
+    p0 = 10e5
+    R = 8.314
+
+    def __init__ (self, species, equations, vi_p, vi_dp, reversible, A, b, E,
+                  nasa_low, nasa_high, t_low, t_high, third_body=None, efficiencies=None,
+                  A0=None, b0=None, E0=None, troe=None, dtype=np.float64):
+        self.dtype = dtype = check_float_dtype(dtype, 'CompiledMechanism()')
+        for A_values in (A, A0):
+            if A_values is not None and np.any(np.asarray(A_values, dtype=float) > np.finfo(dtype).max):
+                raise ChemKinError('CompiledMechanism()', 'Arrhenius prefactors overflow {}.'.format(dtype))
+        self.species = list(species)
+        self.equations = list(equations)
+        self.vi_p = np.asarray(vi_p, dtype=dtype)
+        self.vi_dp = np.asarray(vi_dp, dtype=dtype)
+        self.reversible = np.asarray(reversible, dtype=bool)
+        self.A = np.asarray(A, dtype=dtype)
+        self.b = np.asarray(b, dtype=dtype)
+        self.E = np.asarray(E, dtype=dtype)
+        self.nasa_low = np.asarray(nasa_low, dtype=dtype)
+        self.nasa_high = np.asarray(nasa_high, dtype=dtype)
+        self.t_low = np.asarray(t_low, dtype=dtype)
+        self.t_high = np.asarray(t_high, dtype=dtype)
+        n_rxns, n_species = self.vi_p.shape
+        self.third_body = np.zeros(n_rxns, dtype=bool) if third_body is None \
+            else np.asarray(third_body, dtype=bool)
+        self.efficiencies = sparse.csr_matrix((n_rxns, n_species), dtype=dtype) if efficiencies is None \
+            else sparse.csr_matrix(efficiencies, dtype=dtype)
+        self.A0, self.b0, self.E0 = (np.full(n_rxns, np.nan, dtype=dtype) if values is None
+                                     else np.asarray(values, dtype=dtype) for values in (A0, b0, E0))
+        self.troe = np.full((n_rxns, 4), np.nan, dtype=dtype) if troe is None else np.asarray(troe, dtype=dtype)
+        self.nu = self.vi_dp - self.vi_p
+        self.gamma = np.sum(self.nu, axis=1)
+
+    def __len__ (self):
+        """Returns the number of reactions"""
+        return len(self.A)
+
+    def __repr__ (self):
+        return 'CompiledMechanism(species={}, n_rxns={})'.format(self.species, len(self))
+
+    @classmethod
+    @profiling.timed('CompiledMechanism.from_parser')
+    def from_parser (cls, xml_parser, db_name='NASA_coef.thermo', dtype=np.float64):
+        """Returns the CompiledMechanism of the mechanism parsed by xml_parser,
+        with the NASA coefficients of db_name and the dtype policy dtype
+
+        NOTES
+        =====
+        POST:
+             - raises a ValueError if A < 0
+        """
+        species, rxn_data_list = xml_parser.load()
+        index = {s: i for i, s in enumerate(species)}
+        n_rxns, n_species = len(rxn_data_list), len(species)
+        vi_p = np.zeros((n_rxns, n_species))
+        vi_dp = np.zeros((n_rxns, n_species))
+        params = []
+        low_params = np.full((n_rxns, 3), np.nan)
+        troe = np.full((n_rxns, 4), np.nan)
+        rows, columns, efficiencies = [], [], []
+        for j, rxn_data in enumerate(rxn_data_list):
+            for s, vi in rxn_data.reactants.items():
+                vi_p[j, index[s]] = vi
+            for s, vi in rxn_data.products.items():
+                vi_dp[j, index[s]] = vi
+            params.append(cls._arrhenius_params(rxn_data.rate_coeff))
+            if rxn_data.type == RxnType.Falloff:
+                low_params[j] = cls._arrhenius_params(rxn_data.low_rate_coeff)
+                if rxn_data.troe is not None:
+                    troe[j] = rxn_data.troe
+            if rxn_data.type != RxnType.Elementary:
+                row = np.full(n_species, rxn_data.default_efficiency)
+                for s, eff in rxn_data.efficiencies.items():
+                    if s in index:
+                        row[index[s]] = eff
+                rows.extend([j] * n_species)
+                columns.extend(range(n_species))
+                efficiencies.extend(row)
+        A, b, E = np.array(params, dtype=float).reshape(n_rxns, 3).T
+        if np.any(A < 0) or np.any(low_params[:, 0] < 0):
+            raise ValueError('Negative Arrhenius prefactor is prohibited!')
+
+        nasa_low, nasa_high, t_low, t_high = ThermoDAO(db_name).get_nasa_arrays(species)
+        equations = [rxn_data.rxn_equation or 'Reaction equation not specified'
+                     for rxn_data in rxn_data_list]
+        third_body = [rxn_data.type != RxnType.Elementary for rxn_data in rxn_data_list]
+        efficiencies = sparse.csr_matrix((efficiencies, (rows, columns)), shape=(n_rxns, n_species))
+        efficiencies.eliminate_zeros()
+        return cls(species, equations, vi_p, vi_dp, [rxn_data.reversible for rxn_data in rxn_data_list],
+                   A, b, E, nasa_low, nasa_high, t_low, t_high, third_body, efficiencies,
+                   *low_params.T, troe, dtype=dtype)
+
+    def astype (self, dtype):
+        """Returns a CompiledMechanism copy of the reactions with the dtype
+        policy dtype (np.float32 or np.float64)
+
+        EXAMPLES
+        =========
+        >>> from chemkin import pckg_xml_path
+        >>> from chemkin.preprocessing.parse_xml import XmlParser
+        >>> mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible'))).astype(np.float32)
+        >>> mech.reaction_rates([1500.0], [2., 1., .5, 1., 1., 1., .5, 1.]).dtype
+        dtype('float32')
+        """
+        return CompiledMechanism(self.species, self.equations, self.vi_p, self.vi_dp, self.reversible,
+                                 self.A, self.b, self.E, self.nasa_low, self.nasa_high, self.t_low, self.t_high,
+                                 self.third_body, self.efficiencies, self.A0, self.b0, self.E0, self.troe,
+                                 dtype=dtype)
+
+    @staticmethod
+    def _arrhenius_params (coeff):
+        """Returns [A, b, E] of RxnData.rate_coeff coeff"""
+        if isinstance(coeff, list):
+            return coeff if len(coeff) == 3 else [coeff[0], 0.0, coeff[1]]
+        return [coeff, 0.0, 0.0]
+
+    def defined (self, T):
+        """Returns whether the backward coefficients are defined at each
+        temperature of T: every species must be in the database, and T in its
+        range (above t_low below 1000 K, below t_high from 1000 K)
+
+        EXAMPLES
+        =========
+        >>> from chemkin import pckg_xml_path
+        >>> from chemkin.preprocessing.parse_xml import XmlParser
+        >>> mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+        >>> mech.defined([10.0, 1500.0, 1e5])
+        array([False,  True, False])
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        high = T[:, None] >= 1000
+        in_range = np.where(high, self.t_high > T[:, None], self.t_low < T[:, None])
+        return np.all(in_range, axis=1)
+
+    def coefficients (self, T):
+        """Returns the forward and backward coefficients (ki, b_ki) at each
+        temperature of T, numpy arrays of shape (len(T), n_rxns); b_ki is NaN
+        where the backward coefficients are not defined, and 0 for
+        irreversible reactions
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        if self.dtype != np.float64:
+            log_ki, log_b_ki = self.log_coefficients(T)
+            with np.errstate(over='ignore'):
+                return np.exp(log_ki), np.exp(log_b_ki)
+        ki = arrhenius_coefficients(self.A, self.b, self.E, T[:, None], self.R)
+        ke = self.equilibrium_constants(T)
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            b_ki = np.where(self.reversible, ki / ke, 0.0)
+        b_ki[~self.defined(T)] = np.nan
+        return ki, b_ki
+
+    def log_coefficients (self, T):
+        """Returns the natural logarithms of the forward and backward
+        coefficients at each temperature of T (see coefficients()), computed
+        in dtype; the logarithms of the backward coefficients are -inf for
+        irreversible reactions
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        log_ki = log_arrhenius_coefficients(self.A, self.b, self.E, T[:, None], self.R, self.dtype)
+        log_b_ki = np.where(self.reversible, log_ki - self.log_equilibrium_constants(T), -np.inf)
+        log_b_ki[~self.defined(T)] = np.nan
+        return log_ki, log_b_ki
+
+    def thermo (self, T):
+        """Returns the enthalpy over RT and entropy over R of every species at
+        each temperature of T, numpy arrays of shape (len(T), n_species)
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        a = np.where((T >= 1000)[:, None, None], self.nasa_high, self.nasa_low)  # (len(T), n_species, 7)
+        t = T[:, None]
+        H_over_RT = (a[..., 0] + a[..., 1] * t / 2 + a[..., 2] * t ** 2 / 3 + a[..., 3] * t ** 3 / 4
+                     + a[..., 4] * t ** 4 / 5 + a[..., 5] / t)
+        S_over_R = (a[..., 0] * np.log(t) + a[..., 1] * t + a[..., 2] * t ** 2 / 2 + a[..., 3] * t ** 3 / 3
+                    + a[..., 4] * t ** 4 / 4 + a[..., 6])
+        return H_over_RT, S_over_R
+
+    def equilibrium_constants (self, T):
+        """Returns the equilibrium constants of every reaction at each
+        temperature of T, a numpy array of shape (len(T), n_rxns)
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        H_over_RT, S_over_R = self.thermo(T)
+        return self._equilibrium_constants(T, H_over_RT, S_over_R, self.nu, self.gamma)
+
+    def log_equilibrium_constants (self, T):
+        """Returns the natural logarithms of the equilibrium constants at
+        each temperature of T (see equilibrium_constants()), which stay
+        within the range of float32 where the constants may not
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        H_over_RT, S_over_R = self.thermo(T)
+        return (self.gamma * np.log(self.p0 / (self.R * T[:, None]))
+                + np.dot(S_over_R, self.nu.T) - np.dot(H_over_RT, self.nu.T))
+
+    @classmethod
+    def _equilibrium_constants (cls, T, H_over_RT, S_over_R, nu, gamma):
+        delta_H_over_RT = np.dot(H_over_RT, nu.T)
+        delta_S_over_R = np.dot(S_over_R, nu.T)
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            return np.power(cls.p0 / (cls.R * T[:, None]), gamma) * np.exp(delta_S_over_R - delta_H_over_RT)
+
+    def jacobian_sparsity (self):
+        """Returns the sparsity of the Jacobian of the reaction rates, a numpy
+        array of bools of shape (n_species, n_species): entry (i, k) is True
+        when the rate of species i depends on the concentration of species k
+
+        EXAMPLES
+        =========
+        >>> from chemkin import pckg_xml_path
+        >>> from chemkin.preprocessing.parse_xml import XmlParser
+        >>> mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+        >>> int(mech.jacobian_sparsity().sum())
+        62
+        """
+        return np.dot((self.nu != 0).T.astype(int), self._rate_dependencies().astype(int)) > 0
+
+    def _rate_dependencies (self):
+        """Returns whether the progress rate of each reaction depends on each
+        species, numpy array of bools of shape (n_rxns, n_species)
+        """
+        depends = (self.vi_p != 0) | (self.reversible[:, None] & (self.vi_dp != 0))
+        # through the third-body concentration
+        return depends | (self.third_body[:, None] & (self.efficiencies.toarray() != 0))
+
+    def modifiers (self, T, ki, xi):
+        """Returns the pressure modifiers of the progress rates (see
+        NonElementaryRxn) at n temperatures T, forward coefficients ki (shape
+        (n, n_rxns), see coefficients()) and concentrations xi (shape (n,
+        n_species)), a numpy array of shape (n, n_rxns); 1 for elementary
+        reactions
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        M = self.efficiencies.dot(np.asarray(xi, dtype=self.dtype).T).T
+        if self.dtype == np.float64:
+            k0 = arrhenius_coefficients(self.A0, self.b0, self.E0, T[:, None], self.R)
+        else:
+            k0 = np.exp(log_arrhenius_coefficients(self.A0, self.b0, self.E0, T[:, None], self.R, self.dtype))
+        g, _ = pressure_modifiers(M, ki, k0, troe_centering(self.troe, T[:, None]), self.third_body)
+        return g
+
+    def reaction_rates (self, T, xi):
+        """Returns the reaction rates (numpy array of shape (n, n_species)) at
+        n temperatures T and n sets of concentrations xi (shape (n,
+        n_species)); a single temperature or set of concentrations is
+        broadcast. Rows where the backward coefficients are not defined are
+        NaN
+
+        NOTES
+        =====
+        POST:
+             - raises a ValueError exception if any(xi < 0)
+
+        EXAMPLES
+        =========
+        >>> from chemkin import pckg_xml_path
+        >>> from chemkin.preprocessing.parse_xml import XmlParser
+        >>> mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+        >>> mech.reaction_rates([10.0, 1500.0], [2., 1., .5, 1., 1., 1., .5, 1.]).shape
+        (2, 8)
+        """
+        xi = np.atleast_2d(np.asarray(xi, dtype=self.dtype))
+        if np.any(xi < 0):
+            raise ValueError('concentrations xi cannot be negative.')
+        T = np.atleast_1d(np.asarray(T, dtype=self.dtype))
+        n = max(len(T), len(xi))
+        T = np.broadcast_to(T, (n,))
+        xi = np.broadcast_to(xi, (n, xi.shape[1]))
+        if self.dtype != np.float64:
+            return self._log_reaction_rates(T, xi)
+        ki, b_ki = self.coefficients(T)
+        f_wi = ki * np.prod(np.power(xi[:, None, :], self.vi_p), axis=2)
+        b_wi = b_ki * np.prod(np.power(xi[:, None, :], self.vi_dp), axis=2)
+        if np.any(self.third_body):
+            g = self.modifiers(T, ki, xi)
+            f_wi *= g
+            b_wi *= g
+        return np.dot(f_wi - b_wi, self.nu)
+
+    def _log_reaction_rates (self, T, xi):
+        """reaction_rates() in log space: the logarithms of the
+        concentration products are matrix products of log(xi), added to the
+        logarithms of the coefficients before exponentiation, so that no
+        factor overflows dtype and no (n, n_rxns, n_species) temporary is
+        formed
+        """
+        log_ki, log_b_ki = self.log_coefficients(T)
+        with np.errstate(divide='ignore'):
+            log_xi = np.log(xi)
+        # finite, so that species absent from a reaction (vi = 0) add 0, not NaN
+        log_xi[xi == 0] = -np.finfo(self.dtype).max / 8
+        with np.errstate(over='ignore'):
+            f_wi = np.exp(log_ki + np.dot(log_xi, self.vi_p.T))
+            b_wi = np.exp(log_b_ki + np.dot(log_xi, self.vi_dp.T))
+        if np.any(self.third_body):
+            g = self.modifiers(T, np.exp(log_ki), xi)
+            f_wi *= g
+            b_wi *= g
+        return np.dot(f_wi - b_wi, self.nu)
+
+    def rxn (self, T, xi, ki=None, b_ki=None):
+        """Returns the reaction system at temperature T and concentrations
+        xi, for the solvers: an ElementaryRxn, or a NonElementaryRxn if the
+        mechanism has three-body or falloff reactions. The forward and
+        backward coefficients at T (see coefficients()) are computed unless
+        given
+
+        EXAMPLES
+        =========
+        >>> from chemkin import pckg_xml_path
+        >>> from chemkin.preprocessing.parse_xml import XmlParser
+        >>> mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_falloff')))
+        >>> type(mech.rxn(1500.0, [2., 1., .5, 1., 1., 1., .5, 1.])).__name__
+        'NonElementaryRxn'
+        """
+        if ki is None or b_ki is None:
+            ki, b_ki = (values[0] for values in self.coefficients([T]))
+        if not np.any(self.third_body):
+            return ElementaryRxn(ki, b_ki, xi, self.vi_p, self.vi_dp)
+        k0 = arrhenius_coefficients(self.A0, self.b0, self.E0, T, self.R)
+        return NonElementaryRxn(ki, b_ki, xi, self.vi_p, self.vi_dp, self.third_body, self.efficiencies, k0,
+                                troe_centering(self.troe, T))
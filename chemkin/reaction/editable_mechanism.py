@@ -0,0 +1,254 @@
+import numpy as np
+from scipy import sparse
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+
+# Arrays with one row per reaction
+_ROW_ARRAYS = ('vi_p', 'vi_dp', 'nu', 'gamma', 'reversible', 'A', 'b', 'E', 'third_body', 'A0', 'b0', 'E0', 'troe')
+
+
+class EditableMechanism(CompiledMechanism):
+    """CompiledMechanism whose reactions can be added, removed and updated in
+    place, for mechanism development and sensitivity workflows
+
+    An edit only touches what depends on the edited reaction: its
+    stoichiometry row and Arrhenius slots, its column of the cached
+    equilibrium constants, and its contribution to the Jacobian sparsity.
+    Reaction arrays are views of buffers that grow geometrically, so adding
+    a reaction does not copy the others. After any sequence of edits, the
+    results match those of a CompiledMechanism of the same reactions compiled
+    afresh (equilibrium constants to rounding).
+
+    The equilibrium constants are cached for the temperatures of the last
+    call; Arrhenius edits leave them as they are, as they do not depend on
+    the Arrhenius parameters. Mechanisms with three-body or falloff
+    reactions are not editable.
+
+    ATTRIBUTES:
+    ========
+    See CompiledMechanism, and
+    version: int
+        Number of edits so far
+
+    METHODS:
+    ========
+    add_reaction(reactants, products, A, b, E, reversible, equation): Appends a reaction
+    remove_reaction(j): Removes reaction j
+    update_reaction(j, ...): Changes the parameters or stoichiometry of reaction j
+    compiled(): Snapshot of the mechanism as a CompiledMechanism
+    astype(dtype): Snapshot of the mechanism as a CompiledMechanism of another dtype policy
+
+    EXAMPLES
+    =========
+    >>> from chemkin import pckg_xml_path
+    >>> from chemkin.preprocessing.parse_xml import XmlParser
+    >>> mech = EditableMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    >>> mech.add_reaction({'H': 1, 'O2': 1}, {'HO2': 1}, A=1e9, reversible=True)
+    11
+    >>> mech.update_reaction(0, A=2 * mech.A[0])
+    >>> mech.remove_reaction(11)
+    >>> len(mech), mech.version
+    (11, 3)
+    """
+
+    def __init__ (self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if np.any(self.third_body):
+            raise ChemKinError('EditableMechanism()', 'Three-body and falloff reactions cannot be edited.')
+        self._n = len(self.A)
+        self._index = {s: i for i, s in enumerate(self.species)}
+        self._buffers = {}
+        for name in _ROW_ARRAYS:
+            values = getattr(self, name)
+            buffer = np.empty((max(self._n, 16),) + values.shape[1:], dtype=values.dtype)
+            buffer[:self._n] = values
+            self._buffers[name] = buffer
+        self._set_views()
+        # number of reactions through which the rate of species i depends on species k
+        self._jac_count = np.dot((self.nu != 0).T.astype(int), self._rate_dependencies().astype(int))
+        self._ke_T = None
+        self._ke = None
+        self._thermo_T = None
+        self.version = 0
+
+    def _set_views (self):
+        for name, buffer in self._buffers.items():
+            setattr(self, name, buffer[:self._n])
+        # no third bodies: the efficiencies are empty, one row per reaction
+        self.efficiencies = sparse.csr_matrix((self._n, len(self.species)), dtype=self.dtype)
+
+    def _reserve (self, n):
+        capacity = len(self._buffers['A'])
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity)
+        for name, buffer in self._buffers.items():
+            grown = np.empty((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            grown[:self._n] = buffer[:self._n]
+            self._buffers[name] = grown
+        if self._ke is not None:
+            grown = np.empty((len(self._ke), capacity))
+            grown[:, :self._n] = self._ke[:, :self._n]
+            self._ke = grown
+
+    def _check_index (self, j):
+        if not -self._n <= j < self._n:
+            raise ChemKinError('EditableMechanism()', 'No reaction {} in a mechanism of {}.'.format(j, self._n))
+        return j % self._n
+
+    def _stoichiometry (self, coefficients):
+        row = np.zeros(len(self.species))
+        for s, vi in coefficients.items():
+            if s not in self._index:
+                raise ChemKinError('EditableMechanism()', 'Species {} is not in the mechanism.'.format(s))
+            row[self._index[s]] = vi
+        return row
+
+    def _jacobian_update (self, j, sign):
+        """Adds (sign=1) or removes (sign=-1) the contribution of reaction j
+        to the Jacobian sparsity counts
+        """
+        rows = np.flatnonzero(self.nu[j] != 0)
+        columns = np.flatnonzero((self.vi_p[j] != 0) | (self.reversible[j] & (self.vi_dp[j] != 0)))
+        self._jac_count[np.ix_(rows, columns)] += sign
+
+    def _update_ke (self, j):
+        if self._ke is not None:
+            H_over_RT, S_over_R = self._thermo_T
+            self._ke[:, j] = self._equilibrium_constants(self._ke_T, H_over_RT, S_over_R, self.nu[j:j + 1],
+                                                         self.gamma[j:j + 1])[:, 0]
+
+    def _set_stoichiometry (self, j, vi_p, vi_dp, reversible):
+        self._jacobian_update(j, -1)
+        self.vi_p[j] = vi_p
+        self.vi_dp[j] = vi_dp
+        self.reversible[j] = reversible
+        self.nu[j] = self.vi_dp[j] - self.vi_p[j]
+        self.gamma[j] = np.sum(self.nu[j])
+        self._jacobian_update(j, 1)
+        self._update_ke(j)
+
+    @staticmethod
+    def _check_A (A):
+        if A < 0:
+            raise ValueError('Negative Arrhenius prefactor is prohibited!')
+
+    def add_reaction (self, reactants, products, A, b=0.0, E=0.0, reversible=False, equation=None):
+        """Appends a reaction and returns its index
+
+        INPUTS
+        =======
+        reactants, products: dict
+            Stoichiometric coefficient of each species of the reaction; the
+            species must be in the mechanism
+        A, b, E: float
+            Modified Arrhenius parameters (b = E = 0 for Arrhenius with
+            E = 0 or a constant coefficient A)
+        reversible: bool
+        equation: str, optional
+            Equation of the reaction, e.g. 'H + O2 =] O + OH'; built from the
+            reactants and products when not given
+
+        NOTES
+        =====
+        POST:
+             - raises a ChemKinError for species not in the mechanism
+             - raises a ValueError if A < 0
+        """
+        self._check_A(A)
+        vi_p, vi_dp = self._stoichiometry(reactants), self._stoichiometry(products)
+        j = self._n
+        self._reserve(j + 1)
+        self._n += 1
+        self._set_views()
+        self.A[j], self.b[j], self.E[j] = A, b, E
+        # a fresh row: no contribution to remove
+        self.vi_p[j] = self.vi_dp[j] = 0.0
+        self.reversible[j] = False
+        self.third_body[j] = False
+        self.A0[j] = self.b0[j] = self.E0[j] = np.nan
+        self.troe[j] = np.nan
+        self.nu[j] = 0.0
+        self._set_stoichiometry(j, vi_p, vi_dp, reversible)
+        if equation is None:
+            equation = '{} {} {}'.format(_side(reactants), '[=]' if reversible else '=]', _side(products))
+        self.equations.append(equation)
+        self.version += 1
+        return j
+
+    def remove_reaction (self, j):
+        """Removes reaction j; the following reactions move up by one"""
+        j = self._check_index(j)
+        self._jacobian_update(j, -1)
+        for buffer in self._buffers.values():
+            buffer[j:self._n - 1] = buffer[j + 1:self._n]
+        if self._ke is not None:
+            self._ke[:, j:self._n - 1] = self._ke[:, j + 1:self._n]
+        del self.equations[j]
+        self._n -= 1
+        self._set_views()
+        self.version += 1
+
+    def update_reaction (self, j, A=None, b=None, E=None, reactants=None, products=None, reversible=None,
+                         equation=None):
+        """Changes the given parameters of reaction j; reactants and products
+        (dicts, see add_reaction()) replace its stoichiometry
+
+        NOTES
+        =====
+        POST:
+             - raises a ChemKinError for species not in the mechanism
+             - raises a ValueError if A < 0
+        """
+        j = self._check_index(j)
+        if A is not None:
+            self._check_A(A)
+        vi_p = self.vi_p[j] if reactants is None else self._stoichiometry(reactants)
+        vi_dp = self.vi_dp[j] if products is None else self._stoichiometry(products)
+        if A is not None:
+            self.A[j] = A
+        if b is not None:
+            self.b[j] = b
+        if E is not None:
+            self.E[j] = E
+        if reactants is not None or products is not None or reversible is not None:
+            self._set_stoichiometry(j, vi_p.copy(), vi_dp.copy(),
+                                    self.reversible[j] if reversible is None else reversible)
+        if equation is not None:
+            self.equations[j] = equation
+        self.version += 1
+
+    def equilibrium_constants (self, T):
+        """Returns the equilibrium constants of every reaction at each
+        temperature of T (see CompiledMechanism), from the cache when T is
+        the temperatures of the last call
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        if self._ke_T is None or not np.array_equal(T, self._ke_T):
+            H_over_RT, S_over_R = self.thermo(T)
+            self._ke = np.empty((len(T), len(self._buffers['A'])))
+            self._ke[:, :self._n] = self._equilibrium_constants(T, H_over_RT, S_over_R, self.nu, self.gamma)
+            self._ke_T, self._thermo_T = T.copy(), (H_over_RT, S_over_R)
+        return self._ke[:, :self._n].copy()
+
+    def jacobian_sparsity (self):
+        """Returns the sparsity of the Jacobian of the reaction rates, see
+        CompiledMechanism; kept up to date by the edits
+        """
+        return self._jac_count > 0
+
+    def compiled (self):
+        """Returns a CompiledMechanism copy of the current reactions"""
+        return CompiledMechanism(self.species, self.equations, self.vi_p.copy(), self.vi_dp.copy(),
+                                 self.reversible.copy(), self.A.copy(), self.b.copy(), self.E.copy(),
+                                 self.nasa_low, self.nasa_high, self.t_low, self.t_high, dtype=self.dtype)
+
+    def astype (self, dtype):
+        """Returns a CompiledMechanism copy of the current reactions with the
+        dtype policy dtype, see CompiledMechanism.astype()
+        """
+        return self.compiled().astype(dtype)
+
+
+def _side (coefficients):
+    return ' + '.join(s if vi == 1 else '{:g}{}'.format(vi, s) for s, vi in coefficients.items())
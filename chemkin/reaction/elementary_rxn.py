@@ -1,4 +1,5 @@
 import numpy as np
+from chemkin import profiling
 from chemkin.reaction.base_rxn import RxnBase
 
 
@@ -55,6 +56,10 @@ class ElementaryRxn(RxnBase):
     __repr__(): Prints the class name with its attributes
     progress_rate(): Calculates and returns the total progress rate (forward progress rate - backward progress rate)
     reaction_rate(): Calculates and returns the reaction rate
+    evaluate(xi): Returns the reaction rates and progress rates at concentrations xi without modifying the object
+    jacobian(xi=None): Calculates and returns the Jacobian of the reaction rates with respect to the concentrations
+    progress_rate_jacobian(xi=None): Calculates and returns the Jacobian of the total progress rates with respect to
+        the concentrations
     n_reversible(): Calculates and returns the number of reversible reactions in the system
     """
 
@@ -122,22 +127,14 @@ class ElementaryRxn(RxnBase):
         elif (any(i < 0 for i in self.xi)):  # check concentration array
             raise ValueError("concentrations xi cannot be negative.")
         else:
-            # Convert inputs into numpy column vectors/matrices
-            xi = np.array(self.xi).reshape(-1, 1)
-            vi_p = np.matrix(self.vi_p).T
-            vi_dp = np.matrix(self.vi_dp).T
-            ki = np.array(self.ki).reshape(-1, 1)
-            b_ki = np.array(self.b_ki).reshape(-1, 1)
-
-            f_prod = np.prod(np.power(xi, vi_p), axis=0)  # calculate the product of xi^(vi_p) for each reaction
-            b_prod = np.prod(np.power(xi, vi_dp), axis=0)  # calculate the product of xi^(vi_p) for each reaction
-
-            self.f_wi = np.squeeze(ki * np.array(f_prod).reshape(-1, 1))  # forward progress rate
-            self.b_wi = np.squeeze(b_ki * np.array(b_prod).reshape(-1, 1))  # backward progress rate
+            _, f_wi, b_wi = self.evaluate(self.xi)
+            self.f_wi = np.squeeze(f_wi)  # forward progress rate
+            self.b_wi = np.squeeze(b_wi)  # backward progress rate
             self.wi = self.f_wi - self.b_wi  # set total progress rate
 
             return self.wi
 
+    @profiling.timed('ElementaryRxn.reaction_rate')
     def reaction_rate(self):
         """Returns the progress rate w for a system of reversible elementary reaction
 
@@ -170,17 +167,139 @@ class ElementaryRxn(RxnBase):
         elif any(i < 0 for i in self.xi):  # check concentration array
             raise ValueError("concentrations xi cannot be negative.")
         else:
-            # Convert inputs into numpy column vectors/matrices
-            vi_p = np.matrix(self.vi_p).T
-            vi_dp = np.matrix(self.vi_dp).T
-            vi = vi_dp - vi_p  # calculate overall stoicheometric coefficients
+            rates, f_wi, b_wi = self.evaluate(self.xi)
+            self.f_wi = np.squeeze(f_wi)  # forward progress rate
+            self.b_wi = np.squeeze(b_wi)  # backward progress rate
+            self.wi = self.f_wi - self.b_wi  # set total progress rate
+            self.rates = np.squeeze(rates)  # set reaction rate
 
-            # Get the current progress rate
-            w = self.progress_rate() 
+            return self.rates
 
-            self.rates = np.squeeze(np.array(np.dot(vi, w)))  # calculate reaction rate
+    @profiling.timed('ElementaryRxn.evaluate')
+    def evaluate(self, xi):
+        """Returns the reaction rates and the forward and backward progress rates at concentrations xi
+        without modifying the object, so that it can be shared between concurrent solves
 
-            return self.rates
+        RETURNS
+        ========
+        (rates, f_wi, b_wi): a tuple of numpy arrays of floats,
+           reaction rate of each specie, forward and backward progress rate of each reaction
+
+        NOTES
+        =====
+        POST:
+             - self is not changed by this function
+             - raises a ValueError exception if any(self.ki <= 0)
+             - raises a ValueError exception if any(self.b_ki < 0)
+             - raises a ValueError exception if any(xi < 0)
+
+        EXAMPLES
+        =========
+        >>> ElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]]).evaluate([1.0, 2.0, 1.0])
+        (array([-10., -70.,  70.]), array([40., 10.]), array([10., 20.]))
+        """
+        # check value conditions
+        if any(i <= 0 for i in self.ki):  # check forward reaction coefficients
+            raise ValueError("forward reaction rates ki must be positive.")
+        elif any(i < 0 for i in self.b_ki):  # check backward reaction coefficients
+            raise ValueError("backward reaction rates ki must be positive.")
+        elif any(i < 0 for i in xi):  # check concentration array
+            raise ValueError("concentrations xi cannot be negative.")
+        else:
+            xi = np.asarray(xi, dtype=float)
+            vi_p = np.asarray(self.vi_p, dtype=float)  # shape (n_rxns, n_species)
+            vi_dp = np.asarray(self.vi_dp, dtype=float)
+
+            # product of xi^(vi_p) (resp. xi^(vi_dp)) for each reaction
+            f_wi = np.asarray(self.ki, dtype=float) * np.prod(np.power(xi, vi_p), axis=1)
+            b_wi = np.asarray(self.b_ki, dtype=float) * np.prod(np.power(xi, vi_dp), axis=1)
+            rates = np.dot((vi_dp - vi_p).T, f_wi - b_wi)
+
+            return rates, f_wi, b_wi
+
+    def jacobian(self, xi=None):
+        """Returns the analytic Jacobian of the reaction rates with respect to the concentrations
+        xi (default self.xi)
+
+        RETURNS
+        ========
+        jac: a numpy array of floats of shape (len(self.xi), len(self.xi)),
+           jac[i, k] is the derivative of the reaction rate of specie i with respect to
+           the concentration of specie k
+
+        NOTES
+        =====
+        POST:
+             - self.ki, self.b_ki, self.xi, self.vi_p, and self.vi_dp are not changed by this function
+             - raises a ValueError exception if any(self.ki <= 0)
+             - raises a ValueError exception if any(self.b_ki < 0)
+             - raises a ValueError exception if any(self.xi < 0)
+             - exact at zero concentrations: the product over the other species is
+               formed with prefix/suffix cumulative products instead of dividing by xi
+
+        EXAMPLES
+        =========
+        >>> ElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]]).jacobian()
+        array([[-80., -20.,  20.],
+               [-60., -90.,  40.],
+               [ 60.,  90., -40.]])
+        """
+        vi = (np.array(self.vi_dp, dtype=float) - np.array(self.vi_p, dtype=float)).T  # shape (n_species, n_rxns)
+        return np.dot(vi, self.progress_rate_jacobian(xi))
+
+    def progress_rate_jacobian(self, xi=None):
+        """Returns the analytic Jacobian of the total progress rates (forward - backward) with respect to the
+        concentrations xi (default self.xi)
+
+        RETURNS
+        ========
+        dw: a numpy array of floats of shape (len(self.ki), len(self.xi)),
+           dw[j, k] is the derivative of the total progress rate of reaction j with respect to
+           the concentration of specie k
+
+        NOTES
+        =====
+        POST:
+             - self is not changed by this function
+             - raises a ValueError exception if any(self.ki <= 0)
+             - raises a ValueError exception if any(self.b_ki < 0)
+             - raises a ValueError exception if any(self.xi < 0)
+
+        EXAMPLES
+        =========
+        >>> ElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]]).progress_rate_jacobian()
+        array([[ 40.,  40., -20.],
+               [ 20., -10.,   0.]])
+        """
+        if xi is None:
+            xi = self.xi
+        # check value conditions
+        if any(i <= 0 for i in self.ki):  # check forward reaction coefficients
+            raise ValueError("forward reaction rates ki must be positive.")
+        elif any(i < 0 for i in self.b_ki):  # check backward reaction coefficients
+            raise ValueError("backward reaction rates ki must be positive.")
+        elif any(i < 0 for i in xi):  # check concentration array
+            raise ValueError("concentrations xi cannot be negative.")
+        else:
+            xi = np.array(xi, dtype=float)
+            vi_p = np.array(self.vi_p, dtype=float)  # shape (n_rxns, n_species)
+            vi_dp = np.array(self.vi_dp, dtype=float)
+            ki = np.array(self.ki, dtype=float).reshape(-1, 1)
+            b_ki = np.array(self.b_ki, dtype=float).reshape(-1, 1)
+
+            # d(progress rate of reaction j)/d(xi_k) for forward and backward directions
+            return ki * self._d_concentration_product(xi, vi_p) - b_ki * self._d_concentration_product(xi, vi_dp)
+
+    @staticmethod
+    def _d_concentration_product(xi, nu):
+        """Returns d(prod_k xi_k^nu_jk)/d(xi_i) for every reaction j (rows) and specie i (columns)"""
+        powers = np.power(xi, nu)
+        n_rxns = nu.shape[0]
+        ones = np.ones((n_rxns, 1))
+        # product over all species except i, without dividing by a possibly zero xi_i
+        left = np.cumprod(np.hstack((ones, powers[:, :-1])), axis=1)
+        right = np.cumprod(np.hstack((ones, powers[:, :0:-1])), axis=1)[:, ::-1]
+        return nu * np.power(xi, np.maximum(nu - 1, 0)) * left * right
 
     def n_reversible(self):
         return sum(self.is_reversible)
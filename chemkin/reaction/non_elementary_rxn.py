@@ -1,8 +1,158 @@
-from chemkin.reaction.base_rxn import RxnBase
+import numpy as np
+from scipy import sparse
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reaction.reaction_coefficients import falloff_factor
 
 
-class NonElementaryRxn(RxnBase):
-    """Class of non-elementary reactions
-    Subclass of Rxn
+class NonElementaryRxn(ElementaryRxn):
+    """Class of systems of three-body and falloff reactions, possibly mixed
+    with elementary reactions
+    Subclass of ElementaryRxn
+
+    The forward and backward progress rates of reaction j are those of the
+    elementary reaction times a pressure modifier g_j of the third-body
+    concentration M_j = sum_k eff_jk x_k:
+            elementary: g = 1
+            three-body: g = M
+            falloff:    g = Pr / (1 + Pr) F,  Pr = k0 M / ki
+    where ki is the high-pressure rate coefficient of falloff reactions, and
+    F = 1 (Lindemann) or the Troe broadening factor (see
+    reaction_coefficients.falloff_factor()). The modifiers of all the
+    reactions are evaluated in one vectorized pass, and enter the analytic
+    Jacobian through dg/dM.
+
+    ATTRIBUTES:
+    ========
+    See ElementaryRxn, and
+    self.third_body: a numpy array of booleans
+        Whether reaction j is a three-body or falloff reaction
+    self.efficiencies: a scipy.sparse CSR matrix of floats, shape (n_rxns, n_species)
+        Third-body efficiency of each specie in each reaction; rows of
+        elementary reactions are empty
+    self.k0: a numpy array of floats
+        Low-pressure rate coefficients of falloff reactions, NaN for the others
+    self.fcent: a numpy array of floats
+        Troe centering of falloff reactions (see
+        reaction_coefficients.troe_centering()), NaN for Lindemann falloff and
+        the others
+
+    METHODS:
+    ========
+    See ElementaryRxn, and
+    modifiers(xi): Returns the pressure modifiers g and their derivatives dg/dM at concentrations xi
+
+    EXAMPLES
+    =========
+    >>> rxn = NonElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]],
+    ...                        [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]], third_body=[True, False],
+    ...                        efficiencies=[[1.0, 1.0, 2.0], [0.0, 0.0, 0.0]])
+    >>> rxn.reaction_rate()
+    array([-130., -310.,  310.])
     """
-    pass
+
+    def __init__(self, ki, b_ki, xi, vi_p, vi_dp, third_body, efficiencies, k0=None, fcent=None):
+        super().__init__(ki, b_ki, xi, vi_p, vi_dp)
+        n_rxns = len(vi_p)
+        self.third_body = np.asarray(third_body, dtype=bool)
+        self.efficiencies = sparse.csr_matrix(efficiencies, dtype=float)
+        self.k0 = np.full(n_rxns, np.nan) if k0 is None else np.asarray(k0, dtype=float)
+        self.fcent = np.full(n_rxns, np.nan) if fcent is None else np.asarray(fcent, dtype=float)
+
+    def __repr__(self):
+        return 'NonElementaryRxn(ki={}, b_ki={}, xi={}, vi_p={}, vi_dp={}, third_body={}, k0={}, fcent={})'.format(
+            self.ki, self.b_ki, self.xi, self.vi_p, self.vi_dp, list(self.third_body), list(self.k0),
+            list(self.fcent))
+
+    def modifiers(self, xi):
+        """Returns the pressure modifiers g of the reactions at concentrations xi, and their derivatives
+        dg/dM with respect to the third-body concentrations, see pressure_modifiers()
+        """
+        M = self.efficiencies.dot(np.asarray(xi, dtype=float))
+        return pressure_modifiers(M, self.ki, self.k0, self.fcent, self.third_body)
+
+    def evaluate(self, xi):
+        """Returns the reaction rates and the forward and backward progress rates at concentrations xi,
+        see ElementaryRxn.evaluate()
+
+        EXAMPLES
+        =========
+        >>> NonElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]],
+        ...                  [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]], [True, False],
+        ...                  [[1.0, 1.0, 2.0], [0.0, 0.0, 0.0]]).evaluate([1.0, 2.0, 1.0])
+        (array([-130., -310.,  310.]), array([200.,  10.]), array([50., 20.]))
+        """
+        _, f_wi, b_wi = super().evaluate(xi)
+        g, _ = self.modifiers(xi)
+        f_wi = g * f_wi
+        b_wi = g * b_wi
+        vi = np.asarray(self.vi_dp, dtype=float) - np.asarray(self.vi_p, dtype=float)
+        return np.dot(vi.T, f_wi - b_wi), f_wi, b_wi
+
+    def progress_rate_jacobian(self, xi=None):
+        """Returns the analytic Jacobian of the total progress rates with respect to the concentrations xi
+        (default self.xi), see ElementaryRxn.progress_rate_jacobian(); the progress rate g w of reaction j
+        has derivatives g dw/dx_k + w dg/dM eff_jk
+
+        EXAMPLES
+        =========
+        >>> NonElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]],
+        ...                  [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]], [True, False],
+        ...                  [[1.0, 1.0, 2.0], [0.0, 0.0, 0.0]]).progress_rate_jacobian()
+        array([[230., 230., -40.],
+               [ 20., -10.,   0.]])
+        """
+        if xi is None:
+            xi = self.xi
+        dw = super().progress_rate_jacobian(xi)
+        _, f_wi, b_wi = super().evaluate(xi)
+        g, dg_dM = self.modifiers(xi)
+        return g[:, None] * dw + self.efficiencies.multiply((dg_dM * (f_wi - b_wi))[:, None]).toarray()
+
+
+def pressure_modifiers(M, ki, k0, fcent, third_body):
+    """Returns the pressure modifiers g of reactions (see NonElementaryRxn) and their derivatives dg/dM, at
+    third-body concentrations M, high-pressure (or elementary) rate coefficients ki, low-pressure
+    coefficients k0 (NaN but for falloff reactions) and Troe centerings fcent, in one vectorized pass over
+    arrays of any broadcastable shapes, in the floating-point type of M
+
+    RETURNS
+    ========
+    (g, dg_dM): numpy arrays of floats
+
+    EXAMPLES
+    =========
+    >>> g, dg_dM = pressure_modifiers([2.0, 2.0, 2.0], [1.0, 1.0, 1.0], [np.nan, np.nan, 1.0],
+    ...                               [np.nan, np.nan, np.nan], [False, True, True])
+    >>> g, dg_dM
+    (array([1.        , 2.        , 0.66666667]), array([0.        , 1.        , 0.11111111]))
+    """
+    M = np.asarray(M)
+    M = M.astype(np.result_type(M.dtype, np.float32), copy=False)  # float32 stays float32
+    k0 = np.asarray(k0, dtype=M.dtype)
+    third_body = np.asarray(third_body, dtype=bool)
+    falloff = ~np.isnan(k0)
+    k0_over_ki = np.where(falloff, k0 / np.asarray(ki, dtype=M.dtype), 0.0)
+    Pr = k0_over_ki * M
+    F, d_log_F = falloff_factor(Pr, fcent)
+    blend = F / (1 + Pr)
+    g = np.where(falloff, Pr * blend, np.where(third_body, M, 1.0))
+    # d(Pr / (1 + Pr) F)/dPr, with dF/dPr = F d(log10 F)/d(log10 Pr) / Pr
+    dg_dPr = blend / (1 + Pr) + blend * d_log_F
+    dg_dM = np.where(falloff, dg_dPr * k0_over_ki, np.where(third_body, 1.0, 0.0))
+    return g, dg_dM
+
+
+def rxn_from_parsed_data(parsed_data, xi):
+    """Returns the reaction system of an item of XmlParser.parsed_data_list() at concentrations xi: an
+    ElementaryRxn when every reaction is elementary, a NonElementaryRxn otherwise
+    """
+    args = (parsed_data['ki'], parsed_data['b_ki'], xi, parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    if not any(parsed_data.get('third_body', [])):
+        return ElementaryRxn(*args)
+    return NonElementaryRxn(*args, parsed_data['third_body'], parsed_data['efficiencies'], parsed_data['k0'],
+                            parsed_data['fcent'])
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -1,4 +1,5 @@
 import numpy as np
+from chemkin import profiling
 from chemkin.thermodynamics.thermo import ThermoDAO
 from chemkin.chemkin_errors import ChemKinError
 
@@ -290,11 +291,145 @@ class ModifiedArrheniusCoefficient(ArrheniusCoefficient):
 
             return self.k
 
+def arrhenius_coefficients (A, b, E, T, R=8.314):
+    """Returns the modified Arrhenius rate coefficients A * T**b * exp(-E/(R*T))
+    of arrays of parameters and temperatures of any (broadcastable) shapes,
+    in one vectorized pass; b = 0 gives the Arrhenius and b = E = 0 the
+    constant coefficients.
+
+    RETURNS
+    ========
+    k: numpy array of floats, of the broadcast shape of A, b, E and T
+
+    NOTES
+    =====
+    POST:
+         - raises a ValueError exception if any(A < 0) or any(T < 0)
+
+    EXAMPLES
+    =========
+    >>> arrhenius_coefficients([2.0, 2.0], [0.0, -0.5], [3.0, 3.0], 100.0)
+    array([1.99279626, 0.19927963])
+    """
+    A = np.asarray(A, dtype=float)
+    T = np.asarray(T, dtype=float)
+    if np.any(A < 0):
+        raise ValueError('Negative Arrhenius prefactor is prohibited!')
+    if np.any(T < 0):
+        raise ValueError('Negative temperatures are prohibited!')
+    return A * np.power(T, b) * np.exp(-np.asarray(E, dtype=float) / (R * T))
+
+
+# Floating-point types of the dtype policy of the batch kernels
+FLOAT_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+
+def check_float_dtype (dtype, caller):
+    """Returns np.dtype(dtype), or raises a ChemKinError from caller unless
+    it is one of FLOAT_DTYPES
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in FLOAT_DTYPES:
+        raise ChemKinError(caller, 'Unsupported dtype {}; use float32 or float64.'.format(dtype))
+    return dtype
+
+
+def _float_array (values):
+    """Returns values as an array of its own floating-point type, float64 for
+    other types
+    """
+    values = np.asarray(values)
+    return values if values.dtype in FLOAT_DTYPES else values.astype(float)
+
+
+def log_arrhenius_coefficients (A, b, E, T, R=8.314, dtype=np.float64):
+    """Returns the natural logarithms ln A + b ln T - E/(R T) of the modified
+    Arrhenius coefficients (see arrhenius_coefficients()), computed in dtype.
+    The logarithms stay within the range of float32 where the coefficients
+    themselves may not; A = 0 gives -inf.
+
+    NOTES
+    =====
+    POST:
+         - raises a ValueError exception if any(A < 0) or any(T < 0)
+
+    EXAMPLES
+    =========
+    >>> log_arrhenius_coefficients([1e35, 2.0], [3.0, -0.5], [0.0, 3.0], 3000.0, dtype=np.float32)
+    array([104.60958  ,  -3.3101568], dtype=float32)
+    """
+    A = _float_array(A)
+    b, E, T = (np.asarray(values, dtype=dtype) for values in (b, E, T))
+    if np.any(A < 0):
+        raise ValueError('Negative Arrhenius prefactor is prohibited!')
+    if np.any(T < 0):
+        raise ValueError('Negative temperatures are prohibited!')
+    with np.errstate(divide='ignore'):
+        # ln A in the precision of A, which may be beyond the range of dtype
+        log_A = np.log(A).astype(dtype)
+    return log_A + b * np.log(T) - E / (np.asarray(R, dtype=dtype) * T)
+
+
+def troe_centering (troe, T):
+    """Returns the centering Fcent = (1 - a) exp(-T/T3) + a exp(-T/T1) +
+    exp(-T2/T) of Troe falloff parameters troe = (a, T3, T1, T2), an array of
+    shape (..., 4), at temperatures T broadcastable against troe[..., 0], in
+    the floating-point type of troe. A
+    NaN T2 drops the last term; NaN parameters (Lindemann falloff) give NaN.
+
+    EXAMPLES
+    =========
+    >>> troe_centering([[0.7346, 94.0, 1756.0, 5182.0], [0.5, 1e-30, 1e30, np.nan]], 1000.0)
+    array([0.42127582, 0.5       ])
+    """
+    troe = _float_array(troe)
+    T = np.asarray(T, dtype=troe.dtype)
+    a, T3, T1, T2 = troe[..., 0], troe[..., 1], troe[..., 2], troe[..., 3]
+    with np.errstate(over='ignore'):
+        fcent = (1 - a) * np.exp(-T / T3) + a * np.exp(-T / T1)
+        return fcent + np.where(np.isnan(T2), 0.0, np.exp(-T2 / T))
+
+
+def falloff_factor (Pr, fcent):
+    """Returns the broadening factor F of falloff reactions at reduced
+    pressures Pr, given their Troe centering fcent (see troe_centering();
+    NaN for Lindemann falloff, where F = 1), and its derivative
+    d(log10 F)/d(log10 Pr), in one vectorized pass over arrays of any
+    (broadcastable) shapes, in the floating-point type of Pr
+
+        log10 F = log10 Fcent / (1 + f1**2),  f1 = (log10 Pr + c) / (n - 0.14 (log10 Pr + c))
+        c = -0.4 - 0.67 log10 Fcent,  n = 0.75 - 1.27 log10 Fcent
+
+    RETURNS
+    ========
+    (F, d_log_F): numpy arrays of floats
+
+    EXAMPLES
+    =========
+    >>> F, d_log_F = falloff_factor([1e-3, 1.0, 1e3], [0.5, 0.5, np.nan])
+    >>> F
+    array([0.87285506, 0.5099377 , 1.        ])
+    """
+    Pr = _float_array(Pr)
+    fcent = np.asarray(fcent, dtype=Pr.dtype)
+    log_fcent = np.log10(np.where(np.isnan(fcent), 1.0, fcent))
+    # Pr = 0 (no third bodies) is clipped to the smallest float, near the low-pressure limit of F
+    log_pr = np.log10(np.maximum(Pr, np.finfo(Pr.dtype).tiny))
+    c = -0.4 - 0.67 * log_fcent
+    n = 0.75 - 1.27 * log_fcent
+    x = log_pr + c
+    denominator = n - 0.14 * x
+    f1 = x / denominator
+    log_F = log_fcent / (1 + f1 ** 2)
+    d_log_F = -log_fcent * 2 * f1 / (1 + f1 ** 2) ** 2 * n / denominator ** 2
+    return np.power(10.0, log_F), d_log_F
+
+
 class BackwardCoefficient():
     """ Class of BackwardCoefficient
     """
 
-    def __init__ (self, species, T, ki, is_reversible, vi_p, vi_dp, db_name='NASA_coef.sqlite'):
+    def __init__ (self, species, T, ki, is_reversible, vi_p, vi_dp, db_name='NASA_coef.thermo'):
         self.p0 = 10e5
         self.R = 8.314
         self.species = species
@@ -304,11 +439,12 @@ class BackwardCoefficient():
         self.is_reversible = is_reversible
         self.vi_p = vi_p
         self.vi_dp = vi_dp
-        self.vi = np.matrix(self.vi_dp).T - np.matrix(self.vi_p).T  # calculate overall stoicheometric coefficients
+        self.vi = (np.array(self.vi_dp, dtype=float) - np.array(self.vi_p, dtype=float)).T  # calculate overall stoicheometric coefficients
         self.gamma = np.sum(self.vi, axis=0)
         self.dao = ThermoDAO(db_name)
 
 
+    @profiling.timed('BackwardCoefficient.get_backward_coefs')
     def get_backward_coefs (self):
         species_high = self.dao.get_species(self.T, 'high')
         species_low = self.dao.get_species(self.T, 'low')
@@ -337,10 +473,10 @@ class BackwardCoefficient():
             S_coef_arr = np.array([NASA_coefs[0], NASA_coefs[1], NASA_coefs[2], NASA_coefs[3], NASA_coefs[4], NASA_coefs[6]])
             S_over_R_species.append(np.dot(S_T_arr, S_coef_arr))
 
-        delta_H_over_RT = np.squeeze(np.asarray(np.dot(H_over_RT_species, self.vi))) # delta enthalpy of a system of reactions
-        delta_S_over_R = np.squeeze(np.asarray(np.dot(S_over_R_species, self.vi))) # delta entropy of a system of reactions
+        delta_H_over_RT = np.dot(H_over_RT_species, self.vi) # delta enthalpy of a system of reactions
+        delta_S_over_R = np.dot(S_over_R_species, self.vi) # delta entropy of a system of reactions
 
-        factor = np.asarray(np.power(self.p0 / (self.R * self.T), self.gamma))[0]
+        factor = np.power(self.p0 / (self.R * self.T), self.gamma)
 
         for index, rxn_is_rev in enumerate(self.is_reversible):
             if rxn_is_rev:
@@ -0,0 +1,90 @@
+"""
+Test suite for the compiled_mechanism.py module
+
+"""
+
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.]  # specie concentrations of rxns_reversible.xml
+
+
+@pytest.mark.parametrize('name', ['rxns_reversible', 'rxns_reversible_and_irreversible', 'rxns_hw5'])
+def test_CompiledMechanism_matches_ElementaryRxn(name):
+    parser = XmlParser(pckg_xml_path(name))
+    mech = CompiledMechanism.from_parser(parser)
+    Ti = [10, 500, 999, 1000, 1500, 3500]
+    xi = np.linspace(0.5, 2, len(mech.species))
+    rates = mech.reaction_rates(Ti, xi)
+    for parsed_data, row in zip(parser.parsed_data_list(Ti), rates):
+        if str(parsed_data['b_ki']) == 'Not Defined':
+            assert np.all(np.isnan(row))
+            continue
+        rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], list(xi),
+                            parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+        assert np.allclose(row, rxn.reaction_rate(), rtol=1e-10)
+
+
+def test_CompiledMechanism_broadcasts_concentrations():
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    xi = np.array([[2., 1., .5, 1., 1., 1., .5, 1.], [1., 1., 1., 1., 1., 1., 1., 1.]])
+    rates = mech.reaction_rates(1500.0, xi)
+    assert rates.shape == (2, 8)
+    assert np.allclose(rates[1], mech.reaction_rates(1500.0, xi[1])[0])
+
+
+def test_CompiledMechanism_neg_concentrations():
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    with pytest.raises(ValueError):
+        mech.reaction_rates(1500.0, [-1., 1., .5, 1., 1., 1., .5, 1.])
+
+
+def test_CompiledMechanism_non_elementary():
+    with pytest.raises(ChemKinError):
+        CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_non_elementary')))
+
+
+@pytest.mark.parametrize('name', ['rxns_reversible', 'rxns_reversible_and_irreversible', 'rxns_hw5',
+                                  'rxns_falloff'])
+def test_CompiledMechanism_float32_error_bounds(name):
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path(name)))
+    mech32 = mech.astype(np.float32)
+    assert mech32.dtype == np.float32 and mech32.A.dtype == np.float32
+    rng = np.random.RandomState(0)
+    T = rng.uniform(900, 2500, 2000)
+    xi = 10 ** rng.uniform(-6, 0, (2000, len(mech.species)))
+    xi[rng.rand(*xi.shape) < 0.1] = 0.0
+
+    ki, b_ki = mech.coefficients(T)
+    ki32, b_ki32 = mech32.coefficients(T)
+    assert ki32.dtype == np.float32
+    # the documented bounds, see CompiledMechanism
+    assert np.all(np.abs(ki32 - ki) <= 2e-5 * ki)
+    reversible = mech.reversible
+    assert np.all(np.abs(b_ki32[:, reversible] - b_ki[:, reversible]) <= 2e-5 * b_ki[:, reversible])
+
+    # the rate of each species within 2e-5 of the progress rates it adds up
+    rates, rates32 = mech.reaction_rates(T, xi), mech32.reaction_rates(T, xi)
+    assert rates32.dtype == np.float32
+    f_wi = ki * np.prod(np.power(xi[:, None, :], mech.vi_p), axis=2)
+    b_wi = b_ki * np.prod(np.power(xi[:, None, :], mech.vi_dp), axis=2)
+    g = mech.modifiers(T, ki, xi)
+    scale = np.dot(g * (f_wi + b_wi), np.abs(mech.nu))
+    assert np.all(np.abs(rates32 - rates) <= 2e-5 * scale + np.finfo(np.float32).tiny)
+
+
+def test_CompiledMechanism_dtype():
+    parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    mech = CompiledMechanism.from_parser(parser, dtype=np.float32)
+    assert mech.astype(np.float64).reaction_rates(1500.0, XI).dtype == np.float64
+    assert np.all(np.isfinite(mech.log_coefficients(1500.0)[1]))
+    with pytest.raises(ChemKinError):
+        CompiledMechanism.from_parser(parser, dtype=np.int32)
+    with pytest.raises(ChemKinError):
+        CompiledMechanism(['H', 'O'], ['H =] O'], [[1., 0.]], [[0., 1.]], [False], [1e40], [0.], [0.],
+                          np.zeros((2, 7)), np.zeros((2, 7)), [300., 300.], [5000., 5000.], dtype=np.float32)
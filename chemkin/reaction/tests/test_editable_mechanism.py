@@ -0,0 +1,92 @@
+"""
+Test suite for the editable_mechanism.py module
+
+"""
+
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.reaction.editable_mechanism import EditableMechanism
+from chemkin.solver.shared import attached_mechanism, share_mechanism
+
+
+TI = [500, 999, 1000, 1500, 3000]
+XI = np.linspace(0.5, 2, 8)
+
+
+def fresh(mech):
+    """CompiledMechanism of the same reactions, compiled afresh"""
+    return CompiledMechanism(mech.species, mech.equations, np.array(mech.vi_p), np.array(mech.vi_dp),
+                             np.array(mech.reversible), np.array(mech.A), np.array(mech.b), np.array(mech.E),
+                             mech.nasa_low, mech.nasa_high, mech.t_low, mech.t_high)
+
+
+def assert_consistent(mech):
+    expected = fresh(mech)
+    for name in ('vi_p', 'vi_dp', 'nu', 'gamma', 'reversible', 'A', 'b', 'E'):
+        assert np.array_equal(getattr(mech, name), getattr(expected, name))
+    assert np.allclose(mech.equilibrium_constants(TI), expected.equilibrium_constants(TI), rtol=1e-12)
+    assert np.allclose(mech.reaction_rates(TI, XI), expected.reaction_rates(TI, XI), rtol=1e-10)
+    assert np.array_equal(mech.jacobian_sparsity(), expected.jacobian_sparsity())
+
+
+def test_EditableMechanism_matches_compiled_mechanism():
+    parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    mech = EditableMechanism.from_parser(parser)
+    assert np.array_equal(mech.reaction_rates(TI, XI), CompiledMechanism.from_parser(parser).reaction_rates(TI, XI))
+
+
+def test_EditableMechanism_edits_stay_consistent():
+    mech = EditableMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    equations = list(mech.equations)
+    mech.equilibrium_constants(TI)  # the edits below update the cache
+    for i in range(20):  # beyond the initial capacity
+        j = mech.add_reaction({'H': 1, 'O2': 1}, {'HO2': 1}, A=1e9 * (i + 1), b=0.5, E=1e3, reversible=i % 2 == 0)
+    assert j == 30 and mech.equations[-1] == 'H + O2 =] HO2'
+    assert_consistent(mech)
+
+    mech.remove_reaction(3)
+    mech.remove_reaction(-1)
+    mech.update_reaction(0, A=1e12, E=2e4)
+    mech.update_reaction(5, reactants={'H2O2': 1}, products={'OH': 2}, reversible=True)
+    mech.update_reaction(7, reversible=False)
+    assert len(mech) == 29 and mech.version == 25
+    assert mech.equations[:10] == equations[:3] + equations[4:11]
+    assert_consistent(mech)
+    assert_consistent(mech.compiled())
+
+
+def test_EditableMechanism_edits_resize_falloff_arrays():
+    mech = EditableMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    for i in range(20):
+        mech.add_reaction({'H': 1, 'O2': 1}, {'HO2': 1}, A=1e9 * (i + 1), reversible=True)
+    mech.remove_reaction(0)
+    for name in ('third_body', 'A0', 'b0', 'E0', 'troe', 'efficiencies'):
+        assert getattr(mech, name).shape[0] == len(mech) == 30
+    assert not np.any(mech.third_body) and np.all(np.isnan(mech.troe))
+
+    expected = fresh(mech)
+    ki, b_ki = mech.coefficients(TI)
+    for value, expected_value in zip((ki, b_ki), expected.coefficients(TI)):
+        assert np.allclose(value, expected_value, rtol=1e-12)
+    assert np.array_equal(mech.modifiers(TI, ki, XI), np.ones((len(TI), 30)))
+    assert mech.astype(np.float32).reaction_rates(TI, XI).shape == (len(TI), 8)
+    assert np.array_equal(mech.astype(np.float64).reaction_rates(TI, XI), expected.reaction_rates(TI, XI))
+    with share_mechanism(mech) as shared:
+        attached = attached_mechanism(shared, mech.species, mech.equations)
+        assert np.array_equal(attached.reaction_rates(TI, XI), expected.reaction_rates(TI, XI))
+        del attached
+
+
+def test_EditableMechanism_invalid_edits():
+    mech = EditableMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    with pytest.raises(ChemKinError):
+        mech.add_reaction({'CH4': 1}, {'H': 1}, A=1.0)
+    with pytest.raises(ValueError):
+        mech.update_reaction(0, A=-1.0)
+    with pytest.raises(ChemKinError):
+        mech.remove_reaction(11)
+    assert len(mech) == 11 and mech.version == 0
@@ -4,6 +4,7 @@ Test suite for the elementary_rxn.py module
 """
 
 import chemkin.reaction.elementary_rxn as er
+import numpy as np
 import io
 import sys
 
@@ -105,3 +106,45 @@ def test_Elementary_reaction_rate_dim_compat():
 def test_Elementary_n_reversible():
     reac1 = er.ElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[2.0, 0.0], [2.0, 0.0, 2.0]],[[0.0, 0.0 , 2.0], [0.0, 1.0, 1.0]])
     assert reac1.n_reversible() == 2
+
+def test_Elementary_jacobian_finite_difference():
+    ki, b_ki = [10, 10], [10, 5]
+    vi_p, vi_dp = [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]]
+    xi = np.array([1.0, 2.0, 0.5])
+    jac = er.ElementaryRxn(ki, b_ki, xi, vi_p, vi_dp).jacobian()
+    h = 1e-6
+    for k in range(len(xi)):
+        dx = np.zeros(len(xi))
+        dx[k] = h
+        up = er.ElementaryRxn(ki, b_ki, xi + dx, vi_p, vi_dp).reaction_rate()
+        down = er.ElementaryRxn(ki, b_ki, xi - dx, vi_p, vi_dp).reaction_rate()
+        assert np.allclose(jac[:, k], (up - down) / (2 * h), rtol=1e-6)
+
+
+def test_Elementary_progress_rate_jacobian_finite_difference():
+    ki, b_ki = [10, 10], [10, 5]
+    vi_p, vi_dp = [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]]
+    xi = np.array([1.0, 2.0, 0.5])
+    dw = er.ElementaryRxn(ki, b_ki, xi, vi_p, vi_dp).progress_rate_jacobian()
+    h = 1e-6
+    for k in range(len(xi)):
+        dx = np.zeros(len(xi))
+        dx[k] = h
+        up = er.ElementaryRxn(ki, b_ki, xi + dx, vi_p, vi_dp).progress_rate()
+        down = er.ElementaryRxn(ki, b_ki, xi - dx, vi_p, vi_dp).progress_rate()
+        assert np.allclose(dw[:, k], (up - down) / (2 * h), rtol=1e-6)
+
+
+def test_Elementary_jacobian_zero_concentration():
+    reac1 = er.ElementaryRxn([10, 10], [10, 10], [0.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]], [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]])
+    jac = reac1.jacobian()
+    assert np.all(np.isfinite(jac))
+    assert jac[0, 0] == -40.0
+
+
+def test_Elementary_jacobian_neg_xi():
+    reac1 = er.ElementaryRxn([10, 10], [10, 10], [-1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]],[[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]])
+    try:
+        reac1.jacobian()
+    except ValueError as err:
+        assert(type(err) == ValueError)
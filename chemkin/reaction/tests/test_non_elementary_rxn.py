@@ -0,0 +1,99 @@
+"""
+Test suite for the non_elementary_rxn.py module
+
+"""
+
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import RxnType, XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.reaction.editable_mechanism import EditableMechanism
+from chemkin.reaction.non_elementary_rxn import NonElementaryRxn, pressure_modifiers, rxn_from_parsed_data
+from chemkin.reaction.reaction_coefficients import falloff_factor, troe_centering
+from chemkin.solver.ODEint_solver import ODE_int_solver
+
+XI = np.array([2., 1., .5, 1., 1., 1., .5, 1.])
+
+
+def test_parse_falloff():
+    species, rxn_data = XmlParser(pckg_xml_path('rxns_falloff')).load()
+    assert [rxn.type for rxn in rxn_data] == [RxnType.Elementary] + [RxnType.ThreeBody] * 2 + [RxnType.Falloff] * 3
+    assert rxn_data[1].efficiencies == {'H2': 2.4, 'H2O': 15.4}
+    assert rxn_data[3].low_rate_coeff == [6.366e+20, -1.72, 524.8]
+    assert rxn_data[3].troe[:3] == [0.8, 1e-30, 1e+30] and np.isnan(rxn_data[3].troe[3])
+    assert rxn_data[5].troe is None and rxn_data[5].default_efficiency == 0.5
+    assert rxn_data[1].rxn_equation == '2O + M [=] O2 + M'
+    assert rxn_data[4].rxn_equation == '2OH (+M) [=] H2O2 (+M)'
+
+
+def test_troe_hand_computed():
+    T, Pr = 1200.0, 0.3
+    a, T3, T1, T2 = 0.7346, 94.0, 1756.0, 5182.0
+    fcent = (1 - a) * np.exp(-T / T3) + a * np.exp(-T / T1) + np.exp(-T2 / T)
+    c = -0.4 - 0.67 * np.log10(fcent)
+    n = 0.75 - 1.27 * np.log10(fcent)
+    f1 = (np.log10(Pr) + c) / (n - 0.14 * (np.log10(Pr) + c))
+    F = 10 ** (np.log10(fcent) / (1 + f1 ** 2))
+    assert np.isclose(troe_centering([a, T3, T1, T2], T), fcent, rtol=1e-14)
+    assert np.isclose(falloff_factor(Pr, fcent)[0], F, rtol=1e-14)
+    g, _ = pressure_modifiers(Pr, 2.0, 2.0, fcent, True)
+    assert np.isclose(g, Pr / (1 + Pr) * F, rtol=1e-14)
+
+
+def test_falloff_limits():
+    # low pressure: k0 M; high pressure: ki
+    g, _ = pressure_modifiers([1e-12, 1e12], 1.0, 2.0, np.nan, True)
+    assert np.allclose(g * 1.0, [2e-12, 1.0], rtol=1e-10)
+
+
+@pytest.mark.parametrize('scale', [1e-12, 1e-6, 1e-3, 1.0])
+def test_CompiledMechanism_matches_NonElementaryRxn(scale):
+    parser = XmlParser(pckg_xml_path('rxns_falloff'))
+    mech = CompiledMechanism.from_parser(parser)
+    Ti = [900.0, 1500.0, 2500.0]
+    rates = mech.reaction_rates(Ti, scale * XI)
+    for T, parsed_data, row in zip(Ti, parser.parsed_data_list(Ti), rates):
+        rxn = rxn_from_parsed_data(parsed_data, list(scale * XI))
+        assert isinstance(rxn, NonElementaryRxn)
+        assert np.allclose(row, rxn.reaction_rate(), rtol=1e-12, atol=0)
+        assert np.allclose(row, mech.rxn(T, scale * XI).evaluate(scale * XI)[0], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize('scale', [1e-9, 1e-3, 1.0])
+def test_NonElementaryRxn_jacobian(scale):
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_falloff')))
+    xi = scale * XI
+    rxn = mech.rxn(1500.0, xi)
+    jac = rxn.jacobian(xi)
+    fd = np.zeros_like(jac)
+    for k in range(len(xi)):
+        h = 1e-6 * xi[k]
+        up, down = xi.copy(), xi.copy()
+        up[k] += h
+        down[k] -= h
+        fd[:, k] = (rxn.evaluate(up)[0] - rxn.evaluate(down)[0]) / (2 * h)
+    assert np.allclose(jac, fd, rtol=1e-5, atol=1e-6 * np.max(np.abs(jac)))
+    assert not np.any(jac[~mech.jacobian_sparsity()])
+
+
+def test_NonElementaryRxn_elementary_rows():
+    rxn = NonElementaryRxn([10, 10], [10, 10], [1.0, 2.0, 1.0], [[1.0, 2.0, 0.0], [2.0, 0.0, 2.0]],
+                           [[0.0, 0.0, 2.0], [0.0, 1.0, 1.0]], [False, False], np.zeros((2, 3)))
+    assert np.array_equal(rxn.reaction_rate(), [-10., -70., 70.])
+
+
+def test_NonElementaryRxn_solve():
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_falloff')))
+    xi = 1e-6 * XI
+    sol, _, _ = ODE_int_solver(1500.0, mech.rxn(1500.0, xi)).solve(np.linspace(0, 1e-6, 11))
+    assert np.all(np.isfinite(sol))
+    # the H and O atoms are conserved
+    atoms = np.array([[1, 0, 1, 2, 2, 0, 1, 2], [0, 1, 1, 0, 1, 2, 2, 2]])
+    assert np.allclose(np.dot(sol, atoms.T), np.dot(xi, atoms.T), rtol=1e-6)
+
+
+def test_EditableMechanism_falloff():
+    with pytest.raises(ChemKinError):
+        EditableMechanism.from_parser(XmlParser(pckg_xml_path('rxns_falloff')))
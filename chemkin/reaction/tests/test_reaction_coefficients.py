@@ -163,3 +163,11 @@ def test_get_backward_coefs_low_range_err():
     xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
     parsed_data_list = xml_parser.parsed_data_list(Ti) # calling Thermo().get_backward_coefs()
     assert parsed_data_list[0]['b_ki'] == 'Not Defined'
+
+
+def test_get_backward_coefs_single_rxn():
+    # H + O2 <-> O + OH on its own
+    b_ki = BackwardCoefficient(['H', 'O', 'OH', 'O2'], 1500, [10.0], [True],
+                               [[1.0, 0.0, 0.0, 1.0]], [[0.0, 1.0, 1.0, 0.0]]).get_backward_coefs()
+    assert len(b_ki) == 1
+    assert b_ki[0] > 0
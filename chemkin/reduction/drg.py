@@ -0,0 +1,295 @@
+"""
+Contains class DRGReducer to reduce a reaction mechanism with the directed
+relation graph (DRG) and DRG with error propagation (DRGEP) methods, and class
+ReducedMechanism holding the result.
+"""
+import heapq
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import RxnType, XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def samples_from_trajectory (T, sol, stride=1):
+    """Turns a solved trajectory at temperature T (e.g. the output of
+    RxnBase.species_concentration_evolution()) into a list of (T, xi) sample
+    states, keeping every stride-th time step.
+    """
+    return [(T, list(xi)) for xi in np.asarray(sol)[::stride]]
+
+
+class DRGReducer():
+    """Reduces a mechanism by discarding species that barely influence a set
+    of target species at the sampled states.
+
+    The direct interaction coefficient r_AB measures how much removing
+    species B perturbs the production rate of species A, based on the
+    progress rates of the reactions at each sample state:
+        DRG:   r_AB = sum_j |nu_Aj w_j delta_Bj| / sum_j |nu_Aj w_j|
+        DRGEP: r_AB = |sum_j nu_Aj w_j delta_Bj| / max(P_A, C_A)
+    where delta_Bj = 1 if species B takes part in reaction j and P_A, C_A are
+    the production and consumption rates of A. The importance of a species is
+    the strongest path from any target to it in the graph of coefficients: the
+    weakest link along the path for DRG, the product along the path for DRGEP.
+    Species whose importance is below a threshold are removed together with
+    every reaction they take part in.
+
+    Attributes:
+        xml_parser (XmlParser): Parser of the full mechanism.
+        targets (list of str): Species whose rates must be preserved.
+        samples (list of (float, list of floats)): Sample states (T, xi), with
+            xi ordered like the species of the full mechanism.
+        method (str, default 'DRGEP'): 'DRG' or 'DRGEP'.
+        species (list of str): Species of the full mechanism.
+        importance (numpy array of floats): Importance of each species,
+            maximized over targets and samples.
+    """
+
+    def __init__ (self, xml_parser, targets, samples, method='DRGEP'):
+        if method not in ('DRG', 'DRGEP'):
+            raise ChemKinError('DRGReducer()',
+                               'Unknown reduction method {}.'.format(method))
+        self.xml_parser = xml_parser
+        self.method = method
+        self.samples = samples
+        self.species, self._rxn_data = xml_parser.load()
+        if any(rxn_data.type != RxnType.Elementary for rxn_data in self._rxn_data):
+            raise ChemKinError('DRGReducer()', 'Only elementary reactions can be reduced.')
+        self.targets = [t.upper() for t in targets]
+        for t in self.targets:
+            if t not in self.species:
+                raise ChemKinError('DRGReducer()',
+                                   'Target {} is not a species of the mechanism.'.format(t))
+
+        # Parse the full mechanism once per distinct temperature.
+        Ti = sorted(set(T for T, _ in samples))
+        self._full_data = self.__parsed_data_by_T(xml_parser, Ti)
+
+        self._vi_p = np.array(self._full_data[Ti[0]]['sys_vi_p'])
+        self._vi_dp = np.array(self._full_data[Ti[0]]['sys_vi_dp'])
+        self._nu = (self._vi_dp - self._vi_p).T  # shape (n_species, n_rxns)
+        self._involved = ((self._vi_p + self._vi_dp) > 0).astype(float)  # shape (n_rxns, n_species)
+
+        target_idx = [self.species.index(t) for t in self.targets]
+        self.importance = np.zeros(len(self.species))
+        for T, xi in samples:
+            coeffs = self.direct_interaction_coefficients(T, xi)
+            self.importance = np.maximum(self.importance,
+                                         self.__path_importance(coeffs, target_idx))
+
+    @staticmethod
+    def __parsed_data_by_T (xml_parser, Ti):
+        result = {}
+        for parsed_data in xml_parser.parsed_data_list(Ti):
+            if str(parsed_data['b_ki']) == 'Not Defined':
+                raise ChemKinError('DRGReducer()',
+                                   'Backward reaction coefficients not defined at '
+                                   'T={}.'.format(parsed_data['T']))
+            result[parsed_data['T']] = parsed_data
+        return result
+
+    @staticmethod
+    def __rxn (parsed_data, xi):
+        return ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                             parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+
+    def direct_interaction_coefficients (self, T, xi):
+        """Returns the matrix of direct interaction coefficients r_AB (rows A,
+        columns B) at the state (T, xi).
+        """
+        wi = np.atleast_1d(self.__rxn(self._full_data[T], xi).progress_rate())
+        rates = self._nu * wi  # contribution of reaction j to the rate of species A
+
+        if self.method == 'DRG':
+            numerator = np.dot(np.abs(rates), self._involved)
+            denominator = np.sum(np.abs(rates), axis=1)
+        else:
+            numerator = np.abs(np.dot(rates, self._involved))
+            denominator = np.maximum(np.sum(np.maximum(rates, 0), axis=1),
+                                     np.sum(np.maximum(-rates, 0), axis=1))
+
+        coeffs = np.zeros_like(numerator)
+        active = denominator > 0
+        coeffs[active] = numerator[active] / denominator[active, None]
+        np.fill_diagonal(coeffs, 0.0)
+        return np.minimum(coeffs, 1.0)
+
+    def __path_importance (self, coeffs, target_idx):
+        """Returns the strongest path value from any target to every species
+        (modified Dijkstra search on the graph of interaction coefficients).
+        """
+        if self.method == 'DRG':
+            combine = min
+        else:
+            combine = lambda a, b: a * b
+
+        importance = np.zeros(len(coeffs))
+        heap = []
+        for t in target_idx:
+            importance[t] = 1.0
+            heapq.heappush(heap, (-1.0, t))
+        while heap:
+            value, a = heapq.heappop(heap)
+            value = -value
+            if value < importance[a]:
+                continue
+            for b in np.nonzero(coeffs[a])[0]:
+                path_value = combine(value, coeffs[a, b])
+                if path_value > importance[b]:
+                    importance[b] = path_value
+                    heapq.heappush(heap, (-path_value, b))
+        return importance
+
+    def reduce (self, threshold):
+        """Returns the ReducedMechanism keeping species whose importance is at
+        least threshold, with its error and speedup against the full mechanism.
+        """
+        species_idx = [i for i, v in enumerate(self.importance) if v >= threshold]
+        kept = set(self.species[i] for i in species_idx)
+        rxn_idx = [j for j, rxn_data in enumerate(self._rxn_data)
+                   if set(rxn_data.reactants) <= kept and set(rxn_data.products) <= kept]
+
+        reduced = ReducedMechanism([self.species[i] for i in species_idx],
+                                   [self._rxn_data[j] for j in rxn_idx])
+        reduced.species_idx = species_idx
+        reduced.rxn_idx = rxn_idx
+        reduced.threshold = threshold
+        reduced.error, reduced.speedup = self.__compare(reduced)
+        return reduced
+
+    def reduce_to_tolerance (self, tolerance):
+        """Returns the smallest ReducedMechanism whose error is within tolerance.
+
+        Every distinct species importance is a candidate threshold; the largest
+        one meeting the tolerance is used.
+        """
+        best = self.reduce(0.0)
+        for threshold in np.unique(self.importance):
+            if threshold <= best.threshold:
+                continue
+            candidate = self.reduce(threshold)
+            if candidate.error <= tolerance:
+                best = candidate
+        return best
+
+    def __compare (self, reduced, n_repeat=5):
+        """Returns the error and speedup of the reduced mechanism.
+
+        The error is the largest deviation of the reaction rate of a target
+        species over all samples, relative to the largest magnitude of that
+        rate in the full mechanism. The speedup is the ratio of the time taken
+        by ElementaryRxn.reaction_rate() over all samples.
+        """
+        full_samples = [(self._full_data[T], xi) for T, xi in self.samples]
+        target_full = [self.species.index(t) for t in self.targets]
+        full_rates = np.array([self.__rxn(data, xi).reaction_rate()[target_full]
+                               for data, xi in full_samples])
+
+        if len(reduced.rxn_data) == 0:
+            reduced_samples = []
+            reduced_rates = np.zeros_like(full_rates)
+        else:
+            reduced_data = self.__parsed_data_by_T(reduced, sorted(self._full_data))
+            reduced_samples = [(reduced_data[T], [xi[i] for i in reduced.species_idx])
+                               for T, xi in self.samples]
+            target_reduced = [reduced.species.index(t) for t in self.targets]
+            reduced_rates = np.array([np.atleast_1d(self.__rxn(data, xi).reaction_rate())[target_reduced]
+                                      for data, xi in reduced_samples])
+
+        scale = np.max(np.abs(full_rates), axis=0)
+        scale[scale == 0] = 1.0
+        error = float(np.max(np.abs(reduced_rates - full_rates) / scale))
+
+        full_time = self.__time_rates(full_samples, n_repeat)
+        reduced_time = self.__time_rates(reduced_samples, n_repeat)
+        speedup = full_time / reduced_time if reduced_time > 0 else float('inf')
+        return error, speedup
+
+    def __time_rates (self, samples, n_repeat):
+        start = time.perf_counter()
+        for _ in range(n_repeat):
+            for data, xi in samples:
+                self.__rxn(data, xi).reaction_rate()
+        return time.perf_counter() - start
+
+
+class ReducedMechanism(XmlParser):
+    """Mechanism produced by DRGReducer.
+
+    Behaves like an XmlParser whose reactions are held in memory, so that
+    parsed_data_list(Ti) feeds the reduced mechanism into the usual
+    ElementaryRxn / ODE_int_solver flow; to_xml() writes it as a CTML file
+    loadable by XmlParser.
+
+    Attributes:
+        species (list of str): Species kept.
+        rxn_data (list of RxnData): Reactions kept.
+        species_idx (list of int): Indices of the kept species in the full
+            mechanism, to select concentrations: [xi[i] for i in species_idx].
+        rxn_idx (list of int): Indices of the kept reactions in the full
+            mechanism.
+        threshold (float): Importance threshold used for the reduction.
+        error (float): Largest relative deviation of the target species'
+            rates at the sample states.
+        speedup (float): Ratio of rate evaluation times, full over reduced.
+    """
+
+    def __init__ (self, species, rxn_data):
+        self.path = None
+        self.species = species
+        self.rxn_data = rxn_data
+        self.species_idx = None
+        self.rxn_idx = None
+        self.threshold = None
+        self.error = None
+        self.speedup = None
+
+    def __repr__ (self):
+        return 'ReducedMechanism(n_species={}, n_rxns={}, threshold={}, error={}, speedup={})'.format(
+              len(self.species), len(self.rxn_data), self.threshold, self.error, self.speedup)
+
+    def load (self):
+        """ Returns the species and list of RxnData objects of the reduced
+        mechanism.
+        """
+        return self.species, self.rxn_data
+
+    def to_xml (self, path):
+        """ Writes the reduced mechanism to a CTML XML file at path. """
+        root = ET.Element('ctml')
+        phase = ET.SubElement(root, 'phase')
+        ET.SubElement(phase, 'speciesArray').text = ' {} '.format(' '.join(self.species))
+
+        reaction_data = ET.SubElement(root, 'reactionData', id='reduced_mechanism')
+        for rxn_data in self.rxn_data:
+            rxn = ET.SubElement(reaction_data, 'reaction',
+                                reversible='yes' if rxn_data.reversible else 'no',
+                                type='Elementary', id=rxn_data.rxn_id)
+            ET.SubElement(rxn, 'equation').text = rxn_data.rxn_equation
+            rate_coeff = ET.SubElement(rxn, 'rateCoeff')
+            coef_params = rxn_data.rate_coeff
+            if isinstance(coef_params, list):
+                if len(coef_params) == 3:
+                    coef = ET.SubElement(rate_coeff, 'modifiedArrhenius')
+                    names = ['A', 'b', 'E']
+                else:
+                    coef = ET.SubElement(rate_coeff, 'Arrhenius')
+                    names = ['A', 'E']
+                for name, value in zip(names, coef_params):
+                    ET.SubElement(coef, name).text = repr(value)
+            else:
+                coef = ET.SubElement(rate_coeff, 'Constant')
+                ET.SubElement(coef, 'k').text = repr(coef_params)
+            ET.SubElement(rxn, 'reactants').text = ' '.join(
+                  '{}:{}'.format(s, v) for s, v in rxn_data.reactants.items())
+            ET.SubElement(rxn, 'products').text = ' '.join(
+                  '{}:{}'.format(s, v) for s, v in rxn_data.products.items())
+
+        if path[-4:] != '.xml':
+            path += '.xml'
+        ET.ElementTree(root).write(path, xml_declaration=True)
+        return path
@@ -0,0 +1,86 @@
+"""
+Tests for the drg.py module
+"""
+
+import os
+import numpy as np
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reduction.drg import DRGReducer, ReducedMechanism, samples_from_trajectory
+
+
+def get_samples(xml_parser, T, xi, end_t=1e-11):
+    parsed_data = xml_parser.parsed_data_list([T])[0]
+    rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                        parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    sol = rxn.species_concentration_evolution(T, end_t, 11)
+    return samples_from_trajectory(T, sol[1:])
+
+
+def test_samples_from_trajectory():
+    sol = np.arange(12.).reshape(4, 3)
+    samples = samples_from_trajectory(1500, sol, stride=2)
+    assert samples == [(1500, [0., 1., 2.]), (1500, [6., 7., 8.])]
+
+
+def test_reduce_removes_unimportant_species():
+    xi = [1e-3, 1e-3, 1e-3, 2., 0., 1., 0., 0.] # no HO2 or H2O2 in 'rxns_reversible.xml'
+    xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    samples = get_samples(xml_parser, 1500, xi)
+    for method in ['DRG', 'DRGEP']:
+        reducer = DRGReducer(xml_parser, ['H2', 'O2'], samples, method=method)
+        assert reducer.importance[reducer.species.index('H2')] == 1.0
+
+        reduced = reducer.reduce_to_tolerance(1e-3)
+        assert isinstance(reduced, ReducedMechanism)
+        assert 'HO2' not in reduced.species and 'H2O2' not in reduced.species
+        assert reduced.error <= 1e-3
+        assert reduced.speedup > 0
+        assert len(reduced.rxn_data) == len(reduced.rxn_idx) < 11
+
+
+def test_reduce_threshold_zero_keeps_everything():
+    xi = [2.0, 1.0, 0.5, 1.0, 1.0]  # specie concentrations for 'rxns_hw5.xml'
+    xml_parser = XmlParser(pckg_xml_path('rxns_hw5'))
+    reducer = DRGReducer(xml_parser, ['H2'], get_samples(xml_parser, 1500, xi))
+    reduced = reducer.reduce(0.0)
+    assert reduced.species == reducer.species
+    assert reduced.rxn_idx == [0, 1, 2]
+    assert reduced.error == 0.0
+
+
+def test_reduced_mechanism_parsed_data_and_xml(tmpdir):
+    xi = [2.0, 1.0, 0.5, 1.0, 1.0]  # specie concentrations for 'rxns_hw5.xml'
+    xml_parser = XmlParser(pckg_xml_path('rxns_hw5'))
+    reducer = DRGReducer(xml_parser, ['H2'], get_samples(xml_parser, 1500, xi))
+    reduced = reducer.reduce(0.5)
+    assert reduced.species == ['H2', 'O2', 'OH']
+
+    # The reduced mechanism feeds the usual parsed_data_list() flow ...
+    parsed_data = reduced.parsed_data_list([1500])[0]
+    full_data = xml_parser.parsed_data_list([1500])[0]
+    assert parsed_data['species'] == reduced.species
+    assert parsed_data['ki'] == [full_data['ki'][j] for j in reduced.rxn_idx]
+
+    # ... and round-trips through a CTML file loadable by XmlParser
+    path = reduced.to_xml(os.path.join(str(tmpdir), 'reduced'))
+    loaded_data = XmlParser(path).parsed_data_list([1500])[0]
+    assert loaded_data['species'] == parsed_data['species']
+    assert loaded_data['ki'] == parsed_data['ki']
+    assert loaded_data['sys_vi_p'] == parsed_data['sys_vi_p']
+    assert loaded_data['sys_vi_dp'] == parsed_data['sys_vi_dp']
+    assert loaded_data['is_reversible'] == parsed_data['is_reversible']
+
+
+def test_reducer_bad_inputs():
+    xml_parser = XmlParser(pckg_xml_path('rxns_hw5'))
+    samples = [(1500, [2.0, 1.0, 0.5, 1.0, 1.0])]
+    for targets, method in [(['XX'], 'DRG'), (['H2'], 'DRGXX')]:
+        try:
+            DRGReducer(xml_parser, targets, samples, method=method)
+        except ChemKinError as err:
+            assert type(err) == ChemKinError
+        else:
+            assert False
@@ -0,0 +1,78 @@
+"""
+Runs the local rate service, see the server module:
+
+    python -m chemkin.service --port 8207 --mechanism h2=rxns_reversible
+    python -m chemkin.service --unix /tmp/chemkin.sock --mechanism h2=path/to/rxns.xml
+    python -m chemkin.service --mechanism-dir path/to/mechanisms/ --max-mechanisms 64 -j 8
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.service.registry import MechanismRegistry
+from chemkin.service.server import HTTPRateServer, RateService, UnixRateServer
+
+
+def _parser ():
+    parser = argparse.ArgumentParser(prog='python -m chemkin.service',
+                                     description='Serve reaction rates of resident mechanisms locally.')
+    parser.add_argument('--host', default='127.0.0.1', help='HTTP host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8207, help='HTTP port (default: 8207)')
+    parser.add_argument('--unix', metavar='PATH', help='also listen on the Unix socket PATH')
+    parser.add_argument('--no-http', action='store_true', help='do not listen over HTTP')
+    parser.add_argument('--mechanism', nargs='+', default=[], metavar='NAME=PATH',
+                        help='mechanisms to register at start-up')
+    parser.add_argument('--mechanism-dir', nargs='+', default=[], metavar='DIR',
+                        help='directories whose XML files are registered at start-up, by file name')
+    parser.add_argument('--max-mechanisms', type=int, metavar='N',
+                        help='largest number of compiled mechanisms kept in memory')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='processes compiling --mechanism-dir; 0 for one per CPU (default: 0)')
+    return parser
+
+
+def main (argv=None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.no_http and not args.unix:
+        parser.error('--no-http requires --unix')
+    service = RateService(MechanismRegistry(max_size=args.max_mechanisms))
+    try:
+        for directory in args.mechanism_dir:
+            loaded, errors = service.registry.load_directory(directory, n_workers=args.jobs or None)
+            for name, error in errors.items():
+                print('chemkin.service: skipped {}: {}'.format(name, error), file=sys.stderr)
+        for spec in args.mechanism:
+            name, _, path = spec.partition('=')
+            service.registry.load(name, path or name)
+    except (ChemKinError, OSError, ValueError) as err:
+        print('chemkin.service: error: {}'.format(err), file=sys.stderr)
+        return 1
+
+    servers = []
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        servers.append(UnixRateServer(service, args.unix))
+    if not args.no_http:
+        servers.append(HTTPRateServer(service, args.host, args.port))
+    for server in servers[:-1]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        servers[-1].serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.server_close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
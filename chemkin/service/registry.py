@@ -0,0 +1,193 @@
+"""
+Contains the in-memory registry of compiled mechanisms of the rate service.
+"""
+import collections
+import concurrent.futures
+import glob
+import hashlib
+import os
+import threading
+
+from chemkin import resolve_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+
+
+def _content_hash (path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _compile (path, db_name):
+    """Returns the CompiledMechanism of the XML file path. Runs in a worker
+    process of MechanismRegistry.load_many().
+    """
+    return CompiledMechanism.from_parser(XmlParser(path), db_name)
+
+
+class MechanismRegistry():
+    """Keeps compiled mechanisms resident by name, so that they are parsed and
+    their thermodynamic coefficients queried once per process. Thread-safe.
+
+    Mechanisms are compiled once per file content: names whose files are
+    identical share one compiled mechanism. With max_size, at most max_size
+    compiled mechanisms are kept, the least recently used being evicted; the
+    names stay registered, and a name whose mechanism was evicted is compiled
+    again from its file when next looked up.
+
+        registry = MechanismRegistry(max_size=64)
+        loaded, errors = registry.load_directory('mechanisms/', n_workers=8)
+        mech = registry.get('rxns_reversible')
+
+    Attributes:
+        db_name (str): NASA coefficients database of the compiled mechanisms.
+        max_size (int or None): Largest number of compiled mechanisms kept.
+        n_compiled (int): Number of mechanisms compiled so far.
+    """
+
+    def __init__ (self, db_name='NASA_coef.thermo', max_size=None):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.n_compiled = 0
+        self._paths = {}  # name -> (path, content hash)
+        self._cache = collections.OrderedDict()  # content hash -> CompiledMechanism, least recent first
+        self._lock = threading.Lock()
+
+    def __len__ (self):
+        return len(self._paths)
+
+    def __contains__ (self, name):
+        return name in self._paths
+
+    @property
+    def n_cached (self):
+        """Number of compiled mechanisms kept."""
+        return len(self._cache)
+
+    def load (self, name, path):
+        """Compiles the mechanism of the XML file path (or shipped mechanism
+        name) and registers it as name, replacing any mechanism of that name.
+        Returns the compiled mechanism.
+        """
+        path = resolve_xml_path(path)
+        digest = _content_hash(path)
+        with self._lock:
+            mechanism = self._cache.get(digest)
+        if mechanism is None:
+            mechanism = _compile(path, self.db_name)
+            with self._lock:
+                self.n_compiled += 1
+        with self._lock:
+            self._paths[name] = (path, digest)
+            self._insert(digest, mechanism)
+        return mechanism
+
+    def load_many (self, paths, n_workers=None):
+        """Registers the mechanisms of paths, a dictionary mapping names to
+        XML files, compiling the distinct file contents not yet compiled in
+        a process pool of n_workers processes (default: number of CPUs;
+        n_workers=1 compiles in this process).
+
+        Returns:
+            loaded (list of str): Names registered, in the order of paths.
+            errors (dict): Message of every name whose file could not be
+                read or compiled; these names are not registered.
+        """
+        errors = {}
+        digests = {}
+        for name, path in paths.items():
+            path = resolve_xml_path(path)
+            try:
+                digests[name] = (path, _content_hash(path))
+            except OSError as err:
+                errors[name] = str(err)
+        with self._lock:
+            to_compile = {}
+            for path, digest in digests.values():
+                if digest not in self._cache:
+                    to_compile.setdefault(digest, path)
+
+        compiled = {}
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if n_workers == 1 or len(to_compile) <= 1:
+            for digest, path in to_compile.items():
+                try:
+                    compiled[digest] = _compile(path, self.db_name)
+                except Exception as err:
+                    compiled[digest] = err
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(n_workers, len(to_compile))) as executor:
+                futures = {digest: executor.submit(_compile, path, self.db_name)
+                           for digest, path in to_compile.items()}
+                for digest, future in futures.items():
+                    try:
+                        compiled[digest] = future.result()
+                    except Exception as err:
+                        compiled[digest] = err
+
+        loaded = []
+        with self._lock:
+            self.n_compiled += sum(not isinstance(mechanism, Exception) for mechanism in compiled.values())
+            for name, (path, digest) in digests.items():
+                mechanism = compiled.get(digest)
+                if isinstance(mechanism, Exception):
+                    errors[name] = str(mechanism)
+                    continue
+                self._paths[name] = (path, digest)
+                if mechanism is not None:
+                    self._insert(digest, mechanism)
+                loaded.append(name)
+        return loaded, errors
+
+    def load_directory (self, directory, pattern='*.xml', n_workers=None):
+        """Registers every XML file of directory matching pattern under its
+        file name without extension, see load_many().
+        """
+        paths = {os.path.splitext(os.path.basename(path))[0]: path
+                 for path in sorted(glob.glob(os.path.join(directory, pattern)))}
+        return self.load_many(paths, n_workers)
+
+    def get (self, name):
+        """Returns the compiled mechanism registered as name, compiling it
+        again if it was evicted.
+        """
+        with self._lock:
+            try:
+                path, digest = self._paths[name]
+            except KeyError:
+                raise ChemKinError('MechanismRegistry.get()', 'Unknown mechanism {}.'.format(name))
+            mechanism = self._cache.get(digest)
+            if mechanism is not None:
+                self._cache.move_to_end(digest)
+                return mechanism
+        return self.load(name, path)
+
+    def remove (self, name):
+        with self._lock:
+            if name not in self._paths:
+                raise ChemKinError('MechanismRegistry.remove()', 'Unknown mechanism {}.'.format(name))
+            _, digest = self._paths.pop(name)
+            if all(other != digest for _, other in self._paths.values()):
+                self._cache.pop(digest, None)
+
+    def describe (self):
+        """Returns a dictionary describing every registered mechanism; the
+        species and equations of evicted mechanisms are not listed.
+        """
+        with self._lock:
+            items = [(name, path, digest, self._cache.get(digest))
+                     for name, (path, digest) in self._paths.items()]
+        description = {}
+        for name, path, digest, mechanism in items:
+            description[name] = {'path': path, 'hash': digest, 'cached': mechanism is not None}
+            if mechanism is not None:
+                description[name].update(species=mechanism.species, equations=mechanism.equations)
+        return description
+
+    def _insert (self, digest, mechanism):
+        self._cache[digest] = mechanism
+        self._cache.move_to_end(digest)
+        while self.max_size is not None and len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,326 @@
+"""
+Contains the local rate-evaluation service: a long-running process keeping
+compiled mechanisms resident (see the registry module) and answering JSON
+requests over HTTP or a Unix socket.
+
+    python -m chemkin.service --port 8207 --mechanism h2=rxns_reversible
+
+    GET  /health                                  {"status": "ok"}
+    GET  /mechanisms                              registered mechanisms
+    POST /mechanisms  {"name": ..., "path": ...}  compiles and registers a mechanism
+    POST /mechanisms  {"directory": ...}          registers every XML file of a directory
+    DELETE /mechanisms/<name>                     unregisters a mechanism
+    POST /rates       {"mechanism": ..., "T": ..., "xi": ...}
+    GET  /metrics                                 latency of every endpoint
+
+T is a temperature or a list of temperatures, xi a set of concentrations or
+a list of sets (one per temperature); /rates answers the reaction rates of
+every species in the order of the mechanism's species, null where the
+backward coefficients are not defined.
+
+Rate requests are not evaluated by the threads serving the connections but
+queued to a single batching thread, which takes every request waiting in the
+queue and evaluates the requests of each mechanism together in one
+vectorized call. Under load, concurrent requests thus share one evaluation;
+a lone request is evaluated as soon as it arrives.
+
+The Unix-socket protocol exchanges one JSON object per line: requests
+{"method": "POST", "path": "/rates", "body": {...}} and responses
+{"status": 200, "body": {...}}, over a connection kept open for any number
+of requests.
+"""
+import collections
+import http.server
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.service.registry import MechanismRegistry
+
+
+class LatencyMetrics():
+    """Per-endpoint request count, error count and latency percentiles over
+    the last window requests of each endpoint. Thread-safe.
+    """
+
+    def __init__ (self, window=1024):
+        self.window = window
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._counts = collections.Counter()
+        self._errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record (self, endpoint, seconds, error=False):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            self._counts[endpoint] += 1
+            if error:
+                self._errors[endpoint] += 1
+
+    def snapshot (self):
+        """Returns a dictionary of the metrics of every endpoint, latencies
+        in milliseconds.
+        """
+        with self._lock:
+            latencies = {endpoint: np.array(values) * 1e3 for endpoint, values in self._latencies.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        metrics = {}
+        for endpoint, ms in latencies.items():
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            metrics[endpoint] = {'count': counts[endpoint], 'errors': errors.get(endpoint, 0),
+                                 'mean_ms': float(np.mean(ms)), 'p50_ms': float(p50),
+                                 'p90_ms': float(p90), 'p99_ms': float(p99), 'max_ms': float(np.max(ms))}
+        return metrics
+
+
+class _RateRequest():
+    def __init__ (self, mechanism, T, xi):
+        self.mechanism = mechanism
+        self.T = T
+        self.xi = xi
+        self.rates = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class RateService():
+    """Evaluates the reaction rates of the registered mechanisms, batching
+    concurrent requests, and dispatches the requests of the HTTP and
+    Unix-socket servers.
+
+    Attributes:
+        registry (MechanismRegistry): Registered mechanisms.
+        metrics (LatencyMetrics): Latency of every endpoint.
+        max_batch (int): Largest number of requests evaluated together.
+        batches (int): Number of vectorized evaluations so far.
+    """
+
+    def __init__ (self, registry=None, max_batch=256):
+        self.registry = MechanismRegistry() if registry is None else registry
+        self.metrics = LatencyMetrics()
+        self.max_batch = max_batch
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._batch_loop, name='chemkin-rate-batcher', daemon=True)
+        self._thread.start()
+
+    def close (self):
+        """Stops the batching thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def rates (self, mechanism, T, xi):
+        """Returns the reaction rates (numpy array of shape (n, n_species),
+        NaN where undefined) of mechanism at temperatures T and
+        concentrations xi, see CompiledMechanism.reaction_rates().
+        Called concurrently, the requests are evaluated in batches.
+        """
+        mech = self.registry.get(mechanism)
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        xi = np.atleast_2d(np.asarray(xi, dtype=float))
+        if T.ndim != 1 or xi.ndim != 2 or xi.shape[1] != len(mech.species):
+            raise ChemKinError('RateService.rates()', 'Expected T of shape (n,) and xi of shape '
+                               '(n, {}) for mechanism {}.'.format(len(mech.species), mechanism))
+        if len(T) != len(xi) and len(T) != 1 and len(xi) != 1:
+            raise ChemKinError('RateService.rates()', 'T and xi have different lengths.')
+        if np.any(xi < 0):
+            raise ValueError('concentrations xi cannot be negative.')
+        n = max(len(T), len(xi))
+        request = _RateRequest(mechanism, np.broadcast_to(T, (n,)), np.broadcast_to(xi, (n, xi.shape[1])))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.rates
+
+    def _batch_loop (self):
+        while True:
+            requests = [self._queue.get()]
+            while len(requests) < self.max_batch:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = requests[-1] is None
+            self._evaluate([request for request in requests if request is not None])
+            if stop:
+                return
+
+    def _evaluate (self, requests):
+        by_mechanism = collections.defaultdict(list)
+        for request in requests:
+            by_mechanism[request.mechanism].append(request)
+        for mechanism, group in by_mechanism.items():
+            try:
+                mech = self.registry.get(mechanism)
+                rates = mech.reaction_rates(np.concatenate([request.T for request in group]),
+                                            np.concatenate([request.xi for request in group]))
+                self.batches += 1
+                start = 0
+                for request in group:
+                    request.rates = rates[start:start + len(request.T)]
+                    start += len(request.T)
+            except Exception as err:
+                for request in group:
+                    request.error = err
+            for request in group:
+                request.done.set()
+
+    def handle (self, method, path, body=None):
+        """Dispatches a request and records its latency. Returns the status
+        code and the JSON-serializable body of the response.
+        """
+        start = time.perf_counter()
+        endpoint = '{} {}'.format(method, path.split('?')[0].rstrip('/') or '/')
+        if method == 'DELETE' and path.startswith('/mechanisms/'):
+            endpoint = 'DELETE /mechanisms/<name>'
+        try:
+            status, payload = self._dispatch(method, path, body)
+        except (ChemKinError, ValueError, KeyError, TypeError) as err:
+            status, payload = 400, {'error': str(err)}
+        except Exception as err:
+            status, payload = 500, {'error': str(err)}
+        if status != 404:
+            self.metrics.record(endpoint, time.perf_counter() - start, error=status >= 400)
+        return status, payload
+
+    def _dispatch (self, method, path, body):
+        path = path.split('?')[0].rstrip('/') or '/'
+        if method == 'POST' and path == '/rates':
+            scalar = np.ndim(body['T']) == 0 and np.ndim(body['xi']) == 1
+            rates = self.rates(body['mechanism'], body['T'], body['xi'])
+            rows = [None if np.isnan(row).any() else row.tolist() for row in rates]
+            return 200, {'rates': rows[0] if scalar else rows}
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'mechanisms': len(self.registry)}
+        if method == 'GET' and path == '/metrics':
+            return 200, {'endpoints': self.metrics.snapshot(), 'batches': self.batches}
+        if method == 'GET' and path == '/mechanisms':
+            return 200, self.registry.describe()
+        if method == 'POST' and path == '/mechanisms' and 'directory' in body:
+            loaded, errors = self.registry.load_directory(body['directory'], n_workers=body.get('n_workers'))
+            return 200, {'loaded': loaded, 'errors': errors}
+        if method == 'POST' and path == '/mechanisms':
+            mechanism = self.registry.load(body['name'], body['path'])
+            return 200, {'name': body['name'], 'species': mechanism.species}
+        if method == 'DELETE' and path.startswith('/mechanisms/'):
+            self.registry.remove(path[len('/mechanisms/'):])
+            return 200, {}
+        return 404, {'error': 'No endpoint {} {}.'.format(method, path)}
+
+
+def _encode (payload):
+    return json.dumps(payload).encode()
+
+
+class _HTTPHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections alive between requests
+
+    def do_GET (self):
+        self._respond('GET')
+
+    def do_POST (self):
+        self._respond('POST')
+
+    def do_DELETE (self):
+        self._respond('DELETE')
+
+    def _respond (self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else None
+        except ValueError as err:
+            status, payload = 400, {'error': 'Invalid JSON: {}'.format(err)}
+        else:
+            status, payload = self.server.service.handle(method, self.path, body)
+        data = _encode(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message (self, format, *args):
+        pass
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    def handle (self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                status, payload = self.server.service.handle(request['method'], request['path'],
+                                                             request.get('body'))
+            except (ValueError, KeyError, TypeError) as err:
+                status, payload = 400, {'error': 'Invalid request: {}'.format(err)}
+            self.wfile.write(_encode({'status': status, 'body': payload}) + b'\n')
+            self.wfile.flush()
+
+
+class HTTPRateServer(http.server.ThreadingHTTPServer):
+    """HTTP server of service, on host:port (port 0 picks a free port)."""
+    daemon_threads = True
+
+    def __init__ (self, service, host='127.0.0.1', port=8207):
+        self.service = service
+        super().__init__((host, port), _HTTPHandler)
+
+    def get_request (self):
+        conn, addr = super().get_request()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, addr
+
+
+class UnixRateServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server of service, listening on path."""
+    daemon_threads = True
+
+    def __init__ (self, service, path):
+        self.service = service
+        super().__init__(path, _UnixHandler)
+
+
+class UnixRateClient():
+    """Client of a UnixRateServer, over one connection kept open.
+
+    Attributes:
+        path (str): Path of the socket of the server.
+    """
+
+    def __init__ (self, path):
+        self.path = path
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._file = self._socket.makefile('rwb')
+
+    def request (self, method, path, body=None):
+        """Sends a request; returns the status code and body of the response."""
+        self._file.write(_encode({'method': method, 'path': path, 'body': body}) + b'\n')
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        return response['status'], response['body']
+
+    def rates (self, mechanism, T, xi):
+        status, body = self.request('POST', '/rates', {'mechanism': mechanism, 'T': T, 'xi': xi})
+        if status != 200:
+            raise ChemKinError('UnixRateClient.rates()', body['error'])
+        return body['rates']
+
+    def close (self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
+        return False
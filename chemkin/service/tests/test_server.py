@@ -0,0 +1,140 @@
+"""
+Tests for the rate service server.py and registry.py modules
+"""
+
+import concurrent.futures
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.service.registry import MechanismRegistry
+from chemkin.service.server import HTTPRateServer, RateService, UnixRateClient, UnixRateServer
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.]
+
+
+@pytest.fixture
+def service():
+    service = RateService()
+    service.registry.load('h2', 'rxns_reversible')
+    yield service
+    service.close()
+
+
+def expected_rates(T, xi=XI):
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+    return mech.reaction_rates(T, xi)
+
+
+def test_registry_load_get_remove():
+    registry = MechanismRegistry()
+    registry.load('h2', 'rxns_reversible')
+    assert 'h2' in registry and len(registry) == 1
+    assert registry.describe()['h2']['species'] == ['H', 'O', 'OH', 'H2', 'H2O', 'O2', 'HO2', 'H2O2']
+    registry.remove('h2')
+    with pytest.raises(ChemKinError):
+        registry.get('h2')
+
+
+def test_rates_endpoint(service):
+    status, body = service.handle('POST', '/rates', {'mechanism': 'h2', 'T': 1500, 'xi': XI})
+    assert status == 200
+    assert np.allclose(body['rates'], expected_rates(1500.0)[0])
+
+    status, body = service.handle('POST', '/rates', {'mechanism': 'h2', 'T': [10, 1500], 'xi': XI})
+    assert status == 200
+    assert body['rates'][0] is None
+    assert np.allclose(body['rates'][1], expected_rates(1500.0)[0])
+
+
+def test_errors_and_metrics(service):
+    assert service.handle('POST', '/rates', {'mechanism': 'none', 'T': 1500, 'xi': XI})[0] == 400
+    assert service.handle('POST', '/rates', {'mechanism': 'h2', 'T': 1500, 'xi': [1.0]})[0] == 400
+    assert service.handle('GET', '/nowhere')[0] == 404
+    assert service.handle('GET', '/health') == (200, {'status': 'ok', 'mechanisms': 1})
+    metrics = service.handle('GET', '/metrics')[1]['endpoints']
+    assert metrics['POST /rates']['count'] == 2
+    assert metrics['POST /rates']['errors'] == 2
+    assert set(metrics['GET /health']) >= {'p50_ms', 'p99_ms', 'max_ms'}
+
+
+def test_concurrent_requests_are_batched(service):
+    temperatures = np.linspace(500, 2500, 400)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        rates = list(executor.map(lambda T: service.rates('h2', T, XI)[0], temperatures))
+    assert np.allclose(rates, expected_rates(temperatures))
+    assert service.batches < len(temperatures)
+
+
+def test_http_server(service):
+    server = HTTPRateServer(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.request('POST', '/mechanisms', json.dumps({'name': 'mixed', 'path': 'rxns_mixed'}))
+        response = connection.getresponse()
+        assert response.status == 200 and json.loads(response.read())['name'] == 'mixed'
+        for _ in range(2):  # over the same kept-alive connection
+            connection.request('POST', '/rates', json.dumps({'mechanism': 'h2', 'T': 1500, 'xi': XI}))
+            response = connection.getresponse()
+            assert response.status == 200
+            assert np.allclose(json.loads(response.read())['rates'], expected_rates(1500.0)[0])
+        connection.request('DELETE', '/mechanisms/mixed')
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 200 and 'mixed' not in service.registry
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unix_server(service):
+    path = os.path.join(tempfile.mkdtemp(), 'chemkin.sock')
+    server = UnixRateServer(service, path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with UnixRateClient(path) as client:
+            assert np.allclose(client.rates('h2', 1500, XI), expected_rates(1500.0)[0])
+            assert client.request('GET', '/mechanisms')[1]['h2']['path'] == pckg_xml_path('rxns_reversible')
+            with pytest.raises(ChemKinError):
+                client.rates('h2', 1500, [-1.0] * 8)
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.remove(path)
+
+
+def test_registry_load_directory_dedups_and_evicts(tmpdir):
+    for name in ('rxns_reversible', 'rxns_mixed', 'rxns_irreversible', 'rxns_non_elementary'):
+        shutil.copy(pckg_xml_path(name), str(tmpdir))
+    shutil.copy(pckg_xml_path('rxns_reversible'), str(tmpdir.join('h2_copy.xml')))
+
+    registry = MechanismRegistry(max_size=2)
+    loaded, errors = registry.load_directory(str(tmpdir), n_workers=2)
+    assert loaded == ['h2_copy', 'rxns_irreversible', 'rxns_mixed', 'rxns_reversible']
+    assert list(errors) == ['rxns_non_elementary']
+    # identical files are compiled once and share their mechanism
+    assert registry.n_compiled == 3
+    assert registry.get('h2_copy') is registry.get('rxns_reversible')
+    assert registry.n_cached == 2
+    assert np.allclose(registry.get('rxns_reversible').reaction_rates(1500.0, XI), expected_rates(1500.0))
+
+    # rxns_irreversible was evicted: it is compiled again on lookup
+    assert not registry.describe()['rxns_irreversible']['cached']
+    assert len(registry.get('rxns_irreversible').species) == 8
+    assert registry.n_compiled == 4 and registry.n_cached == 2
+    assert len(registry) == 4
+
+    # reloading compiles nothing new when the contents are cached
+    assert registry.load_directory(str(tmpdir), pattern='rxns_irr*.xml', n_workers=1) == (['rxns_irreversible'], {})
+    assert registry.n_compiled == 4
@@ -2,14 +2,83 @@
 Contains class ODE_int_solver to compute the evolution of reaction species'
 concentrations over specified time range.
 """
+import hashlib
+import time
 import numpy as np
-from scipy.integrate import odeint
+from scipy.integrate import LSODA, odeint
+from chemkin import profiling
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.solver.checkpoint import checkpoint_rows, load_checkpoint, mechanism_hash, save_checkpoint
+from chemkin.solver.solver_stats import SolverStats
+from chemkin.solver.time_grid import OutputSelector
+from chemkin.solver.trajectory import Trajectory, TrajectoryWriter
+
+
+POSITIVITY_STRATEGIES = ('zero', 'clip', 'log', 'project')
+
+# Default tolerances of odeint, also used when stepping LSODA directly.
+_ODEINT_TOL = 1.49012e-8
+
+
+class _Run():
+    """State of one run of a solve method, kept apart from the solver and the
+    reaction object so that concurrent runs do not interfere.
+
+    Attributes:
+        critical_t (numpy array of floats): Equilibrium time of each reaction.
+        overall_critical_t (float): Equilibrium time of the overall system.
+        t_span (tuple of floats): First and last time steps of the run.
+        h0 (float): First step size tried by odeint in the next segment.
+        positivity (str): Non-negativity strategy of the run.
+        stats (SolverStats): Performance statistics of the run.
+        output (OutputSelector or None): Selects the output times among the
+            accepted steps, instead of reporting at fixed time steps.
+        output_t (numpy array of floats): Output times selected by output.
+        report (function or None): Reports the progress of the run, see
+            ODE_int_solver.progress.
+        last_wi (tuple of numpy arrays or None): Backward and forward progress
+            rates of the previous RHS evaluation, None before the first one.
+    """
+
+    def __init__ (self, n_rxns, time_int, h0, positivity):
+        self.critical_t = -100*np.ones((n_rxns,))
+        self.overall_critical_t = -100
+        self.t_span = (time_int[0], time_int[-1])
+        self.h0 = h0
+        self.positivity = positivity
+        self.stats = None
+        self.output = None
+        self.output_t = None
+        self.report = None
+        self.last_wi = None
 
 
 class ODE_int_solver():
     """Integrates the time evolution of a concentration of a specie i over
     specified time range.
 
+    Concentrations are kept non-negative by one of the strategies of
+    POSITIVITY_STRATEGIES, chosen by positivity (or per solve):
+
+        'zero': the reaction rates are set to zero as soon as a
+            concentration is <= 0. This makes the right-hand side
+            discontinuous, and LSODA may need many tiny steps to cross it.
+        'clip': the reaction rates are evaluated at max(x, 0), with the
+            matching Jacobian (zero columns for negative concentrations).
+            The right-hand side is continuous; concentrations may dip below
+            zero by up to the integration tolerance.
+        'log': log(x) is integrated instead of x, so concentrations stay
+            positive by construction. Zero initial concentrations start at
+            1e-30 times the largest one.
+        'project': as 'clip', and the state at every output time with a
+            negative concentration is projected onto x >= 0, and the
+            integration restarted from it. odeint does not expose its
+            accepted steps, so output times are the finest projection points.
+
+    Solving has no side effects on rxn, which is only read, and every run
+    keeps its own state, so a solver and a reaction object can be shared by
+    concurrent solves (e.g. in a concurrent.futures.ThreadPoolExecutor).
+
     Attributes:
         temp (float): Temperature for reaction (assumed to be held constant).
         rxn (object): an instance of the ElementaryRxn() object
@@ -22,15 +91,27 @@ class ODE_int_solver():
             overall_equil_thresh, where prograte_diff is the difference in
             the backward and forward progress rate vectors of the reaction.
         critical_t (list of floats of len(ki)): Stores time(s) at which
-            reaction's component species' concentrations reach equilibrium.
+            reaction's component species' concentrations reach equilibrium,
+            in the last run to finish.
         overall_critical_t (float): Stores time at which overall reaction
-            reaches equilibrium
+            reaches equilibrium, in the last run to finish.
         max_t (float): maximum time allowed for the solver
-        
+        stats (SolverStats): Performance statistics of the last run to
+            finish.
+        h0 (float, default 0.0): First step size tried by odeint; 0.0 lets
+            odeint choose.
+        positivity (str, default 'zero'): Default non-negativity strategy of
+            the solves, one of POSITIVITY_STRATEGIES.
+        progress (function, default None): Called as progress(t, n_rhs)
+            during the integration, at most every progress_every seconds,
+            with the time t and the number of RHS evaluations of the run so
+            far; an exception raised by it aborts the solve.
+        progress_every (float, default 0.1): Seconds between progress calls.
+
     """
 
     def __init__ (self, temp, rxn, equil_thresh=1e-5,
-                  overall_equil_thresh=1e-2, max_t=100):
+                  overall_equil_thresh=1e-2, max_t=100, positivity='zero'):
         self.temp = temp
         self.rxn = rxn
         self.species_equil_thresh = equil_thresh
@@ -39,49 +120,457 @@ class ODE_int_solver():
         self.critical_t = -100*np.ones((len(self.rxn.ki),))
         self.overall_critical_t = -100
         self.max_t = max_t
+        self.stats = None
+        self.h0 = 0.0
+        self.positivity = positivity
+        self.progress = None
+        self.progress_every = 0.1
 
-    def solve (self, time_int):
+    def solve (self, time_int, full_output=False, xi=None, positivity=None):
         """Solves evolution of specie concentration over specified time range.
 
         Args:
             time_int (list of floats): Time steps over which to solve evolution
                 of species concentrations.
+            full_output (bool, default False): Also return the SolverStats of
+                the run.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+            positivity (str, optional): Non-negativity strategy; defaults to
+                self.positivity.
 
         Returns:
             sol (numpy array, shape (len(time_int), len(self.xi)): Results of
                 calling scipy.integrate.odeint().
-            self.critical_t
-            self.overall_critical_t
+            critical_t
+            overall_critical_t
+            stats, only if full_output is True
+        """
+        run = self._new_run(time_int, positivity)
+        sol = self._integrate(time_int, self._initial_xi(xi), run)
+        self._publish(run)
+        if full_output:
+            return sol, run.critical_t, run.overall_critical_t, run.stats
+        return sol, run.critical_t, run.overall_critical_t
+
+    def solve_adaptive (self, end_t, grid='adaptive', max_points=1000, rtol=1e-3,
+                        full_output=False, xi=None, positivity=None):
+        """Solves evolution of specie concentration from 0 to end_t, reporting
+        it at output times selected among the accepted steps of LSODA (see
+        OutputSelector), so that output never forces extra steps.
+
+        Where a fixed grid spends its points evenly, grid='adaptive' puts them
+        where the solution curves: chemistry spanning 1e-12 to 1e2 seconds is
+        captured in about a thousand points, where an even grid needs about a
+        million to resolve its fastest transients.
+
+        Args:
+            end_t (float): End time.
+            grid (str, default 'adaptive'): 'adaptive' or 'steps' (every
+                accepted step).
+            max_points (int, default 1000): Largest number of output times.
+            rtol (float, default 1e-3): Tolerance of the adaptive selection,
+                relative to the largest concentration.
+            full_output (bool, default False): Also return the SolverStats of
+                the run.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+            positivity (str, optional): Non-negativity strategy; defaults to
+                self.positivity. 'project' restarts at output times, so it is
+                not supported.
+
+        Returns:
+            time_int (numpy array of floats): Output times, from 0 to end_t.
+            sol (numpy array, shape (len(time_int), len(self.xi)).
+            critical_t
+            overall_critical_t
+            stats, only if full_output is True
+        """
+        time_int = np.array([0.0, end_t])
+        run = self._new_run(time_int, positivity)
+        if run.positivity == 'project':
+            raise ChemKinError('ODE_int_solver.solve_adaptive()',
+                               'The project strategy cannot be used with output times selected among steps.')
+        run.output = OutputSelector(grid, max_points, rtol)
+        sol = self._integrate(time_int, self._initial_xi(xi), run)
+        self._publish(run)
+        if full_output:
+            return run.output_t, sol, run.critical_t, run.overall_critical_t, run.stats
+        return run.output_t, sol, run.critical_t, run.overall_critical_t
+
+    def solve_streaming (self, time_int, path, chunk_size=10000, xi=None,
+                         positivity=None):
+        """Solves evolution of specie concentration over specified time range,
+        writing it to disk chunk by chunk instead of holding it in memory.
+
+        The integration is split into segments of chunk_size time steps, each
+        started from the last state of the previous one, so memory stays
+        bounded however long time_int is. The stats aggregate the segments.
+
+        Args:
+            time_int (list of floats): Time steps over which to solve evolution
+                of species concentrations.
+            path (str): Directory to store the trajectory in (see
+                TrajectoryWriter); existing files in it are overwritten.
+            chunk_size (int, default 10000): Number of time steps per segment.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+            positivity (str, optional): Non-negativity strategy; defaults to
+                self.positivity.
+
+        Returns:
+            traj (Trajectory): Lazy handle to the concentrations on disk, with
+                the same rows as the sol array returned by solve().
+            critical_t
+            overall_critical_t
+        """
+        time_int = np.asarray(time_int, dtype=float)
+        run = self._new_run(time_int, positivity)
+        x = self._initial_xi(xi)
+        writer = TrajectoryWriter(path, time_int, len(x))
+        stats_list = []
+        for start in range(0, max(len(time_int) - 1, 1), chunk_size):
+            end = min(start + chunk_size, len(time_int) - 1)
+            sol = self._integrate(time_int[start:end + 1], x, run)
+            writer.append(sol if start == 0 else sol[1:])
+            x = sol[-1]
+            stats_list.append(run.stats)
+        writer.close()
+        run.stats = SolverStats.aggregate(stats_list)
+        self._publish(run)
+        return Trajectory(path), run.critical_t, run.overall_critical_t
+
+    def solve_checkpointed (self, time_int, path, checkpoint_every=10, xi=None,
+                            positivity=None):
+        """Solves evolution of specie concentration over specified time range,
+        writing a checkpoint to the .npz file at path every checkpoint_every
+        time steps, and resuming from the checkpoint if path already holds one.
+
+        The integration is split into segments of checkpoint_every time steps,
+        each started from the last state and step size of the previous one.
+        A checkpoint holds the time, state, step size and number of time
+        steps done at the end of the last segment, the equilibrium
+        bookkeeping, and hashes of the mechanism and of the run (time steps,
+        temperature, initial concentrations, thresholds, checkpoint_every and
+        non-negativity strategy), so its size does not grow with the run. The
+        concentrations go to the memory-mapped file path + '.rows.npy' (see
+        checkpoint_rows()), each segment writing only its own rows before the
+        checkpoint is saved. Since a
+        resumed run goes through the same segments as an uninterrupted one,
+        it returns the same results bit for bit. A finished run keeps its
+        checkpoint, so calling again returns the results without integrating.
+
+        Args:
+            time_int (list of floats): Time steps over which to solve evolution
+                of species concentrations.
+            path (str): Checkpoint file.
+            checkpoint_every (int, default 10): Number of time steps between
+                checkpoints.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+            positivity (str, optional): Non-negativity strategy; defaults to
+                self.positivity.
+
+        Returns:
+            sol (numpy array, shape (len(time_int), len(self.xi)), as solve().
+            critical_t
+            overall_critical_t
+
+        Raises:
+            ChemKinError if the checkpoint at path belongs to another mechanism
+            or run, or its concentrations file is missing.
         """
-        i = 0  # iteration count
+        time_int = np.asarray(time_int, dtype=float)
+        x = self._initial_xi(xi)
+        mech_hash = mechanism_hash(self.rxn)
+        run = self._new_run(time_int, positivity)
+        run_hash = self._run_hash(time_int, x, mech_hash, checkpoint_every, run.positivity)
+
+        checkpoint = load_checkpoint(path)
+        if checkpoint is None:
+            rows = checkpoint_rows(path, (len(time_int), len(x)))
+            rows[0] = x
+            step = 1
+        else:
+            if str(checkpoint['mechanism_hash']) != mech_hash:
+                raise ChemKinError('ODE_int_solver.solve_checkpointed()',
+                                   'Checkpoint {} belongs to another mechanism.'.format(path))
+            if str(checkpoint['run_hash']) != run_hash:
+                raise ChemKinError('ODE_int_solver.solve_checkpointed()',
+                                   'Checkpoint {} belongs to another run.'.format(path))
+            rows = checkpoint_rows(path)
+            if rows is None or rows.shape != (len(time_int), len(x)):
+                raise ChemKinError('ODE_int_solver.solve_checkpointed()',
+                                   'Concentrations of checkpoint {} are missing.'.format(path))
+            step = int(checkpoint['step'])
+            x = checkpoint['x'].copy()
+            run.critical_t = checkpoint['critical_t'].copy()
+            run.overall_critical_t = float(checkpoint['overall_critical_t'])
+            run.h0 = float(checkpoint['h'])
+            if 'last_b_wi' in checkpoint:
+                run.last_wi = (checkpoint['last_b_wi'], checkpoint['last_f_wi'])
+
+        stats_list = []
+        for start in range(step - 1, len(time_int) - 1, checkpoint_every):
+            end = min(start + checkpoint_every, len(time_int) - 1)
+            sol = self._integrate(time_int[start:end + 1], x, run)
+            if np.isfinite(run.stats.last_step):
+                run.h0 = run.stats.last_step
+            rows[start + 1:end + 1] = sol[1:]
+            rows.flush()
+            x = sol[-1]
+            stats_list.append(run.stats)
+            last_wi = {}
+            if run.last_wi is not None:
+                last_wi = {'last_b_wi': run.last_wi[0], 'last_f_wi': run.last_wi[1]}
+            save_checkpoint(path, t=time_int[end], x=x, h=run.h0, step=end + 1,
+                            critical_t=run.critical_t,
+                            overall_critical_t=run.overall_critical_t,
+                            mechanism_hash=mech_hash, run_hash=run_hash, **last_wi)
+        run.stats = SolverStats.aggregate(stats_list)
+        self._publish(run)
+        sol = np.array(rows)
+        del rows
+        return sol, run.critical_t, run.overall_critical_t
+
+    def _new_run (self, time_int, positivity=None):
+        if positivity is None:
+            positivity = self.positivity
+        if positivity not in POSITIVITY_STRATEGIES:
+            raise ChemKinError('ODE_int_solver.solve()',
+                               'Unknown positivity strategy {}; expected one of {}.'.format(
+                                   positivity, POSITIVITY_STRATEGIES))
+        run = _Run(len(self.rxn.ki), time_int, self.h0, positivity)
+        run.report = self._progress_reporter()
+        return run
+
+    def _initial_xi (self, xi):
+        return np.array(self.rxn.xi if xi is None else xi, dtype=float)
 
+    def _publish (self, run):
+        """Exposes the results of a finished run as attributes of the solver."""
+        self.critical_t = run.critical_t
+        self.overall_critical_t = run.overall_critical_t
+        self.stats = run.stats
+
+    def _integrate (self, time_int, y0, run):
+        """Integrates from the concentrations y0 at time_int[0] and returns the
+        concentrations at time_int, recording equilibrium times in run.
+        """
         def rxn_rate (x, t):
-            nonlocal  i
-            self.rxn.xi = x
-
-            # reaction rate = 0 when some specie's concentration gets to zero
-            n_species = len(x)
-            for value in x:
-                if value <= 0:
-                    return np.zeros((n_species,))
-
-            if i != 0:
-                # If any of the reactions had the delta of backwards progress rates
-                # and forward progress rates fall below a certain threshold, record the equilibrium time
-                for j, (bw, fw) in enumerate(zip(self.rxn.b_wi, self.rxn.f_wi)):
-                    if np.abs(bw - fw) < self.species_equil_thresh:
-                        if self.critical_t[j] == -100:
-                            self.critical_t[j] = t
-                
-                # If the norm of all of the deltas of all backwards progress rates
-                # and forward progress rates falls below a threshold, record systems equilibrium time
-                if np.linalg.norm(self.rxn.b_wi - self.rxn.f_wi) < self.overall_equil_thresh:
-                    if self.overall_critical_t == -100:
-                        self.overall_critical_t = t
-            i += 1
-            
-            #update reaction rate and return it
-            return self.rxn.reaction_rate()
-
-        sol = odeint(func=rxn_rate, y0=self.rxn.xi, t=time_int, mxstep=5000000)
-        return sol, self.critical_t, self.overall_critical_t
\ No newline at end of file
+            rates, f_wi, b_wi = self.rxn.evaluate(x)
+            self._record_equilibrium_t(run, b_wi, f_wi, t)
+            return rates
+
+        def rxn_jacobian (x):
+            return self.rxn.evaluate(x)[0], self.rxn.jacobian(x)
+
+        return self._integrate_positive(rxn_rate, rxn_jacobian, y0, time_int, run)
+
+    def _integrate_positive (self, rxn_rate, rxn_jacobian, y0, time_int, run):
+        """Integrates dx/dt = rxn_rate(x, t) from y0 at time_int[0], keeping x
+        non-negative with the strategy run.positivity, and returns x at
+        time_int.
+
+        Args:
+            rxn_rate (function): Reaction rates at concentrations x >= 0 and
+                time t.
+            rxn_jacobian (function or None): Returns the reaction rates and
+                their Jacobian at concentrations x >= 0, without side
+                effects. If None, odeint approximates the Jacobian by finite
+                differences.
+        """
+        y0 = np.asarray(y0, dtype=float)
+        jac = None
+
+        if run.positivity == 'zero':
+            def func (x, t):
+                # reaction rate = 0 when some specie's concentration gets to zero
+                if np.any(x <= 0):
+                    return np.zeros((len(x),))
+                return rxn_rate(x, t)
+
+            return self._odeint(func, y0, time_int, run)
+
+        if run.positivity == 'log':
+            def func (z, t):
+                # exp(z) underflows to 0 for species driven toward 0
+                x = np.maximum(np.exp(z), np.finfo(float).tiny)
+                return rxn_rate(x, t) / x
+
+            if rxn_jacobian is not None:
+                def jac (z, t):
+                    # d(f_i/x_i)/d(log x_k) = J_ik x_k / x_i - delta_ik f_i / x_i
+                    x = np.maximum(np.exp(z), np.finfo(float).tiny)
+                    rates, rates_jac = rxn_jacobian(x)
+                    return rates_jac * x / x[:, None] - np.diag(rates / x)
+
+            if run.output is not None:
+                run.output.transform = np.exp
+            floor = max(np.max(np.abs(y0)), 1.0) * 1e-30
+            sol = np.exp(self._odeint(func, np.log(np.maximum(y0, floor)), time_int, run, jac))
+            sol[0] = y0
+            return sol
+
+        def func (x, t):
+            return rxn_rate(np.maximum(x, 0), t)
+
+        if rxn_jacobian is not None:
+            def jac (x, t):
+                # d(max(x_k, 0))/dx_k is 0 for negative x_k (1 from the right at 0)
+                return rxn_jacobian(np.maximum(x, 0))[1] * (x >= 0)
+
+        if run.positivity == 'clip':
+            return self._odeint(func, y0, time_int, run, jac)
+
+        # 'project': restart from the projection of the first output state
+        # with a negative concentration, until none is left.
+        rows = [y0]
+        stats_list = []
+        start = 0
+        while start < len(time_int) - 1:
+            sol = self._odeint(func, rows[-1], time_int[start:], run, jac)
+            stats_list.append(run.stats)
+            negative = np.nonzero(np.any(sol[1:] < 0, axis=1))[0]
+            if not len(negative):
+                rows.extend(sol[1:])
+                break
+            end = negative[0] + 1
+            rows.extend(sol[1:end])
+            rows.append(np.maximum(sol[end], 0))
+            start += end
+        if stats_list:
+            run.stats = SolverStats.aggregate(stats_list)
+            run.stats.n_solves = 1
+        else:
+            run.stats = SolverStats()
+        return np.array(rows)
+
+    def _run_hash (self, time_int, xi, mech_hash, checkpoint_every, positivity):
+        digest = hashlib.sha256(mech_hash.encode())
+        for values in (time_int, xi, [self.temp, self.species_equil_thresh,
+                                      self.overall_equil_thresh, checkpoint_every]):
+            digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+        digest.update(type(self).__name__.encode())
+        digest.update(positivity.encode())
+        return digest.hexdigest()
+
+    def _odeint (self, func, y0, time_int, run, jac=None):
+        """Returns the result of scipy.integrate.odeint(func, y0, time_int,
+        Dfun=jac), and records its performance statistics in run.stats.
+        If run.output is set, steps LSODA instead (see _lsoda_steps()).
+        """
+        if run.output is not None:
+            return self._lsoda_steps(func, y0, time_int, run, jac)
+        rhs_time = 0.0
+        report = run.report
+
+        def timed_func (x, t):
+            nonlocal rhs_time
+            start = time.perf_counter()
+            rates = func(x, t)
+            rhs_time += time.perf_counter() - start
+            if report is not None:
+                report(t)
+            return rates
+
+        start = time.perf_counter()
+        with profiling.span('ODE_int_solver.odeint'):
+            sol, info = odeint(func=timed_func, y0=y0, t=time_int, Dfun=jac,
+                               mxstep=5000000, h0=run.h0, full_output=True)
+        wall_time = time.perf_counter() - start
+        run.stats = SolverStats.from_odeint(info, time_int, wall_time, rhs_time)
+        return sol
+
+    def _lsoda_steps (self, func, y0, time_int, run, jac=None):
+        """Integrates func from y0 at time_int[0] to time_int[-1] one LSODA
+        step at a time, with the tolerances of odeint, and returns the states
+        at the steps selected by run.output, whose times are stored in
+        run.output_t. Records the performance statistics in run.stats; unlike
+        odeint, every step size is seen, so the step statistics are exact.
+        """
+        rhs_time = 0.0
+        report = run.report
+
+        def timed_func (t, x):
+            nonlocal rhs_time
+            start = time.perf_counter()
+            rates = func(x, t)
+            rhs_time += time.perf_counter() - start
+            if report is not None:
+                report(t)
+            return rates
+
+        start = time.perf_counter()
+        with profiling.span('ODE_int_solver.odeint'):
+            stepper = LSODA(timed_func, time_int[0], y0, time_int[-1],
+                            first_step=run.h0 or None, rtol=_ODEINT_TOL, atol=_ODEINT_TOL,
+                            jac=None if jac is None else (lambda t, x: jac(x, t)))
+            run.output.append(stepper.t, stepper.y)
+            n_steps, min_step, max_step, last_step = 0, np.inf, 0.0, np.nan
+            while stepper.status == 'running':
+                t_old = stepper.t
+                message = stepper.step()
+                if stepper.status == 'failed':
+                    raise ChemKinError('ODE_int_solver.solve_adaptive()',
+                                       'LSODA failed at t={}: {}'.format(t_old, message))
+                last_step = stepper.t - t_old
+                n_steps += 1
+                min_step, max_step = min(min_step, last_step), max(max_step, last_step)
+                run.output.append(stepper.t, stepper.y)
+            run.output_t, sol = run.output.finish()
+        wall_time = time.perf_counter() - start
+        run.stats = SolverStats(n_rhs=stepper.nfev, n_jac=stepper.njev, n_lu=stepper.nlu,
+                                n_steps=n_steps,
+                                min_step=min_step if n_steps else np.nan,
+                                mean_step=abs(time_int[-1] - time_int[0]) / n_steps if n_steps else np.nan,
+                                max_step=max_step if n_steps else np.nan,
+                                last_step=last_step, wall_time=wall_time, rhs_time=rhs_time)
+        return sol
+
+    def _progress_reporter (self):
+        """Returns a function of t counting RHS evaluations and calling
+        self.progress at most every self.progress_every seconds, or None if
+        self.progress is not set.
+        """
+        if self.progress is None:
+            return None
+        progress, every = self.progress, self.progress_every
+        n_rhs = 0
+        last = time.perf_counter()
+
+        def report (t):
+            nonlocal n_rhs, last
+            n_rhs += 1
+            now = time.perf_counter()
+            if now - last >= every:
+                last = now
+                progress(t, n_rhs)
+
+        return report
+
+    def _record_equilibrium_t (self, run, b_wi, f_wi, t):
+        """Records time t in run as the equilibrium time of the reactions, and
+        of the overall system, whose backward and forward progress rates have
+        come within threshold. As in the original solver, the rates checked at
+        t are those of the previous RHS evaluation, so the first evaluation of
+        a run records nothing; b_wi and f_wi, evaluated at t, are kept in run
+        for the next one.
+        """
+        last_wi, run.last_wi = run.last_wi, (b_wi, f_wi)
+        if last_wi is None:
+            return
+        b_wi, f_wi = last_wi
+
+        # If any of the reactions had the delta of backwards progress rates
+        # and forward progress rates fall below a certain threshold, record the equilibrium time
+        for j, (bw, fw) in enumerate(zip(b_wi, f_wi)):
+            if np.abs(bw - fw) < self.species_equil_thresh:
+                if run.critical_t[j] == -100:
+                    run.critical_t[j] = t
+
+        # If the norm of all of the deltas of all backwards progress rates
+        # and forward progress rates falls below a threshold, record systems equilibrium time
+        if np.linalg.norm(b_wi - f_wi) < self.overall_equil_thresh:
+            if run.overall_critical_t == -100:
+                run.overall_critical_t = t
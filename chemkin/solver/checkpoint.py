@@ -0,0 +1,53 @@
+"""
+Contains functions to write and read the checkpoints of long integrations,
+used by ODE_int_solver.solve_checkpointed().
+"""
+import hashlib
+import os
+import numpy as np
+
+
+def mechanism_hash (rxn):
+    """Returns a hex digest identifying the reactions of rxn: its forward and
+    backward rate coefficients and stoichiometric coefficients.
+    """
+    digest = hashlib.sha256()
+    for values in (rxn.ki, rxn.b_ki, rxn.vi_p, rxn.vi_dp):
+        values = np.ascontiguousarray(values, dtype=float)
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def save_checkpoint (path, **arrays):
+    """Writes arrays to the .npz file at path. The file is replaced
+    atomically, so a preempted write leaves the previous checkpoint intact.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def checkpoint_rows (path, shape=None):
+    """Returns the concentrations of the checkpoint at path, a .npy file next
+    to it memory-mapped for reading and writing, so that each segment writes
+    only its own rows. With shape, a new file of that shape is created.
+    Returns None if there is no file and no shape.
+    """
+    rows_path = path + '.rows.npy'
+    if shape is not None:
+        return np.lib.format.open_memmap(rows_path, mode='w+', dtype=float, shape=shape)
+    if not os.path.exists(rows_path):
+        return None
+    return np.load(rows_path, mmap_mode='r+')
+
+
+def load_checkpoint (path):
+    """Returns the dict of arrays of the checkpoint at path, or None if there
+    is none.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as checkpoint:
+        return {key: checkpoint[key] for key in checkpoint.files}
@@ -0,0 +1,203 @@
+"""
+Contains class EquilibriumSolver to compute the equilibrium composition of a
+system of reactions directly, without integrating the transient.
+"""
+import numpy as np
+from scipy.linalg import qr
+from chemkin.chemkin_errors import ChemKinError
+
+
+class EquilibriumSolver():
+    """Solves for the composition at which the net reaction rates vanish.
+
+    The unknown concentrations x must satisfy two sets of equations: the
+    reaction rates of a set of species with linearly independent
+    stoichiometry vanish, and every combination of species conserved by the
+    stoichiometry (atoms, total moles of inert species, ...) keeps the value
+    it has in the initial concentrations rxn.xi.
+
+    If all reactions are reversible the equilibrium is unique, and the system
+    is attacked with a damped Newton iteration on the logarithm of the
+    concentrations, which keeps every concentration positive. If Newton fails,
+    or if some reactions are irreversible, pseudo-transient continuation
+    (linearly implicit Euler steps whose step size grows as the residual
+    drops) is used. With irreversible reactions the end state depends on the
+    path taken, which pseudo-transient continuation follows from rxn.xi.
+
+    Attributes:
+        temp (float): Temperature for reaction (assumed to be held constant).
+        rxn (object): an instance of the ElementaryRxn() object. It is not
+            modified by the solver.
+        rtol (float, default 1e-10): Relative tolerance on the final Newton
+            step of each concentration.
+        atol (float, default 1e-20): Absolute tolerance on the final Newton
+            step of each concentration.
+        max_newton_iter (int, default 50): Maximum number of damped Newton
+            iterations before falling back to pseudo-transient continuation.
+        max_ptc_iter (int, default 2000): Maximum number of pseudo-transient
+            continuation steps.
+        max_log_step (float, default 2.0): Newton steps are damped so that no
+            concentration changes by more than a factor exp(max_log_step).
+        steady_t (float, default 1e10): Pseudo-transient continuation also
+            stops once a step of at least steady_t seconds changes no
+            concentration beyond tolerance, the same horizon used by
+            RxnBase.time_to_equilibrium().
+        method (str): 'newton' or 'ptc', the method that produced the last
+            solution.
+        n_iter (int): Number of iterations used by the last call to solve().
+    """
+
+    def __init__ (self, temp, rxn, rtol=1e-10, atol=1e-20, max_newton_iter=50,
+                  max_ptc_iter=2000, max_log_step=2.0, steady_t=1e10):
+        self.temp = temp
+        self.rxn = rxn
+        self.rtol = rtol
+        self.atol = atol
+        self.max_newton_iter = max_newton_iter
+        self.max_ptc_iter = max_ptc_iter
+        self.max_log_step = max_log_step
+        self.steady_t = steady_t
+        self.method = None
+        self.n_iter = 0
+
+        vi = (np.array(rxn.vi_dp, dtype=float) - np.array(rxn.vi_p, dtype=float)).T
+        # The conserved combinations of species are the orthogonal complement
+        # of the directions the reactions can move the composition.
+        u, s, _ = np.linalg.svd(vi)
+        rank = int(np.sum(s > s.max() * 1e-10)) if s.size and s.max() > 0 else 0
+        self._vi = vi
+        self._rank = rank
+        self._conserved_basis = u[:, rank:]
+
+    def solve (self, guess=None):
+        """Solves for the equilibrium concentrations.
+
+        Args:
+            guess (list of floats, optional): Initial guess for the Newton
+                iteration, e.g. the equilibrium found at a neighbouring
+                temperature. Defaults to rxn.xi. The conserved quantities are
+                always taken from rxn.xi.
+
+        Returns:
+            sol (numpy array, shape (len(rxn.xi),)): Equilibrium concentrations.
+
+        Raises:
+            ChemKinError if neither Newton nor pseudo-transient continuation
+            converges.
+        """
+        x0 = np.array(self.rxn.xi, dtype=float)
+        conserved = np.dot(self._conserved_basis.T, x0)
+        if guess is None:
+            guess = x0
+        guess = np.array(guess, dtype=float)
+
+        if all(self.rxn.is_reversible):
+            sol, n_iter = self._newton(guess, conserved)
+            if sol is not None:
+                self.method = 'newton'
+                self.n_iter = n_iter
+                return sol
+
+        sol, n_iter = self._ptc(x0, conserved)
+        if sol is None:
+            raise ChemKinError('EquilibriumSolver.solve()',
+                               'No convergence after {} Newton iterations and {} '
+                               'pseudo-transient steps.'.format(self.max_newton_iter,
+                                                                self.max_ptc_iter))
+        self.method = 'ptc'
+        self.n_iter = n_iter
+        return sol
+
+    def _evaluate (self, x):
+        """Returns reaction rates and their Jacobian at concentrations x."""
+        return self.rxn.evaluate(x)[0], self.rxn.jacobian(x)
+
+    def _newton_step (self, x, rates, jac, conserved, dx_dvar=None):
+        """Returns the Newton step on the equilibrium equations at x.
+
+        The step is taken in x itself, or in a variable v with dx/dv = dx_dvar
+        (e.g. dx_dvar = x for v = log(x)).
+        """
+        # Keep the rate equations of independent species, preferring minor
+        # ones: the balances of major species follow from conservation, while
+        # mixing rate equations would drown out the balances of trace species.
+        weights = 1.0 / np.maximum(np.abs(x), self.atol)
+        _, _, pivots = qr(self._vi.T * weights, mode='economic', pivoting=True)
+        selected = pivots[:self._rank]
+
+        F = np.concatenate((rates[selected],
+                            np.dot(self._conserved_basis.T, x) - conserved))
+        J = np.vstack((jac[selected], self._conserved_basis.T))
+        if dx_dvar is not None:
+            J = J * dx_dvar
+        # Rate equations are many orders of magnitude larger than the
+        # conservation equations; equilibrate the rows before solving.
+        row_scale = np.max(np.abs(J), axis=1)
+        row_scale[row_scale == 0] = 1.0
+        return np.linalg.lstsq(J / row_scale[:, None], -F / row_scale, rcond=None)[0]
+
+    def _converged (self, x, dx):
+        return np.all(np.abs(dx) <= self.rtol * np.abs(x) + self.atol)
+
+    def _newton (self, guess, conserved):
+        """Damped Newton iteration in z = log(x). Returns (sol, n_iter), with
+        sol = None if the iteration did not converge.
+        """
+        floor = max(np.max(np.abs(guess)), 1.0) * 1e-20
+        x = np.maximum(guess, floor)
+        for it in range(1, self.max_newton_iter + 1):
+            rates, jac = self._evaluate(x)
+            dz = self._newton_step(x, rates, jac, conserved, dx_dvar=x)
+            if not np.all(np.isfinite(dz)):
+                return None, it
+            max_dz = np.max(np.abs(dz)) if dz.size else 0.0
+            damping = min(1.0, self.max_log_step / max_dz) if max_dz > 0 else 1.0
+            x_new = x * np.exp(damping * dz)
+            if damping == 1.0 and self._converged(x_new, x_new - x):
+                return x_new, it
+            x = x_new
+        return None, self.max_newton_iter
+
+    def _ptc (self, x0, conserved):
+        """Pseudo-transient continuation from x0. Returns (sol, n_iter), with
+        sol = None if the iteration did not converge.
+        """
+        x = x0.copy()
+        n_species = len(x)
+        dt = None
+        res_norm = None
+        for it in range(1, self.max_ptc_iter + 1):
+            rates, jac = self._evaluate(x)
+
+            dx_newton = self._newton_step(x, rates, jac, conserved)
+            if np.all(x + dx_newton >= -self.atol) and self._converged(x, dx_newton):
+                return np.maximum(x + dx_newton, 0.0), it
+
+            new_norm = np.linalg.norm(rates)
+            if dt is None:
+                stiff = np.max(np.abs(jac)) if jac.size else 0.0
+                dt = 1e-3 / stiff if stiff > 0 else 1.0
+            elif new_norm > 0:
+                # Switched evolution relaxation: grow the pseudo time step at
+                # least geometrically, and faster while the residual drops.
+                dt *= min(max(res_norm / new_norm, 2.0), 10.0)
+            res_norm = new_norm
+
+            # Linearly implicit Euler step; it satisfies the conservation
+            # relations exactly because the rates lie in the range of vi.
+            # For very large dt the matrix approaches the singular -jac.
+            dx = np.linalg.lstsq(np.eye(n_species) / dt - jac, rates, rcond=None)[0]
+            # Species already depleted are clamped at zero below rather than
+            # limiting the step of all the others.
+            negative = (dx < 0) & (x > 0)
+            step = 1.0
+            if np.any(negative):
+                step = min(1.0, 0.99 * np.min(x[negative] / -dx[negative]))
+            if step < 1.0:
+                dt *= 0.5
+            elif dt >= self.steady_t and self._converged(x, dx):
+                # Species depleted by irreversible reactions make the Newton
+                # step ill-defined, but nothing changes over a long time step.
+                return np.maximum(x + dx, 0.0), it
+            x = np.maximum(x + step * dx, 0.0)
+        return None, self.max_ptc_iter
@@ -0,0 +1,187 @@
+"""
+Contains class QSSSolver to compute the evolution of reaction species'
+concentrations with the quasi-steady-state approximation for fast species.
+"""
+import numpy as np
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.solver.ODEint_solver import ODE_int_solver
+
+
+class QSSSolver(ODE_int_solver):
+    """Integrates the time evolution of the slow species of a system of
+    reactions, with the fast species held at quasi-steady state.
+
+    The reaction rates of the quasi-steady-state (QSS) species are set to
+    zero: at every step their concentrations are solved for from these
+    algebraic relations, given the current concentrations of the slow
+    species, and only the slow species are integrated. This removes the
+    shortest timescales from the system, which is what makes radicals so
+    expensive to integrate.
+
+    QSS species are either given, or detected from their lifetimes
+    1/|d(rate_i)/d(x_i)| at the initial concentrations. The stoichiometry of
+    the QSS species must be linearly independent, otherwise their algebraic
+    relations have no unique solution; detection therefore skips species
+    whose balance is already implied by faster ones.
+
+    solve() and the other solve methods of ODE_int_solver return the
+    concentrations of all species, with the initial concentrations of the QSS
+    species replaced by their quasi-steady values.
+
+    Attributes (in addition to those of ODE_int_solver):
+        qss_species (list of int, default None): Indices of the QSS species in
+            rxn.xi. If None, every run detects them from tau_qss at its
+            initial concentrations.
+        tau_qss (float, default None): Species whose lifetime is below tau_qss
+            are treated as QSS species. Defaults to 1e-3 times the time range
+            passed to solve().
+        rtol (float, default 1e-8): Relative tolerance of the QSS relations.
+        atol (float, default 1e-20): Absolute tolerance of the QSS relations.
+        max_newton_iter (int, default 50): Maximum number of Newton
+            iterations when solving the QSS relations.
+        selected_qss_species (list of int): QSS species of the last run to
+            finish.
+        n_steps (int): Number of integration steps taken by the last run to
+            finish.
+    """
+
+    def __init__ (self, temp, rxn, qss_species=None, tau_qss=None, equil_thresh=1e-5,
+                  overall_equil_thresh=1e-2, max_t=100, rtol=1e-8, atol=1e-20,
+                  max_newton_iter=50, positivity='zero'):
+        super().__init__(temp, rxn, equil_thresh, overall_equil_thresh, max_t, positivity)
+        self.qss_species = qss_species
+        self.tau_qss = tau_qss
+        self.rtol = rtol
+        self.atol = atol
+        self.max_newton_iter = max_newton_iter
+        self.selected_qss_species = None
+        self.n_steps = None
+        self._vi = (np.array(rxn.vi_dp, dtype=float) - np.array(rxn.vi_p, dtype=float)).T
+
+    def lifetimes (self, xi=None):
+        """Returns the lifetime 1/|d(rate_i)/d(x_i)| of every species at
+        concentrations xi (default rxn.xi); inf for species whose rate does not
+        depend on their own concentration.
+        """
+        diag = np.abs(np.diag(self.rxn.jacobian(xi)))
+        with np.errstate(divide='ignore'):
+            return np.where(diag > 0, 1.0 / diag, np.inf)
+
+    def detect_qss_species (self, tau_qss, xi=None):
+        """Returns the indices of the species whose lifetime at concentrations
+        xi (default rxn.xi) is below tau_qss, fastest first. Only species with
+        linearly independent stoichiometry are kept, and fewer than the rank of
+        the stoichiometry so that the slow species still react.
+        """
+        tau = self.lifetimes(xi)
+        # Keep at least one independent direction of reaction progress for
+        # the slow species to evolve along.
+        max_rank = np.linalg.matrix_rank(self._vi) - 1
+        selected = []
+        rank = 0
+        for i in np.argsort(tau):
+            if tau[i] >= tau_qss or rank >= max_rank:
+                break
+            new_rank = np.linalg.matrix_rank(self._vi[selected + [i]])
+            if new_rank > rank:
+                selected.append(int(i))
+                rank = new_rank
+        return selected
+
+    def _new_run (self, time_int, positivity=None):
+        run = super()._new_run(time_int, positivity)
+        run.qss_species = self.qss_species
+        return run
+
+    def _publish (self, run):
+        super()._publish(run)
+        self.selected_qss_species = run.qss_species
+        self.n_steps = run.stats.n_steps
+
+    def _integrate (self, time_int, y0, run):
+        """Integrates the slow species from the concentrations y0 at
+        time_int[0], with the QSS species at their quasi-steady values, and
+        returns the concentrations of all species at time_int.
+        """
+        if run.qss_species is None:
+            tau_qss = self.tau_qss
+            if tau_qss is None:
+                tau_qss = 1e-3 * (run.t_span[1] - run.t_span[0])
+            run.qss_species = self.detect_qss_species(tau_qss, y0)
+        qss = list(run.qss_species)
+        if qss and np.linalg.matrix_rank(self._vi[qss]) < len(qss):
+            raise ChemKinError('QSSSolver.solve()',
+                               'The stoichiometry of QSS species {} is not linearly '
+                               'independent.'.format(qss))
+        n_species = len(y0)
+        slow = [i for i in range(n_species) if i not in qss]
+
+        x = np.array(y0, dtype=float)
+        x[qss] = self._solve_qss(x, qss)[0]
+
+        def rxn_rate (x_slow, t):
+            x[slow] = x_slow
+            x[qss], rates, f_wi, b_wi = self._solve_qss(x, qss)
+            self._record_equilibrium_t(run, b_wi, f_wi, t)
+            return rates[slow]
+
+        # The Jacobian of the slow species goes through the QSS relations, so
+        # odeint approximates it by finite differences.
+        sol_slow = self._integrate_positive(rxn_rate, None, x[slow], time_int, run)
+
+        sol = np.zeros((len(time_int), n_species))
+        sol[:, slow] = sol_slow
+        x = np.array(y0, dtype=float)
+        for row in sol:
+            x[slow] = row[slow]
+            row[qss] = x[qss] = self._solve_qss(x, qss)[0]
+        return sol
+
+    def _solve_qss (self, x, qss):
+        """Returns the concentrations of the QSS species at which their rates
+        vanish, given the other concentrations in x, together with the
+        reaction rates and forward and backward progress rates at the
+        resulting state. The current values x[qss] are the starting guess of a
+        damped Newton iteration in log(x[qss]), which keeps them positive.
+        """
+        x = np.array(x, dtype=float)
+        if not qss:
+            return (x[qss],) + self.rxn.evaluate(x)
+        floor = max(np.max(np.abs(x)), 1.0) * 1e-30
+        x[qss] = np.maximum(x[qss], floor)
+        for _ in range(self.max_newton_iter):
+            rates = self.rxn.evaluate(x)[0]
+            jac = self.rxn.jacobian(x)[np.ix_(qss, qss)] * x[qss]
+            dz = np.linalg.lstsq(jac, -rates[qss], rcond=None)[0]
+            max_dz = np.max(np.abs(dz))
+            if not np.isfinite(max_dz):
+                break
+            damping = min(1.0, 2.0 / max_dz) if max_dz > 0 else 1.0
+            x_qss = x[qss] * np.exp(damping * dz)
+            converged = damping == 1.0 and np.all(np.abs(x_qss - x[qss]) <=
+                                                  self.rtol * x_qss + self.atol)
+            x[qss] = x_qss
+            if converged:
+                return (x[qss],) + self.rxn.evaluate(x)
+        raise ChemKinError('QSSSolver.solve()',
+                           'QSS relations of species {} did not converge; they may not '
+                           'be in quasi-steady state.'.format(qss))
+
+    def qss_error (self, time_int):
+        """Returns the largest deviation of the QSS solution from the full
+        solution of ODE_int_solver over time_int[1:], both started from rxn.xi,
+        relative to the largest concentration of each species in the full
+        solution.
+
+        Args:
+            time_int (list of floats): Time steps over which to compare the
+                evolution of species concentrations.
+        """
+        sol = self.solve(time_int)[0]
+        full_sol = ODE_int_solver(self.temp, self.rxn).solve(time_int)[0]
+
+        # The initial concentrations of the QSS species are replaced by their
+        # quasi-steady values, so the comparison starts at time_int[1].
+        scale = np.max(np.abs(full_sol[1:]), axis=0)
+        scale[scale == 0] = 1.0
+        return float(np.max(np.abs(sol[1:] - full_sol[1:]) / scale))
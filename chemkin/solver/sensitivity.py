@@ -0,0 +1,203 @@
+"""
+Contains class SensitivitySolver to compute the sensitivities of species
+concentrations and of the time to equilibrium with respect to the rate
+coefficients of the reactions.
+"""
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+from scipy.optimize import brentq
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.solver_stats import SolverStats
+
+
+class SensitivitySolver(ODE_int_solver):
+    """Computes sensitivities with respect to the logarithms ln k_j of the
+    rate coefficients of the reactions, with analytic Jacobians.
+
+    Perturbing ln k_j scales both the forward and the backward coefficient
+    of reaction j, since its equilibrium constant is fixed by thermodynamics:
+    d(rates)/d(ln k_j) = nu_j * (f_wj - b_wj).
+
+    Two methods are available:
+
+        forward(): forward sensitivities dx(t)/d(ln k) at every time step, by
+            integrating the sensitivity equations dS/dt = J S + F together
+            with the concentrations. The system has n_species * (n_rxns + 1)
+            unknowns, so this suits small mechanisms.
+        adjoint(): gradient d g/d(ln k) of a scalar objective g of the final
+            concentrations, by integrating the adjoint equations
+            d(lambda)/dt = -J^T lambda backwards along the stored trajectory
+            and the quadrature of F^T lambda. The integrated system has
+            n_species unknowns whatever n_rxns, so the cost does not grow
+            with the number of reactions beyond evaluating the rates.
+            final_concentration_sensitivity() and
+            equilibrium_time_sensitivity() are adjoint objectives.
+
+    The rates are evaluated at max(x, 0) (positivity 'clip'), so that the
+    right-hand side is differentiable. The trajectory between time steps is
+    interpolated by cubic Hermite polynomials with the exact derivatives, so
+    the accuracy of adjoint gradients depends on how well time_int resolves
+    the evolution.
+
+    Attributes (in addition to those of ODE_int_solver):
+        nu (numpy array of floats): Overall stoichiometric coefficients,
+            shape (n_species, n_rxns).
+    """
+
+    def __init__ (self, temp, rxn, equil_thresh=1e-5, overall_equil_thresh=1e-2, max_t=100):
+        super().__init__(temp, rxn, equil_thresh, overall_equil_thresh, max_t, positivity='clip')
+        self.nu = (np.array(rxn.vi_dp, dtype=float) - np.array(rxn.vi_p, dtype=float)).T
+
+    def forward (self, time_int, xi=None):
+        """Solves the concentrations and their forward sensitivities over
+        time_int.
+
+        Args:
+            time_int (list of floats): Time steps over which to solve.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+
+        Returns:
+            sol (numpy array, shape (len(time_int), n_species)): Concentrations,
+                as ODE_int_solver.solve() with positivity 'clip'.
+            sens (numpy array, shape (len(time_int), n_species, n_rxns)):
+                sens[t, i, j] = d x_i(t) / d ln k_j.
+        """
+        run = self._new_run(time_int)
+        x0 = self._initial_xi(xi)
+        n_species, n_rxns = self.nu.shape
+
+        def func (y, t):
+            x = np.maximum(y[:n_species], 0)
+            sens = y[n_species:].reshape(n_species, n_rxns)
+            rates, f_wi, b_wi = self.rxn.evaluate(x)
+            self._record_equilibrium_t(run, b_wi, f_wi, t)
+            d_sens = np.dot(self.rxn.jacobian(x), sens) + self.nu * (f_wi - b_wi)
+            return np.concatenate((rates, d_sens.ravel()))
+
+        def jac (y, t):
+            # Every block of unknowns is driven by the same Jacobian; the
+            # second derivatives coupling the sensitivities back to x are
+            # left out, which only affects the Newton iteration of odeint.
+            x = y[:n_species]
+            return np.kron(np.eye(n_rxns + 1), self.rxn.jacobian(np.maximum(x, 0)) * (x >= 0))
+
+        y0 = np.concatenate((x0, np.zeros(n_species * n_rxns)))
+        sol = self._odeint(func, y0, time_int, run, jac)
+        self._publish(run)
+        return sol[:, :n_species], sol[:, n_species:].reshape(len(time_int), n_species, n_rxns)
+
+    def adjoint (self, time_int, dg_dx, xi=None):
+        """Returns the gradient d g / d ln k (shape (n_rxns,)) of a scalar
+        objective g of the concentrations at time_int[-1].
+
+        Args:
+            time_int (list of floats): Time steps of the trajectory, stored to
+                integrate the adjoint equations backwards.
+            dg_dx (list of floats, or function): Derivative of g with respect
+                to the final concentrations, or a function returning it from
+                the final concentrations.
+            xi (list of floats, optional): Initial concentrations; defaults to
+                rxn.xi.
+        """
+        time_int = np.asarray(time_int, dtype=float)
+        run = self._new_run(time_int)
+        x_interp, sol = self._trajectory(time_int, self._initial_xi(xi), run)
+        if callable(dg_dx):
+            dg_dx = dg_dx(sol[-1])
+        grad = self._adjoint(x_interp, time_int, np.asarray(dg_dx, dtype=float), run)
+        self._publish(run)
+        return grad
+
+    def final_concentration_sensitivity (self, time_int, species, xi=None):
+        """Returns d x_species(time_int[-1]) / d ln k (shape (n_rxns,)), by the
+        adjoint method; species is the index of the species in rxn.xi.
+        """
+        dg_dx = np.zeros(self.nu.shape[0])
+        dg_dx[species] = 1.0
+        return self.adjoint(time_int, dg_dx, xi)
+
+    def equilibrium_time_sensitivity (self, time_int, xi=None):
+        """Returns the time t_eq at which the overall system reaches
+        equilibrium, and its gradient d t_eq / d ln k (shape (n_rxns,)), by the
+        adjoint method.
+
+        t_eq is the first time the norm h = ||f_wi - b_wi|| of the progress
+        rates falls to overall_equil_thresh, located by root finding on the
+        interpolated trajectory (ODE_int_solver.overall_critical_t is the
+        first evaluation time below the threshold, hence coarser). Since
+        h(x(t_eq), k) stays at the threshold,
+            d t_eq / d ln k = -(dh/d ln k) / (dh/dt) at t_eq.
+
+        Raises:
+            ChemKinError if the system is already at equilibrium at
+            time_int[0], or does not reach it by time_int[-1].
+        """
+        time_int = np.asarray(time_int, dtype=float)
+        run = self._new_run(time_int)
+        x_interp, sol = self._trajectory(time_int, self._initial_xi(xi), run)
+
+        def h (x):
+            _, f_wi, b_wi = self.rxn.evaluate(np.maximum(x, 0))
+            return np.linalg.norm(f_wi - b_wi) - self.overall_equil_thresh
+
+        below = [i for i, x in enumerate(sol) if h(x) <= 0]
+        if not below:
+            raise ChemKinError('SensitivitySolver.equilibrium_time_sensitivity()',
+                               'The system does not reach equilibrium by t={}.'.format(time_int[-1]))
+        if below[0] == 0:
+            raise ChemKinError('SensitivitySolver.equilibrium_time_sensitivity()',
+                               'The system is already at equilibrium at t={}.'.format(time_int[0]))
+        i = below[0]
+        t_eq = brentq(lambda t: h(x_interp(t)), time_int[i - 1], time_int[i])
+
+        x_eq = np.maximum(x_interp(t_eq), 0)
+        rates, f_wi, b_wi = self.rxn.evaluate(x_eq)
+        w = f_wi - b_wi
+        norm = np.linalg.norm(w)
+        dh_dx = np.dot(w, self.rxn.progress_rate_jacobian(x_eq)) / norm
+        nodes = np.append(time_int[time_int < t_eq], t_eq)
+        dh_dlnk = w ** 2 / norm + self._adjoint(x_interp, nodes, dh_dx, run)
+        self._publish(run)
+        return t_eq, -dh_dlnk / np.dot(dh_dx, rates)
+
+    def _trajectory (self, time_int, x0, run):
+        """Solves the concentrations over time_int, and returns their cubic
+        Hermite interpolant together with the solution.
+        """
+        sol = self._integrate(time_int, x0, run)
+        d_sol = [self.rxn.evaluate(np.maximum(x, 0))[0] for x in sol]
+        return CubicHermiteSpline(time_int, sol, d_sol), sol
+
+    def _adjoint (self, x_interp, nodes, lam_end, run):
+        """Integrates the adjoint lambda backwards from lam_end at nodes[-1] to
+        nodes[0] along the trajectory x_interp, and returns the integral of
+        F^T lambda over nodes (3-point Gauss-Legendre rule between nodes).
+        The stats of run aggregate the forward and backward integrations.
+        """
+        forward_stats = run.stats
+
+        def jacobian (t):
+            return self.rxn.jacobian(np.maximum(x_interp(t), 0))
+
+        def func (lam, t):
+            return -np.dot(jacobian(t).T, lam)
+
+        def jac (lam, t):
+            return -jacobian(t).T
+
+        lam = self._odeint(func, lam_end, nodes[::-1], run, jac)[::-1]
+        run.stats = SolverStats.aggregate([forward_stats, run.stats])
+        d_lam = [func(lam_i, t) for lam_i, t in zip(lam, nodes)]
+        lam_interp = CubicHermiteSpline(nodes, lam, d_lam)
+
+        points, weights = np.polynomial.legendre.leggauss(3)
+        half = np.diff(nodes) / 2
+        t = (nodes[:-1] + half)[:, None] + half[:, None] * points
+        t, w = t.ravel(), (half[:, None] * weights).ravel()
+        grad = np.zeros(self.nu.shape[1])
+        for t_k, w_k, x_k, lam_k in zip(t, w, x_interp(t), lam_interp(t)):
+            _, f_wi, b_wi = self.rxn.evaluate(np.maximum(x_k, 0))
+            grad += w_k * (f_wi - b_wi) * np.dot(lam_k, self.nu)
+        return grad
@@ -0,0 +1,282 @@
+"""
+Contains the shared-memory transport of process-pool solves: class
+SharedArrays packs numpy arrays into one shared memory block (or
+memory-mapped file) that worker processes attach to by name, and
+solve_temperatures() integrates a compiled mechanism over many temperatures
+in a process pool without pickling mechanisms or trajectories.
+
+The parent places the mechanism arrays once, read-only, and preallocates the
+output arrays; workers attach both when they start, and every task sends only
+a range of row indices and returns nothing but statistics, writing its
+concentrations straight into the output. IPC per task is thus constant,
+whatever the size of the mechanism or the length of the trajectories.
+"""
+import concurrent.futures
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.solver.ODEint_solver import ODE_int_solver
+
+SHARED_BACKENDS = ('shm', 'mmap')
+
+# Arrays of a CompiledMechanism placed in shared memory.
+_MECHANISM_ARRAYS = ('vi_p', 'vi_dp', 'reversible', 'A', 'b', 'E', 'nasa_low', 'nasa_high', 't_low', 't_high',
+                     'third_body', 'efficiencies', 'A0', 'b0', 'E0', 'troe')
+# Arrays of the sparse efficiencies, shared as efficiencies_data etc.
+_CSR_ARRAYS = ('data', 'indices', 'indptr')
+
+_ALIGN = 64
+
+
+class SharedArrays():
+    """Numpy arrays in one block of shared memory ('shm' backend, see
+    multiprocessing.shared_memory) or in one memory-mapped file ('mmap'
+    backend, at path), which other processes attach to with the small,
+    picklable handle.
+
+        shared = SharedArrays.create({'x': np.zeros((1000, 8))})
+        # in a worker, given shared.handle:
+        x = SharedArrays.attach(handle)['x']
+
+    The creating process owns the block and frees it with unlink() (the
+    'mmap' file is removed); other processes only close() their mapping.
+
+    Attributes:
+        handle (tuple): (backend, name or path, layout), where layout maps
+            each array name to its offset, shape and dtype.
+        arrays (dict of numpy arrays): Views of the arrays in the block.
+    """
+
+    def __init__ (self, handle, buffer, owner, shm=None):
+        self.handle = handle
+        self.owner = owner
+        self._buffer = buffer
+        self._shm = shm
+        self.arrays = {}
+        for name, (offset, shape, dtype) in handle[2].items():
+            count = int(np.prod(shape))
+            self.arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def __getitem__ (self, name):
+        return self.arrays[name]
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+        return False
+
+    @classmethod
+    def create (cls, arrays, backend='shm', path=None):
+        """Returns the SharedArrays holding a copy of arrays (dict of array
+        likes), owned by this process.
+        """
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        shared = cls.allocate({name: (values.shape, values.dtype) for name, values in arrays.items()},
+                              backend, path)
+        for name, values in arrays.items():
+            shared.arrays[name][...] = values
+        return shared
+
+    @classmethod
+    def allocate (cls, specs, backend='shm', path=None):
+        """Returns the SharedArrays of uninitialized arrays of the shapes
+        and dtypes of specs (dict of (shape, dtype)), owned by this process,
+        so that large arrays are created in place rather than copied in.
+        """
+        if backend not in SHARED_BACKENDS:
+            raise ChemKinError('SharedArrays.allocate()', 'Unknown backend {}.'.format(backend))
+        layout = {}
+        size = 0
+        for name, (shape, dtype) in specs.items():
+            dtype = np.dtype(dtype)
+            shape = tuple(int(n) for n in shape)
+            layout[name] = (size, shape, dtype.str)
+            size += -(-int(np.prod(shape)) * dtype.itemsize // _ALIGN) * _ALIGN
+        size = max(size, 1)
+
+        if backend == 'shm':
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            return cls(('shm', shm.name, layout), shm.buf, True, shm)
+        if path is None:
+            raise ChemKinError('SharedArrays.allocate()', "The 'mmap' backend needs a path.")
+        buffer = np.memmap(path, dtype=np.uint8, mode='w+', shape=(size,))
+        return cls(('mmap', path, layout), buffer, True)
+
+    @classmethod
+    def attach (cls, handle, writable=False):
+        """Returns the SharedArrays of handle, attached from this process;
+        its arrays are read-only unless writable.
+        """
+        backend, name, layout = handle
+        if backend == 'shm':
+            shm = _attach_shm(name)
+            shared = cls(handle, shm.buf, False, shm)
+        else:
+            buffer = np.memmap(name, dtype=np.uint8, mode='r+' if writable else 'r')
+            shared = cls(handle, buffer, False)
+        for values in shared.arrays.values():
+            values.flags.writeable = writable
+        return shared
+
+    def close (self):
+        """Releases the mapping of this process; views of its arrays must
+        not be used afterwards.
+        """
+        self.arrays = {}
+        if self._shm is not None:
+            self._buffer = None
+            self._shm.close()
+            self._shm = None
+        elif self._buffer is not None:
+            self._buffer = None
+
+    def unlink (self):
+        """Releases the mapping, and frees the block."""
+        backend, name, _ = self.handle
+        shm = self._shm
+        self.close()
+        if backend == 'shm':
+            shm.unlink()
+        elif os.path.exists(name):
+            os.remove(name)
+
+
+def _attach_shm (name):
+    """Attaches the shared memory block name. Before Python 3.13 attaching
+    registers the block with the resource tracker again; pool workers share
+    the tracker of their parent, where this is a no-op, and the owner's
+    unlink() unregisters it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def share_mechanism (mech, backend='shm', path=None):
+    """Returns the SharedArrays of the arrays of the CompiledMechanism mech;
+    the sparse efficiencies are shared as their CSR arrays.
+    """
+    arrays = {name: getattr(mech, name) for name in _MECHANISM_ARRAYS}
+    efficiencies = sparse.csr_matrix(arrays.pop('efficiencies'))
+    for name in _CSR_ARRAYS:
+        arrays['efficiencies_' + name] = getattr(efficiencies, name)
+    return SharedArrays.create(arrays, backend, path)
+
+
+def attached_mechanism (shared, species, equations):
+    """Returns the CompiledMechanism of species and equations whose arrays
+    are those of the SharedArrays shared, without copying them.
+    """
+    efficiencies = sparse.csr_matrix(tuple(shared['efficiencies_' + name] for name in _CSR_ARRAYS),
+                                     shape=(len(equations), len(species)))
+    arrays = [efficiencies if name == 'efficiencies' else shared[name] for name in _MECHANISM_ARRAYS]
+    return CompiledMechanism(species, equations, *arrays, dtype=shared['A'].dtype)
+
+
+# State of a worker process of solve_temperatures().
+_worker = {}
+
+
+def _init_worker (mech_handle, species, equations, out_handle, xi, time_int, positivity):
+    mech_shared = SharedArrays.attach(mech_handle)
+    out = SharedArrays.attach(out_handle, writable=True)
+    _worker.update(mech=attached_mechanism(mech_shared, species, equations), shared=(mech_shared, out),
+                   out=out, xi=xi, time_int=time_int, positivity=positivity)
+
+
+def _solve_rows (start, stop):
+    """Integrates rows start:stop of the temperatures of the worker, writing
+    the results into its output arrays. Returns the number of RHS
+    evaluations.
+    """
+    return _solve_into(_worker['mech'], _worker['out'].arrays, _worker['xi'], _worker['time_int'],
+                       _worker['positivity'], start, stop)
+
+
+def _solve_into (mech, out, xi, time_int, positivity, start, stop):
+    T = out['T'][start:stop]
+    ki, b_ki = mech.coefficients(T)
+    n_rhs = 0
+    for i in range(stop - start):
+        if np.any(np.isnan(b_ki[i])):
+            continue
+        rxn = mech.rxn(T[i], xi, ki[i], b_ki[i])
+        sol, critical_t, overall_critical_t, stats = ODE_int_solver(T[i], rxn, positivity=positivity).solve(
+            time_int, full_output=True)
+        out['sol'][start + i] = sol
+        out['critical_t'][start + i] = critical_t
+        out['overall_critical_t'][start + i] = overall_critical_t
+        n_rhs += stats.n_rhs
+    return n_rhs
+
+
+def _init_outputs (outputs, temperatures):
+    outputs['T'][:] = temperatures
+    for name in ('sol', 'critical_t', 'overall_critical_t'):
+        outputs[name].fill(np.nan)
+
+
+def solve_temperatures (mech, temperatures, xi, time_int, n_workers=None, positivity='zero',
+                        chunk_size=4, backend='shm', path=None):
+    """Integrates the CompiledMechanism mech from concentrations xi over
+    time_int at every temperature, in a process pool of n_workers processes
+    (default: number of CPUs; n_workers=1 integrates in this process).
+
+    The mechanism arrays are shared read-only with the workers, and the
+    workers write the concentrations into a preallocated shared output;
+    tasks are chunk_size temperatures each. The output is created with
+    backend ('shm', or 'mmap' in the file path, which is kept so that large
+    results need not fit in memory).
+
+    Returns:
+        sol (numpy array, shape (len(temperatures), len(time_int),
+            len(xi))): Concentrations, as ODE_int_solver.solve() returns
+            them; NaN where the backward coefficients are not defined.
+        critical_t (numpy array, shape (len(temperatures), n_rxns))
+        overall_critical_t (numpy array, shape (len(temperatures),))
+    """
+    temperatures = np.asarray(temperatures, dtype=float)
+    xi = np.asarray(xi, dtype=float)
+    time_int = np.asarray(time_int, dtype=float)
+    n = len(temperatures)
+    specs = {'T': ((n,), float), 'sol': ((n, len(time_int), len(xi)), float),
+             'critical_t': ((n, len(mech)), float), 'overall_critical_t': ((n,), float)}
+
+    chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if n_workers == 1:
+        outputs = {name: np.empty(shape, dtype) for name, (shape, dtype) in specs.items()}
+        _init_outputs(outputs, temperatures)
+        # same chunks as the workers, whose vectorized coefficients may
+        # differ in the last bit from those of other chunks
+        for start, stop in chunks:
+            _solve_into(mech, outputs, xi, time_int, positivity, start, stop)
+        return outputs['sol'], outputs['critical_t'], outputs['overall_critical_t']
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    mmap_path = path if backend == 'mmap' else None
+    with share_mechanism(mech) as mech_shared, SharedArrays.allocate(specs, backend, mmap_path) as out:
+        # the output is created and filled in place, never copied in
+        _init_outputs(out.arrays, temperatures)
+        initargs = (mech_shared.handle, mech.species, mech.equations, out.handle, xi, time_int, positivity)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                                    initargs=initargs) as executor:
+            futures = [executor.submit(_solve_rows, start, stop) for start, stop in chunks]
+            for future in futures:
+                future.result()
+        if backend == 'mmap':
+            out.owner = False  # keep the file; return arrays mapped from it
+            mapped = SharedArrays.attach(out.handle)
+            return mapped['sol'], mapped['critical_t'], mapped['overall_critical_t']
+        return out['sol'].copy(), out['critical_t'].copy(), out['overall_critical_t'].copy()
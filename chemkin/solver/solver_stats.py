@@ -0,0 +1,107 @@
+"""
+Contains class SolverStats to record the work done by a call to a solver's
+solve() method, and to aggregate it over a sweep of solves.
+"""
+import numpy as np
+
+
+class SolverStats():
+    """Performance statistics of one solve, or of several solves aggregated.
+
+    Attributes:
+        n_rhs (int): Number of right-hand side (reaction rate) evaluations.
+        n_jac (int): Number of Jacobian evaluations.
+        n_lu (int): Number of LU decompositions. LSODA factors the iteration
+            matrix each time it evaluates the Jacobian, so n_lu == n_jac.
+        n_steps (int): Number of accepted steps.
+        n_rejected (int or None): Number of rejected steps; None because
+            odeint does not report it.
+        min_step, mean_step, max_step (float): Step sizes. mean_step is exact
+            (time range over steps); min_step and max_step are taken over the
+            last step before each output time, which is what odeint reports.
+        last_step (float): Size of the last step taken, to continue an
+            integration where it stopped.
+        n_method_switches (int): Number of switches between the non-stiff
+            (Adams) and stiff (BDF) methods seen between output times.
+        wall_time (float): Wall-clock time of the solve, in seconds.
+        rhs_time (float): Part of wall_time spent evaluating the right-hand
+            side.
+        overhead_time (float): wall_time - rhs_time, spent in the integrator.
+        n_solves (int): Number of solves the statistics cover.
+    """
+
+    def __init__ (self, n_rhs=0, n_jac=0, n_lu=0, n_steps=0, n_rejected=None,
+                  min_step=np.nan, mean_step=np.nan, max_step=np.nan, last_step=np.nan,
+                  n_method_switches=0, wall_time=0.0, rhs_time=0.0, n_solves=1):
+        self.n_rhs = n_rhs
+        self.n_jac = n_jac
+        self.n_lu = n_lu
+        self.n_steps = n_steps
+        self.n_rejected = n_rejected
+        self.min_step = min_step
+        self.mean_step = mean_step
+        self.max_step = max_step
+        self.last_step = last_step
+        self.n_method_switches = n_method_switches
+        self.wall_time = wall_time
+        self.rhs_time = rhs_time
+        self.n_solves = n_solves
+
+    @property
+    def overhead_time (self):
+        return self.wall_time - self.rhs_time
+
+    def __repr__ (self):
+        return ('SolverStats(n_solves={}, n_rhs={}, n_jac={}, n_lu={}, n_steps={}, '
+                'n_rejected={}, min_step={:.3g}, mean_step={:.3g}, max_step={:.3g}, '
+                'n_method_switches={}, wall_time={:.3g}, rhs_time={:.3g})').format(
+              self.n_solves, self.n_rhs, self.n_jac, self.n_lu, self.n_steps,
+              self.n_rejected, self.min_step, self.mean_step, self.max_step,
+              self.n_method_switches, self.wall_time, self.rhs_time)
+
+    @classmethod
+    def from_odeint (cls, info, time_int, wall_time, rhs_time):
+        """Returns the SolverStats of a call to scipy.integrate.odeint() over
+        time_int, from the info dictionary it returns with full_output=True.
+        """
+        n_steps = int(info['nst'][-1]) if len(info['nst']) else 0
+        n_jac = int(info['nje'][-1]) if len(info['nje']) else 0
+        steps = info['hu'][info['hu'] > 0]
+        mused = info['mused'][info['mused'] > 0]
+        return cls(n_rhs=int(info['nfe'][-1]) if len(info['nfe']) else 0,
+                   n_jac=n_jac,
+                   n_lu=n_jac,
+                   n_steps=n_steps,
+                   min_step=float(np.min(steps)) if steps.size else np.nan,
+                   mean_step=abs(time_int[-1] - time_int[0]) / n_steps if n_steps else np.nan,
+                   max_step=float(np.max(steps)) if steps.size else np.nan,
+                   last_step=float(steps[-1]) if steps.size else np.nan,
+                   n_method_switches=int(np.sum(mused[1:] != mused[:-1])),
+                   wall_time=wall_time,
+                   rhs_time=rhs_time)
+
+    @classmethod
+    def aggregate (cls, stats_list):
+        """Returns the SolverStats of a sweep of solves: counts and times are
+        summed, min_step and max_step are the extremes, and mean_step is the
+        mean over all steps of all solves.
+        """
+        stats_list = list(stats_list)
+        n_steps = sum(s.n_steps for s in stats_list)
+        total_t = sum(s.mean_step * s.n_steps for s in stats_list if s.n_steps)
+        rejected = [s.n_rejected for s in stats_list]
+        min_steps = [s.min_step for s in stats_list if not np.isnan(s.min_step)]
+        max_steps = [s.max_step for s in stats_list if not np.isnan(s.max_step)]
+        return cls(n_rhs=sum(s.n_rhs for s in stats_list),
+                   n_jac=sum(s.n_jac for s in stats_list),
+                   n_lu=sum(s.n_lu for s in stats_list),
+                   n_steps=n_steps,
+                   n_rejected=None if None in rejected else sum(rejected),
+                   min_step=min(min_steps) if min_steps else np.nan,
+                   mean_step=total_t / n_steps if n_steps else np.nan,
+                   max_step=max(max_steps) if max_steps else np.nan,
+                   last_step=stats_list[-1].last_step if stats_list else np.nan,
+                   n_method_switches=sum(s.n_method_switches for s in stats_list),
+                   wall_time=sum(s.wall_time for s in stats_list),
+                   rhs_time=sum(s.rhs_time for s in stats_list),
+                   n_solves=sum(s.n_solves for s in stats_list))
@@ -0,0 +1,84 @@
+"""
+Contains class EquilibriumSweep to solve the equilibrium compositions of a
+system of reactions over a sweep of temperatures, warm-starting each solve
+from its neighbours.
+"""
+import numpy as np
+from chemkin.reaction.non_elementary_rxn import rxn_from_parsed_data
+from chemkin.solver.equilibrium_solver import EquilibriumSolver
+
+
+class EquilibriumSweep():
+    """Solves for the equilibrium composition at every temperature of a
+    sweep with EquilibriumSolver, in order of increasing temperature.
+
+    Neighbouring temperatures have nearly identical equilibria, so with
+    warm_start each Newton iteration starts from a prediction instead of
+    rxn.xi: the previous solution, or once two are known, their linear
+    extrapolation in log-concentration to the new temperature (a secant
+    continuation predictor). The finer the sweep, the better the prediction
+    and the fewer the iterations. A poor prediction costs nothing extra in
+    robustness, since EquilibriumSolver falls back to pseudo-transient
+    continuation from rxn.xi if Newton does not converge.
+
+    Attributes:
+        parsed_data_list (list of dicts): Output of
+            XmlParser.parsed_data_list(Ti); temperatures whose backward
+            coefficients are 'Not Defined' are skipped.
+        xi (list of floats): Initial concentrations, whose conserved
+            quantities the equilibria keep.
+        warm_start (bool, default True): Warm-start each solve from its
+            neighbours.
+        solver_kwargs (dict): Keyword arguments of every EquilibriumSolver.
+        n_iter (list of int): Iterations used at each temperature by the last
+            call to solve(), in the order of parsed_data_list (0 if skipped).
+        methods (list of str): 'newton' or 'ptc' at each temperature (None if
+            skipped).
+    """
+
+    def __init__ (self, parsed_data_list, xi, warm_start=True, **solver_kwargs):
+        self.parsed_data_list = parsed_data_list
+        self.xi = xi
+        self.warm_start = warm_start
+        self.solver_kwargs = solver_kwargs
+        self.n_iter = []
+        self.methods = []
+
+    def solve (self):
+        """Returns the list of equilibrium concentrations (numpy arrays) in the
+        order of parsed_data_list, with None for skipped temperatures.
+        """
+        n_temps = len(self.parsed_data_list)
+        sols = [None] * n_temps
+        self.n_iter = [0] * n_temps
+        self.methods = [None] * n_temps
+
+        order = sorted(range(n_temps), key=lambda i: self.parsed_data_list[i]['T'])
+        previous = []  # (T, log of solution) of the last two solved temperatures
+        for i in order:
+            parsed_data = self.parsed_data_list[i]
+            if str(parsed_data['b_ki']) == 'Not Defined':
+                continue
+            T = parsed_data['T']
+            rxn = rxn_from_parsed_data(parsed_data, self.xi)
+            solver = EquilibriumSolver(T, rxn, **self.solver_kwargs)
+            sols[i] = solver.solve(self._predict(previous, T) if self.warm_start else None)
+            self.n_iter[i] = solver.n_iter
+            self.methods[i] = solver.method
+
+            floor = max(np.max(np.abs(sols[i])), 1.0) * 1e-30
+            previous = (previous + [(T, np.log(np.maximum(sols[i], floor)))])[-2:]
+        return sols
+
+    @staticmethod
+    def _predict (previous, T):
+        """Returns the initial guess at temperature T from the solutions at
+        the previous temperatures, or None if there are none.
+        """
+        if not previous:
+            return None
+        T_1, z_1 = previous[-1]
+        if len(previous) == 1 or T_1 == previous[0][0]:
+            return np.exp(z_1)
+        T_0, z_0 = previous[0]
+        return np.exp(z_1 + (z_1 - z_0) * (T - T_1) / (T_1 - T_0))
@@ -3,8 +3,12 @@ Tests for the ODE Solver ODEint_solver.py module
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import pytest
+from scipy.integrate import odeint
 from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
 from chemkin.preprocessing.parse_xml import XmlParser
 from chemkin.solver.ODEint_solver import ODE_int_solver
 from chemkin.reaction.elementary_rxn import ElementaryRxn
@@ -71,3 +75,202 @@ def test_ODE_solver_solve():
         
         #error_msg2 = "Reaction has not reached an equilibrium"
         #assert all(i>0 for i in t_c) and t_o >0, error_msg2
+
+def get_rxn(T=1500, xi=[2., 1., .5, 1., 1., 1., .5, 1.]):
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([T])[0]
+    return ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                         parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+
+def test_ODE_solver_has_no_side_effects():
+
+    """
+    Tests that solving leaves the reaction object untouched and that solving
+    twice gives the same equilibrium times.
+    """
+
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.]
+    rxn = get_rxn(xi=xi)
+    my_solver = ODE_int_solver(1500, rxn)
+    time_int = np.linspace(0, 1e-11, 51)
+
+    sol_1, t_c_1, t_o_1 = my_solver.solve(time_int)
+    assert rxn.xi == xi and rxn.f_wi is None and rxn.b_wi is None and rxn.rates is None
+    sol_2, t_c_2, t_o_2 = my_solver.solve(time_int)
+
+    assert np.array_equal(sol_1, sol_2)
+    assert np.array_equal(t_c_1, t_c_2) and t_c_1 is not t_c_2
+    assert t_o_1 == t_o_2
+    assert my_solver.critical_t is t_c_2
+
+    other_xi = [1., 1., 1., 1., 1., 1., 1., 1.]
+    sol_3 = my_solver.solve(time_int, xi=other_xi)[0]
+    assert np.array_equal(sol_3[0], other_xi) and rxn.xi == xi
+
+def test_ODE_solver_in_thread_pool():
+
+    """
+    Tests that concurrent solves sharing one solver and one reaction object
+    give the same results as serial solves.
+    """
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    time_int = np.linspace(0, 1e-11, 51)
+    initial_xi = [[2., 1., .5, 1., 1., 1., .5, 1.], [1., 1., 1., 1., 1., 1., 1., 1.],
+                  [.5, .5, .5, 2., 1., 1., .1, .1], [1., 2., .5, .5, 2., 1., .5, 1.]]
+    serial = [my_solver.solve(time_int, xi=xi) for xi in initial_xi]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        concurrent = list(executor.map(lambda xi: my_solver.solve(time_int, xi=xi), initial_xi * 2))
+
+    for (sol, t_c, t_o), (ref_sol, ref_t_c, ref_t_o) in zip(concurrent, serial * 2):
+        assert np.array_equal(sol, ref_sol)
+        assert np.array_equal(t_c, ref_t_c) and t_o == ref_t_o
+
+def test_ODE_solver_positivity_strategies_agree():
+
+    """
+    Tests that the non-negativity strategies agree when all concentrations are
+    positive, and that clipping needs fewer RHS evaluations than zeroing.
+    """
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    time_int = np.linspace(0, 1e-6, 101)
+    ref_sol, _, _, ref_stats = my_solver.solve(time_int, full_output=True)
+    for positivity in ['clip', 'log', 'project']:
+        sol, _, _, stats = my_solver.solve(time_int, full_output=True, positivity=positivity)
+        assert np.allclose(sol, ref_sol, rtol=1e-5, atol=1e-8 * np.max(ref_sol))
+        if positivity == 'clip':
+            assert stats.n_rhs < ref_stats.n_rhs
+
+def test_ODE_solver_positivity_with_zero_concentrations():
+
+    """
+    Tests that with zero initial concentrations the 'zero' strategy freezes
+    the system, while the other strategies let it react, keep (or project)
+    concentrations non-negative and agree with each other.
+    """
+
+    xi = [1., 0., 0., 2., 0., 1., 0., 0.]
+    my_solver = ODE_int_solver(1500, get_rxn(xi=xi))
+    time_int = np.linspace(0, 1e-6, 51)
+
+    frozen_sol = my_solver.solve(time_int)[0]
+    assert np.all(frozen_sol == xi)
+
+    sols = {positivity: my_solver.solve(time_int, positivity=positivity)[0]
+            for positivity in ['clip', 'log', 'project']}
+    assert np.all(sols['log'] >= 0) and np.all(sols['project'] >= 0)
+    assert np.min(sols['clip']) > -1e-6
+    assert not np.allclose(sols['clip'][-1], xi)
+    assert np.allclose(sols['log'], sols['clip'], atol=1e-5)
+    assert np.allclose(sols['project'], sols['clip'], atol=1e-5)
+
+    my_solver.positivity = 'log'
+    assert np.array_equal(my_solver.solve(time_int)[0], sols['log'])
+
+def test_ODE_solver_log_positivity_species_driven_to_zero():
+    # A -> B: log A decreases without bound, and exp(log A) underflows to 0
+    rxn = ElementaryRxn([1e3], [0.], [1., 0.], [[1., 0.]], [[0., 1.]])
+    my_solver = ODE_int_solver(300, rxn, positivity='log')
+    time_int = np.linspace(0, 2, 11)
+    with np.errstate(divide='raise', invalid='raise'):
+        sol = my_solver.solve(time_int)[0]
+    assert np.all(np.isfinite(sol)) and np.all(sol >= 0)
+    assert np.allclose(sol[:, 0], np.exp(-1e3 * time_int), rtol=1e-3, atol=1e-300)
+    assert np.allclose(sol[:, 1], 1 - sol[:, 0], rtol=1e-6)
+
+def test_ODE_solver_positivity_unknown():
+    my_solver = ODE_int_solver(1500, get_rxn())
+    with pytest.raises(ChemKinError):
+        my_solver.solve(np.linspace(0, 1e-12, 11), positivity='abs')
+
+def test_ODE_solver_solve_adaptive():
+
+    """
+    Tests that output times selected among the steps follow the solution of
+    solve() over a log-spaced grid, within the adaptive tolerance, with far
+    fewer points than steps.
+    """
+
+    my_solver = ODE_int_solver(1500, get_rxn(), positivity='clip')
+    t_steps, x_steps, _, _, stats = my_solver.solve_adaptive(1e2, 'steps', max_points=10**6, full_output=True)
+    assert len(t_steps) == stats.n_steps + 1 and t_steps[0] == 0 and t_steps[-1] == 1e2
+    assert stats.min_step <= stats.mean_step <= stats.max_step
+
+    time_int = np.concatenate(([0.], np.logspace(-18, 2, 200)))
+    ref_sol = my_solver.solve(time_int)[0]
+    assert np.allclose(np.interp(time_int, t_steps, x_steps[:, 0]), ref_sol[:, 0], atol=1e-3)
+
+    t_adaptive, x_adaptive, _, _ = my_solver.solve_adaptive(1e2, rtol=1e-3)
+    assert len(t_adaptive) < len(t_steps) / 5
+    for j in range(x_steps.shape[1]):
+        error = np.abs(np.interp(t_steps, t_adaptive, x_adaptive[:, j]) - x_steps[:, j])
+        assert np.max(error) <= 1e-3 * np.max(x_steps)
+
+    t_capped, _, _, _ = my_solver.solve_adaptive(1e2, 'steps', max_points=50)
+    assert len(t_capped) == 50 and t_capped[-1] == 1e2
+
+def test_ODE_solver_solve_adaptive_rejects_project():
+    my_solver = ODE_int_solver(1500, get_rxn())
+    with pytest.raises(ChemKinError):
+        my_solver.solve_adaptive(1e-12, positivity='project')
+
+def test_ODE_solver_progress():
+
+    """
+    Tests that progress is called during the solve, without changing the
+    results, and that raising from it aborts the solve.
+    """
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    time_int = np.linspace(0, 1e-6, 101)
+    ref_sol = my_solver.solve(time_int)[0]
+
+    calls = []
+    my_solver.progress = lambda t, n_rhs: calls.append((t, n_rhs))
+    my_solver.progress_every = 0.0
+    assert np.array_equal(my_solver.solve(time_int)[0], ref_sol)
+    assert len(calls) == my_solver.stats.n_rhs and calls[-1][1] == my_solver.stats.n_rhs
+
+    def stop (t, n_rhs):
+        raise KeyboardInterrupt()
+
+    my_solver.progress = stop
+    with pytest.raises(KeyboardInterrupt):
+        my_solver.solve(time_int)
+
+def test_ODE_solver_equilibrium_times_lag_one_evaluation():
+
+    """
+    Tests that the equilibrium times are those of the original solver: the
+    progress rates of each RHS evaluation are checked at the time of the next
+    one, and the first evaluation records nothing.
+    """
+
+    rxn = get_rxn(T=900)
+    my_solver = ODE_int_solver(900, rxn)
+    time_int = np.linspace(0, 1e-3, 101)
+    _, t_c, t_o = my_solver.solve(time_int)
+
+    critical_t = -100*np.ones((len(rxn.ki),))
+    overall_critical_t = -100
+    last_wi = None
+
+    def rxn_rate (x, t):
+        nonlocal overall_critical_t, last_wi
+        if np.any(x <= 0):
+            return np.zeros((len(x),))
+        rates, f_wi, b_wi = rxn.evaluate(x)
+        if last_wi is not None:
+            b_last, f_last = last_wi
+            for j in np.nonzero(np.abs(b_last - f_last) < my_solver.species_equil_thresh)[0]:
+                if critical_t[j] == -100:
+                    critical_t[j] = t
+            if np.linalg.norm(b_last - f_last) < my_solver.overall_equil_thresh and overall_critical_t == -100:
+                overall_critical_t = t
+        last_wi = (b_wi, f_wi)
+        return rates
+
+    odeint(rxn_rate, rxn.xi, time_int, mxstep=5000000)
+    assert np.array_equal(t_c, critical_t)
+    assert t_o == overall_critical_t
@@ -0,0 +1,105 @@
+"""
+Tests for the checkpoint.py module and ODE_int_solver.solve_checkpointed()
+"""
+
+import os
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.solver.checkpoint import load_checkpoint, mechanism_hash
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.viz import summary
+
+
+def get_rxn(T=1500, xi=[2., 1., .5, 1., 1., 1., .5, 1.]):
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([T])[0]
+    return ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                         parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+
+
+class Preempted(Exception):
+    pass
+
+
+def preempt_after(my_solver, n_segments):
+    integrate = my_solver._integrate
+    calls = [0]
+
+    def preempted_integrate(time_int, y0, run):
+        calls[0] += 1
+        if calls[0] > n_segments:
+            raise Preempted()
+        return integrate(time_int, y0, run)
+    my_solver._integrate = preempted_integrate
+
+
+def test_mechanism_hash():
+    assert mechanism_hash(get_rxn()) == mechanism_hash(get_rxn(xi=[1.] * 8))
+    assert mechanism_hash(get_rxn()) != mechanism_hash(get_rxn(T=1600))
+
+
+def test_resume_is_bit_for_bit(tmp_path):
+    time_int = np.linspace(0, 1e-12, 51)
+    path = str(tmp_path / 'run.npz')
+    sol, critical_t, overall_critical_t = ODE_int_solver(1500, get_rxn()).solve_checkpointed(
+          time_int, str(tmp_path / 'reference.npz'), checkpoint_every=10)
+    assert sol.shape == (51, 8)
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    preempt_after(my_solver, 2)
+    with pytest.raises(Preempted):
+        my_solver.solve_checkpointed(time_int, path, checkpoint_every=10)
+    checkpoint = load_checkpoint(path)
+    assert checkpoint['t'] == time_int[20] and checkpoint['step'] == 21
+    # the checkpoint holds the state only; the rows are in a memory-mapped file
+    assert 'sol' not in checkpoint
+    size = os.path.getsize(path)
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    resumed = my_solver.solve_checkpointed(time_int, path, checkpoint_every=10)
+    assert my_solver.stats.n_solves == 3
+    assert np.array_equal(resumed[0], sol)
+    assert np.array_equal(resumed[1], critical_t)
+    assert resumed[2] == overall_critical_t
+    assert os.path.getsize(path) == size
+
+    # A finished run is read back without integrating
+    my_solver = ODE_int_solver(1500, get_rxn())
+    assert np.array_equal(my_solver.solve_checkpointed(time_int, path, checkpoint_every=10)[0], sol)
+    assert my_solver.stats.n_solves == 0
+
+
+def test_checkpoint_without_rows(tmp_path):
+    time_int = np.linspace(0, 1e-12, 21)
+    path = str(tmp_path / 'run.npz')
+    ODE_int_solver(1500, get_rxn()).solve_checkpointed(time_int, path)
+    os.remove(path + '.rows.npy')
+    with pytest.raises(ChemKinError):
+        ODE_int_solver(1500, get_rxn()).solve_checkpointed(time_int, path)
+
+
+def test_checkpoint_of_another_run(tmp_path):
+    time_int = np.linspace(0, 1e-12, 21)
+    path = str(tmp_path / 'run.npz')
+    ODE_int_solver(1500, get_rxn()).solve_checkpointed(time_int, path)
+
+    with pytest.raises(ChemKinError):
+        ODE_int_solver(1600, get_rxn(T=1600)).solve_checkpointed(time_int, path)
+    with pytest.raises(ChemKinError):
+        ODE_int_solver(1500, get_rxn(xi=[1.] * 8)).solve_checkpointed(time_int, path)
+
+
+def test_sweep_resumes_unfinished_temperatures(tmp_path):
+    checkpoint_dir = str(tmp_path / 'sweep')
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+    parsed_data_list = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([1500, 2500])
+    assert summary.print_time_to_equilibrium(parsed_data_list[:1], xi, checkpoint_dir=checkpoint_dir) == 0
+    done = os.path.join(checkpoint_dir, 'time_to_equilibrium_1500K.npz')
+    mtime = os.path.getmtime(done)
+
+    assert summary.print_time_to_equilibrium(parsed_data_list, xi, checkpoint_dir=checkpoint_dir) == 0
+    assert os.path.getmtime(done) == mtime
+    assert os.path.exists(os.path.join(checkpoint_dir, 'time_to_equilibrium_2500K.npz'))
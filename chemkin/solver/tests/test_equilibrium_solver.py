@@ -0,0 +1,98 @@
+"""
+Tests for the equilibrium_solver.py module
+"""
+
+import numpy as np
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.solver.equilibrium_solver import EquilibriumSolver
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def get_rxn(xml_name, T, xi):
+    parsed_data = XmlParser(pckg_xml_path(xml_name)).parsed_data_list([T])[0]
+    return ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                         parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+
+
+def test_equilibrium_matches_ODE_solver():
+    """
+    Tests that the direct solution agrees with the end state of the transient.
+    """
+    T = 1500
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+    ode_sol = get_rxn('rxns_reversible', T, xi).species_concentration(T, 1e-6)
+
+    my_solver = EquilibriumSolver(T, get_rxn('rxns_reversible', T, xi))
+    sol = my_solver.solve()
+
+    assert my_solver.method == 'newton'
+    assert np.allclose(sol, ode_sol, rtol=1e-6, atol=1e-12)
+
+
+def test_equilibrium_conserves_atoms_and_balances_rates():
+    T = 900
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+    rxn = get_rxn('rxns_reversible', T, xi)
+    sol = EquilibriumSolver(T, rxn, atol=1e-30).solve()
+
+    # H O OH H2 H2O O2 HO2 H2O2
+    h_atoms = np.array([1, 0, 1, 2, 2, 0, 1, 2])
+    o_atoms = np.array([0, 1, 1, 0, 1, 2, 2, 2])
+    assert np.isclose(np.dot(h_atoms, sol), np.dot(h_atoms, xi))
+    assert np.isclose(np.dot(o_atoms, sol), np.dot(o_atoms, xi))
+    assert all(sol > 0)
+
+    # Every reversible reaction is balanced, including those of trace species
+    eq_rxn = get_rxn('rxns_reversible', T, sol)
+    eq_rxn.progress_rate()
+    assert np.allclose(eq_rxn.f_wi, eq_rxn.b_wi, rtol=1e-6)
+
+
+def test_equilibrium_does_not_modify_rxn():
+    T = 1500
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.]
+    rxn = get_rxn('rxns_reversible', T, xi)
+    EquilibriumSolver(T, rxn).solve()
+    assert rxn.xi == xi
+    assert rxn.rates is None
+
+
+def test_equilibrium_irreversible_uses_ptc():
+    """
+    Irreversible reactions run until a reactant of each reaction is depleted.
+    """
+    T = 1500
+    xi = [2.0, 1.0, 0.5, 1.0, 1.0] # specie concentrations for 'rxns_hw5.xml'
+    rxn = get_rxn('rxns_hw5', T, xi)
+    my_solver = EquilibriumSolver(T, rxn)
+    sol = my_solver.solve()
+
+    assert my_solver.method == 'ptc'
+    assert all(sol >= 0)
+    assert np.allclose(get_rxn('rxns_hw5', T, sol).reaction_rate(), 0, atol=1e-6)
+
+
+def test_equilibrium_guess():
+    T = 2500
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.]
+    cold = EquilibriumSolver(T, get_rxn('rxns_reversible', T, xi))
+    sol = cold.solve()
+    warm = EquilibriumSolver(T, get_rxn('rxns_reversible', T, xi))
+    warm_sol = warm.solve(guess=sol)
+    assert np.allclose(sol, warm_sol)
+    assert warm.n_iter < cold.n_iter
+
+
+def test_equilibrium_no_convergence():
+    T = 1500
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.]
+    my_solver = EquilibriumSolver(T, get_rxn('rxns_reversible', T, xi),
+                                  max_newton_iter=1, max_ptc_iter=1)
+    try:
+        my_solver.solve()
+    except ChemKinError as err:
+        assert type(err) == ChemKinError
+    else:
+        assert False
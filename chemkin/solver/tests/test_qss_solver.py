@@ -0,0 +1,55 @@
+"""
+Tests for the qss_solver.py module
+"""
+
+import numpy as np
+import pytest
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.solver.qss_solver import QSSSolver
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def get_rxn(xi=[1., 1e-6, 1e-3]):
+    # A -> I (slow), I -> P (fast): I is at quasi-steady state I = A * 1e-6
+    return ElementaryRxn([1., 1e6], [0., 0.], xi, [[1., 0., 0.], [0., 1., 0.]],
+                         [[0., 1., 0.], [0., 0., 1.]])
+
+
+def test_QSS_solver_detects_fast_species():
+    my_solver = QSSSolver(300, get_rxn())
+    assert np.allclose(my_solver.lifetimes(), [1., 1e-6, np.inf])
+    assert my_solver.detect_qss_species(1e-3) == [1]
+    assert my_solver.detect_qss_species(1e-9) == []
+
+
+def test_QSS_solver_solve():
+    time_int = np.linspace(0, 5, 51)
+    my_solver = QSSSolver(300, get_rxn())
+    sol, critical_t, overall_critical_t = my_solver.solve(time_int)
+
+    assert my_solver.qss_species is None and my_solver.selected_qss_species == [1]
+    assert sol.shape == (51, 3)
+    assert np.allclose(sol[:, 0], np.exp(-time_int), rtol=1e-4)
+    assert np.allclose(sol[:, 1], 1e-6 * sol[:, 0], rtol=1e-5)
+    assert len(critical_t) == 2 and overall_critical_t > 0
+
+
+def test_QSS_solver_takes_fewer_steps_and_reports_error():
+    time_int = np.linspace(0, 5, 51)
+    full_solver = ODE_int_solver(300, get_rxn())
+    full_sol = full_solver.solve(time_int)[0]
+
+    rxn = get_rxn()
+    my_solver = QSSSolver(300, rxn)
+    assert my_solver.qss_error(time_int) < 1e-4
+    assert list(rxn.xi) == [1., 1e-6, 1e-3]
+
+    sol = my_solver.solve(time_int)[0]
+    assert my_solver.n_steps < full_solver.stats.n_steps
+    assert np.max(np.abs(sol[1:] - full_sol[1:]) / np.abs(full_sol[1:])) < 1e-4
+
+
+def test_QSS_solver_dependent_species():
+    with pytest.raises(ChemKinError):
+        QSSSolver(300, get_rxn(), qss_species=[0, 1, 2]).solve(np.linspace(0, 5, 11))
@@ -0,0 +1,73 @@
+"""
+Tests for the sensitivity.py module
+"""
+
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.solver.sensitivity import SensitivitySolver
+
+
+def get_consecutive_rxn(k1=1., k2=10.):
+    # A -> I -> P, with x_I(t) = k1 / (k2 - k1) * (exp(-k1 t) - exp(-k2 t))
+    return ElementaryRxn([k1, k2], [0., 0.], [1., 0., 0.], [[1., 0., 0.], [0., 1., 0.]],
+                         [[0., 1., 0.], [0., 0., 1.]])
+
+
+def exact_intermediate_sensitivity(t, k1=1., k2=10.):
+    # d x_I(t) / d ln k1 and d x_I(t) / d ln k2
+    e1, e2 = np.exp(-k1 * t), np.exp(-k2 * t)
+    x_I = k1 / (k2 - k1) * (e1 - e2)
+    return np.array([x_I * k2 / (k2 - k1) - k1 ** 2 * t * e1 / (k2 - k1),
+                     -x_I * k2 / (k2 - k1) + k1 * k2 * t * e2 / (k2 - k1)])
+
+
+def test_forward_sensitivity_exact():
+    time_int = np.linspace(0, 1, 51)
+    sol, sens = SensitivitySolver(300, get_consecutive_rxn()).forward(time_int)
+    assert sol.shape == (51, 3) and sens.shape == (51, 3, 2)
+    assert np.allclose(sens[:, 1, :], exact_intermediate_sensitivity(time_int).T, atol=1e-6)
+    # d x_A / d ln k2 = 0, and the total concentration does not depend on k
+    assert np.allclose(sens[:, 0, 1], 0, atol=1e-10)
+    assert np.allclose(np.sum(sens, axis=1), 0, atol=1e-6)
+
+
+def test_adjoint_sensitivity_exact():
+    time_int = np.linspace(0, 1, 51)
+    my_solver = SensitivitySolver(300, get_consecutive_rxn())
+    grad = my_solver.final_concentration_sensitivity(time_int, 1)
+    assert np.allclose(grad, exact_intermediate_sensitivity(1.), rtol=1e-4)
+    assert my_solver.stats.n_solves == 2
+    assert np.allclose(my_solver.adjoint(time_int, lambda x: 2 * x * np.array([0., 1., 0.])),
+                       2 * my_solver.solve(time_int)[0][-1, 1] * grad, rtol=1e-4)
+
+
+def test_adjoint_matches_forward():
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([1500])[0]
+    rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], [2., 1., .5, 1., 1., 1., .5, 1.],
+                        parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    my_solver = SensitivitySolver(1500, rxn)
+    time_int = np.linspace(0, 1e-12, 201)
+    sens = my_solver.forward(time_int)[1]
+    for species in [3, 4]:
+        grad = my_solver.final_concentration_sensitivity(time_int, species)
+        assert grad.shape == (11,)
+        assert np.allclose(grad, sens[-1, species], atol=1e-2 * np.max(np.abs(sens[-1, species])))
+
+
+def test_equilibrium_time_sensitivity_exact():
+    # A <-> B: the progress rate is kf exp(-(kf + kb) t), so t_eq = ln(kf / thresh) / (kf + kb)
+    kf, kb, thresh = 2., 1., 1e-2
+    rxn = ElementaryRxn([kf], [kb], [1., 0.], [[1., 0.]], [[0., 1.]])
+    my_solver = SensitivitySolver(300, rxn, overall_equil_thresh=thresh)
+    t_eq, grad = my_solver.equilibrium_time_sensitivity(np.linspace(0, 5, 101))
+    assert np.isclose(t_eq, np.log(kf / thresh) / (kf + kb))
+    assert np.allclose(grad, (1 - np.log(kf / thresh)) / (kf + kb), rtol=1e-5)
+
+    with pytest.raises(ChemKinError):
+        my_solver.equilibrium_time_sensitivity(np.linspace(0, 1, 11))
+    with pytest.raises(ChemKinError):
+        my_solver.equilibrium_time_sensitivity(np.linspace(0, 5, 11), xi=[1. / 3, 2. / 3])
@@ -0,0 +1,93 @@
+"""
+Tests for the shared-memory transport shared.py
+"""
+
+import os
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.shared import SharedArrays, attached_mechanism, share_mechanism, solve_temperatures
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.]
+TEMPERATURES = [10.0, 900.0, 1500.0, 2000.0, 2500.0]
+TIME_INT = np.linspace(0, 1e-9, 101)
+
+
+@pytest.fixture(scope='module')
+def mech():
+    return CompiledMechanism.from_parser(XmlParser(pckg_xml_path('rxns_reversible')))
+
+
+def test_shared_arrays_are_attached_read_only():
+    values = np.arange(24.).reshape(4, 6)
+    with SharedArrays.create({'x': values, 'i': np.arange(3)}) as shared:
+        attached = SharedArrays.attach(shared.handle)
+        assert np.array_equal(attached['x'], values)
+        assert np.array_equal(attached['i'], np.arange(3))
+        with pytest.raises(ValueError):
+            attached['x'][0, 0] = 1.0
+        writable = SharedArrays.attach(shared.handle, writable=True)
+        writable['x'][0, 0] = -1.0
+        assert shared['x'][0, 0] == -1.0
+        attached.close()
+        writable.close()
+
+
+def test_mmap_backend(tmpdir):
+    path = str(tmpdir.join('arrays.bin'))
+    with pytest.raises(ChemKinError):
+        SharedArrays.create({'x': np.zeros(3)}, backend='mmap')
+    with SharedArrays.create({'x': np.ones((2, 3))}, backend='mmap', path=path) as shared:
+        attached = SharedArrays.attach(shared.handle)
+        assert np.array_equal(attached['x'], np.ones((2, 3)))
+        attached.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize('name', ['rxns_reversible', 'rxns_falloff'])
+def test_attached_mechanism(name):
+    mech = CompiledMechanism.from_parser(XmlParser(pckg_xml_path(name)))
+    T = np.array(TEMPERATURES)
+    with share_mechanism(mech) as shared, SharedArrays.attach(shared.handle) as attached_shared:
+        # the efficiencies are shared sparse
+        assert 'efficiencies' not in shared.arrays
+        assert len(shared['efficiencies_data']) == mech.efficiencies.nnz
+        attached = attached_mechanism(attached_shared, mech.species, mech.equations)
+        assert (attached.efficiencies != mech.efficiencies).nnz == 0
+        for expected, value in zip(mech.coefficients(T), attached.coefficients(T)):
+            assert np.array_equal(expected, value, equal_nan=True)
+        assert np.array_equal(attached.reaction_rates(T[1:], XI), mech.reaction_rates(T[1:], XI))
+        del attached  # views into the block, dropped before it is closed
+
+
+def test_solve_temperatures(mech):
+    serial = solve_temperatures(mech, TEMPERATURES, XI, TIME_INT, n_workers=1, chunk_size=2)
+    pooled = solve_temperatures(mech, TEMPERATURES, XI, TIME_INT, n_workers=2, chunk_size=2)
+    for expected, value in zip(serial, pooled):
+        assert np.array_equal(expected, value, equal_nan=True)
+
+    # backward coefficients are not defined at 10 K
+    assert np.all(np.isnan(pooled[0][0])) and np.isnan(pooled[2][0])
+    parsed_data_list = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list(TEMPERATURES[1:])
+    for i, parsed_data in enumerate(parsed_data_list, 1):
+        rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], XI,
+                            parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+        sol, critical_t, overall_critical_t = ODE_int_solver(TEMPERATURES[i], rxn).solve(TIME_INT)
+        assert np.allclose(pooled[0][i], sol)
+        assert pooled[0][i].shape == (len(TIME_INT), len(XI))
+
+
+def test_solve_temperatures_into_mmap_file(mech, tmpdir):
+    path = str(tmpdir.join('sol.bin'))
+    sol, critical_t, overall_critical_t = solve_temperatures(mech, TEMPERATURES, XI, TIME_INT, n_workers=2,
+                                                             backend='mmap', path=path)
+    assert os.path.exists(path)
+    expected = solve_temperatures(mech, TEMPERATURES, XI, TIME_INT, n_workers=1)
+    assert np.array_equal(sol, expected[0], equal_nan=True)
+    assert not sol.flags.writeable
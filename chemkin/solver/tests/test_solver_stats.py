@@ -0,0 +1,52 @@
+"""
+Tests for the solver_stats.py module
+"""
+
+import numpy as np
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.solver_stats import SolverStats
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def get_rxn():
+    return ElementaryRxn([1., 1e6], [0., 0.], [1., 1e-6, 1e-3], [[1., 0., 0.], [0., 1., 0.]],
+                         [[0., 1., 0.], [0., 0., 1.]])
+
+
+def test_solve_records_stats():
+    time_int = np.linspace(0, 5, 51)
+    my_solver = ODE_int_solver(300, get_rxn())
+    sol, _, _, stats = my_solver.solve(time_int, full_output=True)
+
+    assert stats is my_solver.stats
+    assert sol.shape == (51, 3)
+    assert stats.n_steps > 0 and stats.n_rhs >= stats.n_steps
+    assert stats.n_lu == stats.n_jac > 0
+    assert stats.n_rejected is None
+    assert 0 < stats.min_step <= stats.max_step
+    assert np.isclose(stats.mean_step * stats.n_steps, 5)
+    assert stats.n_method_switches >= 0
+    assert 0 < stats.rhs_time < stats.wall_time
+    assert np.isclose(stats.overhead_time, stats.wall_time - stats.rhs_time)
+
+
+def test_solve_without_full_output():
+    my_solver = ODE_int_solver(300, get_rxn())
+    assert len(my_solver.solve(np.linspace(0, 5, 11))) == 3
+    assert isinstance(my_solver.stats, SolverStats)
+
+
+def test_aggregate():
+    a = SolverStats(n_rhs=10, n_jac=2, n_lu=2, n_steps=4, min_step=.1, mean_step=.5,
+                    max_step=1., n_method_switches=1, wall_time=2., rhs_time=1.)
+    b = SolverStats(n_rhs=20, n_jac=3, n_lu=3, n_steps=6, n_rejected=1, min_step=.2,
+                    mean_step=1., max_step=2., wall_time=1., rhs_time=.5)
+    total = SolverStats.aggregate([a, b])
+
+    assert (total.n_solves, total.n_rhs, total.n_jac, total.n_lu, total.n_steps) == (2, 30, 5, 5, 10)
+    assert total.n_rejected is None
+    assert (total.min_step, total.max_step) == (.1, 2.)
+    assert np.isclose(total.mean_step, .8)
+    assert total.n_method_switches == 1
+    assert np.isclose(total.overhead_time, 1.5)
+    assert 'n_solves=2' in repr(total)
@@ -0,0 +1,45 @@
+"""
+Tests for the sweep.py module
+"""
+
+import numpy as np
+from chemkin import pckg_xml_path
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.solver.sweep import EquilibriumSweep
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+
+
+def test_sweep_matches_cold_solves_with_fewer_iterations():
+    Ti = np.linspace(1500, 1600, 21)[::-1] # in any order
+    parsed_data_list = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list(Ti)
+    warm = EquilibriumSweep(parsed_data_list, XI)
+    cold = EquilibriumSweep(parsed_data_list, XI, warm_start=False)
+    warm_sols, cold_sols = warm.solve(), cold.solve()
+
+    for parsed_data, warm_sol, cold_sol in zip(parsed_data_list, warm_sols, cold_sols):
+        rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], XI,
+                            parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+        assert np.allclose(warm_sol, cold_sol, rtol=1e-6, atol=1e-20)
+        assert np.allclose(warm_sol, rxn.equilibrium_concentration(parsed_data['T']),
+                           rtol=1e-6, atol=1e-20)
+    assert sum(warm.n_iter) < sum(cold.n_iter) / 2
+    # the coldest temperature starts the sweep without a guess
+    assert warm.n_iter[-1] == cold.n_iter[-1]
+
+
+def test_sweep_skips_undefined_temperatures():
+    parsed_data_list = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([1500, 10, 1510])
+    my_sweep = EquilibriumSweep(parsed_data_list, XI)
+    sols = my_sweep.solve()
+    assert sols[1] is None and my_sweep.n_iter[1] == 0 and my_sweep.methods[1] is None
+    assert sols[0].shape == sols[2].shape == (8,)
+
+
+def test_sweep_predictor():
+    previous = [(1000., np.log([1., 2.])), (1010., np.log([2., 2.]))]
+    assert EquilibriumSweep._predict([], 1000.) is None
+    assert np.allclose(EquilibriumSweep._predict(previous[:1], 1010.), [1., 2.])
+    assert np.allclose(EquilibriumSweep._predict(previous, 1020.), [4., 2.])
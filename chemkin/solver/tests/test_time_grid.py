@@ -0,0 +1,51 @@
+"""
+Tests for the time_grid.py module
+"""
+
+import numpy as np
+import pytest
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.solver.time_grid import OutputSelector, log_grid, output_grid
+
+
+def test_log_grid_spaces_decades_evenly():
+    time_steps = log_grid(1e2, 16, 1e-12)
+    assert time_steps[0] == 0
+    assert np.allclose(np.diff(np.log10(time_steps[1:])), 1)
+    assert time_steps[-1] == 1e2
+
+def test_log_grid_rejects_start_after_end():
+    with pytest.raises(ChemKinError):
+        log_grid(1.0, 10, 2.0)
+
+def test_output_grid_unknown():
+    with pytest.raises(ChemKinError):
+        output_grid('cubic', 1.0, 10)
+
+def test_species_concentration_evolution_on_log_grid():
+    rxn = ElementaryRxn([1.0], [0.0], [1.0, 0.5], [[1, 0]], [[0, 1]])
+    time_steps = log_grid(10.0, 41, 1e-3)
+    sol = rxn.species_concentration_evolution(300, 10.0, 41, grid='log', start_t=1e-3)
+    assert np.allclose(sol[:, 0], np.exp(-time_steps), rtol=1e-4)
+
+def test_output_selector_caps_points():
+    selector = OutputSelector('steps', max_points=100)
+    for t in range(10000):
+        selector.append(float(t), [t])
+        assert len(selector._t) < 200
+    time_steps, states = selector.finish()
+    assert len(time_steps) == 100 and time_steps[0] == 0 and time_steps[-1] == 9999
+    assert np.array_equal(states[:, 0], time_steps)
+
+def test_output_selector_unknown_grid():
+    with pytest.raises(ChemKinError):
+        OutputSelector('log')
+
+def test_species_concentration_evolution_on_adaptive_grid():
+    rxn = ElementaryRxn([1.0], [0.0], [1.0, 0.5], [[1, 0]], [[0, 1]])
+    time_steps, sol = rxn.species_concentration_evolution(300, 10.0, 1000, grid='adaptive', return_time=True)
+    assert len(time_steps) == len(sol) < 1000
+    assert np.allclose(sol[:, 0], np.exp(-time_steps), atol=1e-5)
+    with pytest.raises(ChemKinError):
+        rxn.time_to_equilibrium(300, grid='steps', checkpoint_path='unused.npz')
@@ -0,0 +1,72 @@
+"""
+Tests for the trajectory.py module and ODE_int_solver.solve_streaming()
+"""
+
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.qss_solver import QSSSolver
+from chemkin.solver.trajectory import Trajectory, TrajectoryWriter
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def get_rxn(T=1500, xi=[2., 1., .5, 1., 1., 1., .5, 1.]):
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([T])[0]
+    return ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                         parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+
+
+def test_writer_and_lazy_reads(tmp_path):
+    path = str(tmp_path / 'traj')
+    writer = TrajectoryWriter(path, np.arange(5.), 2)
+    writer.append([[0., 1.], [2., 3.]])
+    assert len(Trajectory(path)) == 2  # partly written trajectories can be read
+
+    writer.append([[4., 5.], [6., 7.], [8., 9.]])
+    with pytest.raises(ChemKinError):
+        writer.append([[0., 0.]])
+    writer.close()
+
+    traj = Trajectory(path)
+    assert traj.shape == (5, 2)
+    assert np.array_equal(traj.t, np.arange(5.))
+    assert np.array_equal(traj[-1], [8., 9.])
+    assert np.array_equal(traj[::2, 1], [1., 5., 9.])
+    assert np.array_equal(traj[traj.t > 2.5], [[6., 7.], [8., 9.]])
+    chunks = list(traj.iter_chunks(2))
+    assert [len(t) for t, _ in chunks] == [2, 2, 1]
+    assert np.array_equal(np.vstack([x for _, x in chunks]), traj[:])
+
+
+def test_no_trajectory(tmp_path):
+    with pytest.raises(ChemKinError):
+        Trajectory(str(tmp_path / 'missing'))
+
+
+def test_solve_streaming_matches_solve(tmp_path):
+    time_int = np.linspace(0, 1e-12, 101)
+    sol, critical_t, _ = ODE_int_solver(1500, get_rxn()).solve(time_int)
+
+    my_solver = ODE_int_solver(1500, get_rxn())
+    traj, streamed_critical_t, _ = my_solver.solve_streaming(time_int, str(tmp_path / 'traj'),
+                                                             chunk_size=30)
+    assert traj.shape == sol.shape
+    assert np.array_equal(traj.t, time_int)
+    assert np.allclose(traj[:], sol, rtol=1e-5, atol=1e-8)
+    assert my_solver.stats.n_solves == 4
+    assert len(streamed_critical_t) == len(critical_t)
+
+
+def test_solve_streaming_qss_and_rxn(tmp_path):
+    rxn = ElementaryRxn([1., 1e6], [0., 0.], [1., 1e-6, 1e-3], [[1., 0., 0.], [0., 1., 0.]],
+                        [[0., 1., 0.], [0., 0., 1.]])
+    traj, _, _ = QSSSolver(300, rxn, qss_species=[1]).solve_streaming(
+          np.linspace(0, 5, 51), str(tmp_path / 'qss'), chunk_size=7)
+    assert np.allclose(traj[:, 0], np.exp(-np.linspace(0, 5, 51)), rtol=1e-4)
+
+    traj = get_rxn().species_concentration_evolution(1500, 1e-12, path=str(tmp_path / 'rxn'),
+                                                     chunk_size=50)
+    assert isinstance(traj, Trajectory) and traj.shape == (101, 8)
@@ -0,0 +1,144 @@
+"""
+Contains the output time grids over which the solvers report species
+concentrations: grids fixed in advance ('linear', 'log'), and class
+OutputSelector to select output times among the accepted steps of an
+integration ('steps', 'adaptive').
+"""
+import numpy as np
+from chemkin.chemkin_errors import ChemKinError
+
+OUTPUT_GRIDS = ('linear', 'log', 'steps', 'adaptive')
+STEP_GRIDS = ('steps', 'adaptive')
+
+# Largest number of steps the adaptive selection skips in a row.
+_MAX_SKIPPED = 100
+
+
+def linear_grid (end_t, n_steps):
+    """Returns n_steps evenly spaced times from 0 to end_t.
+
+    >>> linear_grid(1.0, 3)
+    array([0. , 0.5, 1. ])
+    """
+    return np.linspace(0, end_t, n_steps)
+
+
+def log_grid (end_t, n_steps, start_t=None):
+    """Returns 0 followed by n_steps - 1 logarithmically spaced times from
+    start_t (default: end_t * 1e-9) to end_t, so that every decade of time
+    gets the same number of output points.
+
+    >>> log_grid(1.0, 4, 1e-2)
+    array([0.  , 0.01, 0.1 , 1.  ])
+    """
+    if start_t is None:
+        start_t = end_t * 1e-9
+    if not 0 < start_t < end_t:
+        raise ChemKinError('log_grid()', 'start_t must be in (0, end_t), got {}.'.format(start_t))
+    return np.concatenate(([0.0], np.logspace(np.log10(start_t), np.log10(end_t), n_steps - 1)))
+
+
+def output_grid (grid, end_t, n_steps, start_t=None):
+    """Returns the output grid grid ('linear' or 'log') from 0 to end_t with
+    n_steps times; start_t is the first nonzero time of 'log' grids. The
+    'steps' and 'adaptive' grids depend on the solution, see OutputSelector.
+    """
+    if grid == 'linear':
+        return linear_grid(end_t, n_steps)
+    if grid == 'log':
+        return log_grid(end_t, n_steps, start_t)
+    if grid in STEP_GRIDS:
+        raise ChemKinError('output_grid()',
+                           'The {} grid is selected while solving, see ODE_int_solver.solve_adaptive().'.format(grid))
+    raise ChemKinError('output_grid()', 'Unknown output grid {}.'.format(grid))
+
+
+class OutputSelector():
+    """Selects the output times of an integration among its accepted steps,
+    which are fed to it one by one with append(), so that the integrator
+    never steps to an output time.
+
+        'steps': every accepted step is kept.
+        'adaptive': a step is kept only when the chord from the last kept
+            point to the current step misses one of the skipped steps by more
+            than rtol times the largest concentration, i.e. where the
+            solution curves. Flat stretches cost a handful of points however
+            many steps they take, fast transients get all they need.
+
+    Either way at most max_points points are kept: whenever 2 * max_points
+    have been selected, every other one is dropped, and the result is thinned
+    evenly to max_points at the end. The first and last steps are always
+    kept, and memory stays bounded by the cap.
+
+    >>> selector = OutputSelector('adaptive', max_points=10, rtol=1e-3)
+    >>> for t in np.linspace(0, 2, 201):
+    ...     selector.append(t, [min(t, 1.0)])
+    >>> selector.finish()[0]
+    array([0., 1., 2.])
+
+    Attributes:
+        grid (str): 'steps' or 'adaptive'.
+        max_points (int): Largest number of output times.
+        rtol (float): Tolerance of the adaptive selection.
+        transform (function): Maps the integrated state to concentrations
+            before the adaptive test (e.g. np.exp when log-concentrations are
+            integrated); the identity by default.
+    """
+
+    def __init__ (self, grid='adaptive', max_points=1000, rtol=1e-3):
+        if grid not in STEP_GRIDS:
+            raise ChemKinError('OutputSelector()', 'Unknown step output grid {}.'.format(grid))
+        if max_points < 2:
+            raise ChemKinError('OutputSelector()', 'max_points must be at least 2.')
+        self.grid = grid
+        self.max_points = max_points
+        self.rtol = rtol
+        self.transform = None
+        self._t = []
+        self._y = []
+        self._skipped = []
+
+    def append (self, t, y):
+        """Offers the state y at the accepted step t."""
+        y = np.array(y, dtype=float)
+        if not self._t or self.grid == 'steps':
+            self._keep(t, y)
+            return
+        self._skipped.append((t, y))
+        if len(self._skipped) < 2:
+            return
+        if len(self._skipped) > _MAX_SKIPPED or self._misses_chord():
+            self._keep(*self._skipped[-2])
+            self._skipped = self._skipped[-1:]
+
+    def finish (self):
+        """Returns the selected times and states (numpy arrays), the last
+        step included.
+        """
+        if self._skipped:
+            self._keep(*self._skipped[-1])
+            self._skipped = []
+        self._thin(self.max_points)
+        return np.array(self._t), np.array(self._y)
+
+    def _misses_chord (self):
+        x = self.transform or (lambda y: y)
+        t_0, x_0 = self._t[-1], x(self._y[-1])
+        t_1, x_1 = self._skipped[-1][0], x(self._skipped[-1][1])
+        t_s = np.array([t for t, _ in self._skipped[:-1]])
+        x_s = x(np.array([y for _, y in self._skipped[:-1]]))
+        chord = x_0 + np.outer((t_s - t_0) / (t_1 - t_0), x_1 - x_0)
+        scale = max(np.max(np.abs(x_0)), np.max(np.abs(x_1)), np.finfo(float).tiny)
+        return np.max(np.abs(x_s - chord)) > self.rtol * scale
+
+    def _keep (self, t, y):
+        self._t.append(t)
+        self._y.append(y)
+        if len(self._t) >= 2 * self.max_points:
+            self._thin(self.max_points)
+
+    def _thin (self, n_points):
+        if len(self._t) > n_points:
+            idx = np.unique(np.round(np.linspace(0, len(self._t) - 1, n_points)).astype(int))
+            self._t = [self._t[i] for i in idx]
+            self._y = [self._y[i] for i in idx]
@@ -0,0 +1,100 @@
+"""
+Contains class Trajectory, a lazy handle to species concentrations stored on
+disk, and class TrajectoryWriter to store them chunk by chunk.
+"""
+import json
+import os
+import numpy as np
+from chemkin.chemkin_errors import ChemKinError
+
+
+_META = 'meta.json'
+_TIME = 't.npy'
+_CONC = 'x.npy'
+
+
+class TrajectoryWriter():
+    """Stores a trajectory in the directory path, one chunk of rows at a time.
+
+    The directory holds the time index t.npy, the concentrations x.npy (shape
+    (len(time_int), n_species)), both memory-mapped, and meta.json recording
+    how many rows have been written so far, so that a partly written
+    trajectory can already be read by Trajectory.
+
+    Attributes:
+        path (str): Directory of the trajectory.
+        n_written (int): Number of rows written so far.
+    """
+
+    def __init__ (self, path, time_int, n_species):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.n_written = 0
+        t = np.lib.format.open_memmap(os.path.join(path, _TIME), mode='w+',
+                                      dtype=float, shape=(len(time_int),))
+        t[:] = time_int
+        t.flush()
+        del t
+        self._x = np.lib.format.open_memmap(os.path.join(path, _CONC), mode='w+',
+                                            dtype=float, shape=(len(time_int), n_species))
+        self._write_meta()
+
+    def append (self, rows):
+        """Writes rows (shape (n, n_species)) after the rows already written."""
+        rows = np.atleast_2d(rows)
+        if self.n_written + len(rows) > len(self._x):
+            raise ChemKinError('TrajectoryWriter.append()',
+                               'More rows than time steps in the trajectory.')
+        self._x[self.n_written:self.n_written + len(rows)] = rows
+        self._x.flush()
+        self.n_written += len(rows)
+        self._write_meta()
+
+    def close (self):
+        self._x.flush()
+        self._x = None
+
+    def _write_meta (self):
+        # Write then rename, so that readers never see a partial file.
+        tmp_path = os.path.join(self.path, _META + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'n_written': self.n_written}, f)
+        os.replace(tmp_path, os.path.join(self.path, _META))
+
+
+class Trajectory():
+    """Lazy, read-only handle to a trajectory stored by TrajectoryWriter.
+
+    Indexing reads only the requested rows and columns from disk, e.g.
+    traj[-1] (last state), traj[::100, 3] (every 100th value of species 3) or
+    traj[traj.t < 1e-9].
+
+    Attributes:
+        path (str): Directory of the trajectory.
+        t (numpy memmap): Time of every row written.
+        shape (tuple of int): (number of rows written, number of species).
+    """
+
+    def __init__ (self, path):
+        if not os.path.exists(os.path.join(path, _META)):
+            raise ChemKinError('Trajectory()', 'No trajectory found at {}.'.format(path))
+        self.path = path
+        with open(os.path.join(path, _META)) as f:
+            n_written = json.load(f)['n_written']
+        self.t = np.load(os.path.join(path, _TIME), mmap_mode='r')[:n_written]
+        self._x = np.load(os.path.join(path, _CONC), mmap_mode='r')[:n_written]
+        self.shape = self._x.shape
+
+    def __len__ (self):
+        return self.shape[0]
+
+    def __repr__ (self):
+        return 'Trajectory(path={}, shape={})'.format(self.path, self.shape)
+
+    def __getitem__ (self, key):
+        return np.array(self._x[key])
+
+    def iter_chunks (self, chunk_size=10000):
+        """Yields (t, x) chunks of at most chunk_size rows, in order."""
+        for start in range(0, len(self), chunk_size):
+            yield np.array(self.t[start:start + chunk_size]), self[start:start + chunk_size]
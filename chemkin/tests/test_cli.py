@@ -0,0 +1,71 @@
+"""
+Tests for the command-line runner cli.py
+"""
+
+import csv
+import io
+import json
+import numpy as np
+import pytest
+from chemkin import cli, pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+XI = ['2', '1', '.5', '1', '1', '1', '.5', '1']
+SPECIES = ['H', 'O', 'OH', 'H2', 'H2O', 'O2', 'HO2', 'H2O2']
+
+
+def read_csv(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_iter_temperatures():
+    assert list(cli.iter_temperatures(['900', '1000:1300:150'])) == [900.0, 1000.0, 1150.0, 1300.0]
+    with pytest.raises(ChemKinError):
+        list(cli.iter_temperatures(['1000:900']))
+
+
+def test_main_streams_csv_rows(capsys):
+    assert cli.main(['rxns_reversible', '-T', '10', '1500:2500:1000', '--xi'] + XI) == 0
+    rows = read_csv(capsys.readouterr().out)
+    assert [(row['T'], row['status']) for row in rows] == [('10.0', 'undefined'), ('1500.0', 'ok'), ('2500.0', 'ok')]
+    assert rows[0]['rate_H'] == ''
+
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([2500])[0]
+    rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], [float(x) for x in XI],
+                        parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    assert np.allclose([float(rows[2]['rate_' + s]) for s in SPECIES], rxn.reaction_rate())
+    assert np.allclose([float(rows[2]['conc_' + s]) for s in SPECIES], rxn.species_concentration(2500, 1e-12))
+
+
+def test_main_jsonl_in_worker_processes(capsys):
+    argv = ['rxns_reversible', '-T', '1000:2000:250', '--xi'] + XI + ['-q', 'rates', 'stats', 'equilibrium',
+                                                                      '-f', 'jsonl', '--chunk-size', '1']
+    assert cli.main(argv) == 0
+    serial = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert cli.main(argv + ['-j', '2']) == 0
+    parallel = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row['T'] for row in parallel] == [1000.0, 1250.0, 1500.0, 1750.0, 2000.0]
+    for row_s, row_p in zip(serial, parallel):
+        assert row_p['rate_H'] == row_s['rate_H'] and row_p['n_steps'] == row_s['n_steps']
+        assert 't_eq_overall' in row_p and 'conc_H' not in row_p
+
+
+def test_main_initial_state_files(tmp_path, capsys):
+    (tmp_path / 'lean.json').write_text(json.dumps({'H2': 1.0, 'O2': 2.0}))
+    (tmp_path / 'rich.txt').write_text('# rich mixture\nH2, 2.0\nO2 1.0\n')
+    output = tmp_path / 'out.csv'
+    assert cli.main(['rxns_reversible', '-T', '1500', '--initial', str(tmp_path / 'lean.json'),
+                     str(tmp_path / 'rich.txt'), '-q', 'concentrations', '--positivity', 'clip',
+                     '-o', str(output)]) == 0
+    rows = read_csv(output.read_text())
+    assert [row['state'] for row in rows] == ['lean', 'rich']
+    conc = {s: float(rows[0]['conc_' + s]) for s in SPECIES}
+    n_H = conc['H'] + conc['OH'] + conc['HO2'] + 2 * (conc['H2'] + conc['H2O'] + conc['H2O2'])
+    assert n_H == pytest.approx(2.0, rel=1e-4) # hydrogen atoms of 1.0 H2
+
+    (tmp_path / 'bad.txt').write_text('Xe 1.0\n')
+    assert cli.main(['rxns_reversible', '-T', '1500', '--initial', str(tmp_path / 'bad.txt')]) == 1
+    assert 'Unknown species' in capsys.readouterr().err
@@ -0,0 +1,88 @@
+"""
+Tests for the asyncio solve facade jobs.py
+"""
+
+import asyncio
+import numpy as np
+import pytest
+import chemkin
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.jobs import SolvePool
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.solver.ODEint_solver import ODE_int_solver
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.]
+# 'project' restarts from every projected state of this 1e10 s solve at 900 K, for minutes.
+RUNAWAY = dict(T=900.0, xi=np.linspace(0.5, 2, 8), end_t=1e10, n_steps=1001, positivity='project')
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def synchronous_solve(T, xi, time_int):
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([T])[0]
+    rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                        parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    return ODE_int_solver(T, rxn).solve(time_int)
+
+
+def test_submit_solve_matches_synchronous_solve():
+    async def solve():
+        async with SolvePool(max_workers=2) as pool:
+            return await asyncio.gather(*[chemkin.submit_solve('rxns_reversible', T, XI, pool=pool, end_t=1e-9)
+                                          for T in (900.0, 1500.0, 2500.0)]), len(pool._workers)
+
+    results, n_workers = run(solve())
+    assert n_workers == 2
+    for T, (sol, critical_t, overall_critical_t) in zip((900.0, 1500.0, 2500.0), results):
+        expected = synchronous_solve(T, XI, np.linspace(0, 1e-9, 101))
+        assert np.array_equal(sol, expected[0])
+        assert np.array_equal(critical_t, expected[1])
+        assert overall_critical_t == expected[2]
+
+
+def test_timeout_stops_worker_and_streams_progress():
+    async def solve():
+        events = []
+        async with SolvePool(max_workers=1, progress_every=0.05) as pool:
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.submit_solve('rxns_reversible', progress=events.append, timeout=1.0, **RUNAWAY)
+            worker, = pool._workers
+            # the worker stopped cooperatively and runs the next solve
+            sol = (await pool.submit_solve('rxns_reversible', 1500.0, XI, end_t=1e-9))[0]
+            assert pool._workers == {worker}
+        return events, sol
+
+    events, sol = run(solve())
+    assert len(events) > 5
+    assert all(later.t >= earlier.t and later.n_rhs > earlier.n_rhs for earlier, later in zip(events, events[1:]))
+    assert np.array_equal(sol, synchronous_solve(1500.0, XI, np.linspace(0, 1e-9, 101))[0])
+
+
+def test_cancel_terminates_unresponsive_worker():
+    async def solve():
+        # the worker only checks for cancellation every 100 s, so it is terminated after grace
+        async with SolvePool(max_workers=1, progress_every=100, grace=0.2) as pool:
+            task = asyncio.ensure_future(pool.submit_solve('rxns_reversible', **RUNAWAY))
+            await asyncio.sleep(0.5)
+            worker = next(iter(pool._workers))
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert not worker.alive and not pool._workers
+            return await pool.submit_solve('rxns_reversible', 1500.0, XI, end_t=1e-9)
+
+    assert len(run(solve())) == 3
+
+
+def test_solve_errors_are_raised():
+    async def solve():
+        async with SolvePool(max_workers=1) as pool:
+            await pool.submit_solve('rxns_reversible', 10.0, XI)
+
+    with pytest.raises(ChemKinError, match='not defined'):
+        run(solve())
@@ -0,0 +1,75 @@
+"""
+Tests for the profiling.py module
+"""
+
+import json
+import numpy as np
+import pytest
+from chemkin import pckg_xml_path, profiling
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+
+
+def run_pipeline():
+    parsed_data = XmlParser(pckg_xml_path('rxns_reversible')).parsed_data_list([1500])[0]
+    xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+    rxn = ElementaryRxn(parsed_data['ki'], parsed_data['b_ki'], xi,
+                        parsed_data['sys_vi_p'], parsed_data['sys_vi_dp'])
+    return rxn.species_concentration(1500, 1e-12)
+
+
+def test_spans_off_by_default():
+    assert not profiling.is_enabled()
+    assert profiling.span('stage') is profiling.span('other stage')
+    run_pipeline()
+
+
+def test_memory_sink_covers_pipeline_stages():
+    with profiling.profile_run(profiling.MemorySink()) as sink:
+        run_pipeline()
+
+    assert not profiling.is_enabled()
+    for name in ['XmlParser.load', 'XmlParser.parsed_data_list', 'XmlParser.rate_coefficients',
+                 'BackwardCoefficient.get_backward_coefs', 'ThermoDAO.get_coeffs',
+                 'ThermoDAO.get_species', 'ElementaryRxn.evaluate', 'ODE_int_solver.odeint']:
+        assert sink.count(name) > 0, name
+    assert sink.count('XmlParser.rate_coefficients') == 11
+    summary = sink.summary()
+    assert summary['ODE_int_solver.odeint']['total'] >= summary['ODE_int_solver.odeint']['max'] > 0
+    assert sink.report().splitlines()[0].startswith('Stage')
+
+
+def test_span_records_on_exception_and_nested_runs():
+    outer = profiling.MemorySink()
+    inner = profiling.MemorySink()
+    with profiling.profile_run(outer):
+        with profiling.profile_run(inner):
+            with pytest.raises(ValueError):
+                with profiling.span('failing stage'):
+                    raise ValueError()
+        with profiling.span('outer stage'):
+            pass
+
+    assert inner.count('failing stage') == 1 and inner.count('outer stage') == 0
+    assert outer.count('outer stage') == 1 and outer.count('failing stage') == 0
+
+
+def test_json_lines_sink(tmp_path):
+    path = str(tmp_path / 'spans.jsonl')
+    with profiling.profile_run(profiling.JsonLinesSink(path)) as sink:
+        run_pipeline()
+
+    with open(path) as f:
+        spans = [json.loads(line) for line in f]
+    assert len(spans) == sum(stage['count'] for stage in sink.summary().values())
+    assert set(spans[0]) == {'name', 'start', 'duration'}
+
+
+def test_profile_sink():
+    with profiling.profile_run(profiling.ProfileSink(trace_memory=True)) as sink:
+        sol = run_pipeline()
+
+    assert np.all(np.isfinite(sol))
+    assert sink.peak_memory > 0 and sink.snapshot is not None
+    report = sink.report(n_functions=5)
+    assert 'cumulative' in report and 'Peak traced memory' in report
@@ -2,7 +2,14 @@
 # Tests for chemkin.thermodynamics.thermo module
 ###############################################################################
 
+import os
+import numpy as np
+import pytest
+from chemkin.chemkin_errors import ChemKinError
 from chemkin.thermodynamics.thermo import ThermoDAO
+from chemkin.thermodynamics.thermo_store import ThermoStore, import_nasa7, import_sqlite, iter_nasa7
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 def test_get_coeffs():
 	dao = ThermoDAO('NASA_coef.sqlite')
@@ -18,3 +25,68 @@ def test_get_species():
 	species_low = dao.get_species(999, 'low')
 	assert len(species_high) > 0
 	assert len(species_low) > 0
+
+
+def test_store_backend_matches_sqlite():
+	store, db = ThermoDAO('NASA_coef.thermo'), ThermoDAO('NASA_coef.sqlite')
+	assert store.backend == 'store' and db.backend == 'sqlite'
+	for s in ['H', 'O2', 'H2O2', 'CH4']:
+		assert store.get_coeffs(s, 'low') == db.get_coeffs(s, 'low')
+		assert store.get_coeffs(s, 'high') == db.get_coeffs(s, 'high')
+	species = ['H', 'O', 'OH', 'H2', 'H2O', 'O2', 'HO2', 'H2O2', 'XX']
+	for expected, value in zip(db.get_nasa_arrays(species), store.get_nasa_arrays(species)):
+		assert np.array_equal(expected, value, equal_nan=True)
+	for T in [300, 500, 999, 1001, 1500, 3000]:
+		for temp_range in ['low', 'high']:
+			assert sorted(store.get_species(T, temp_range)) == sorted(set(db.get_species(T, temp_range)))
+
+
+def test_store_keeps_sqlite_ranges():
+	# HCNO, HOCN and HNCO are only in the HIGH table: no low range, so their
+	# backward coefficients stay undefined below 1000 K, as with sqlite
+	store, db = ThermoDAO('NASA_coef.thermo'), ThermoDAO('NASA_coef.sqlite')
+	species = sorted(set(db.get_all_coeffs('low')) | set(db.get_all_coeffs('high')))
+	assert len(species) == 53
+	for expected, value in zip(db.get_nasa_arrays(species), store.get_nasa_arrays(species)):
+		assert np.array_equal(expected, value, equal_nan=True)
+	for s in ['HCNO', 'HOCN', 'HNCO']:
+		assert s not in store.get_species(500, 'low') and s in store.get_species(1500, 'high')
+		assert np.isnan(store.get_nasa_arrays([s])[2][0])
+
+
+def test_import_nasa7(tmpdir):
+	text_path, db_path = str(tmpdir.join('text.thermo')), str(tmpdir.join('db.thermo'))
+	assert import_nasa7(os.path.join(BASE_DIR, 'thermo_all.txt'), text_path) == 53
+	assert import_sqlite(os.path.join(BASE_DIR, 'NASA_coef.sqlite'), db_path) == 53
+	text, db = ThermoStore.open(text_path), ThermoStore.open(db_path)
+	# the sqlite database has no low range for the species of the HIGH table only
+	high_only = ['HCNO', 'HNCO', 'HOCN']
+	species = [s for s in db.species if s not in high_only]
+	rows, db_rows = text.rows(species), db.rows(species)
+	assert np.array_equal(text.coeffs[rows], db.coeffs[db_rows])
+	assert np.array_equal(text.bounds[rows], db.bounds[db_rows])
+	for s in high_only:
+		assert np.array_equal(text.coeffs[text.row(s), 1], db.coeffs[db.row(s), 1])
+		assert np.isnan(db.bounds[db.row(s), 0]) and np.all(np.isnan(db.coeffs[db.row(s), 0]))
+	# T_mid of HCNO is not the default 1000 K
+	assert list(text.bounds[text.row('HCNO')]) == [300.0, 1382.0, 5000.0]
+	with pytest.raises(KeyError):
+		text.row('H2O22')
+	assert 'H2O2' in text and 'H2O22' not in text
+	text.close()
+	db.close()
+
+
+def test_iter_nasa7_defaults_and_errors():
+	record = [
+		'H2                TPIS78H   2               G                               1\n',
+		' 3.33727920E+00-4.94024731E-05 4.99456778E-07-1.79566394E-10 2.00255376E-14    2\n',
+		'-9.50158922E+02-3.20502331E+00 2.34433112E+00 7.98052075E-03-1.94781510E-05    3\n',
+		' 2.01572094E-08-7.37611761E-12-9.17935173E+02 6.83010238E-01                   4\n']
+	(name, coeffs, bounds), = iter_nasa7(['THERMO ALL\n', '   300.000  1000.000  5000.000\n'] + record + ['END\n'])
+	assert name == 'H2' and bounds == [300.0, 1000.0, 5000.0]
+	assert coeffs[1][0] == 3.33727920 and coeffs[0][0] == 2.34433112
+	with pytest.raises(ChemKinError):
+		list(iter_nasa7(record[:2]))
+	with pytest.raises(ChemKinError):
+		ThermoStore.open(os.path.join(BASE_DIR, 'thermo_all.txt'))
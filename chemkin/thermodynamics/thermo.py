@@ -1,16 +1,38 @@
 import os.path
 import sqlite3
+import numpy as np
+from chemkin import profiling
+from chemkin.thermodynamics.thermo_store import ThermoStore
+
+SQLITE_EXTS = ('.sqlite', '.sqlite3', '.db')
 
 
 class ThermoDAO():
-    """ Database Access Object for thermodynanmics
+    """ Database Access Object for thermodynanmics, backed by a compiled thermo store
+    (see thermo_store) or, for .sqlite and .db files, by the LOW and HIGH tables of a
+    sqlite database
     """
 
-    def __init__ (self, db_name):
+    def __init__ (self, db_name, backend=None):
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
         self.db_path = os.path.join(BASE_DIR, db_name)
+        if backend is None:
+            backend = 'sqlite' if os.path.splitext(db_name)[1] in SQLITE_EXTS else 'store'
+        self.backend = backend
+        self._store = None
+
+    @property
+    def store (self):
+        """ The ThermoStore of the 'store' backend, opened on first use
+        """
+        if self._store is None:
+            self._store = ThermoStore.open(self.db_path)
+        return self._store
 
+    @profiling.timed('ThermoDAO.get_coeffs')
     def get_coeffs (self, species_name, temp_range):
+        if self.backend == 'store':
+            return self.store.get_coeffs(species_name, temp_range)
         db = sqlite3.connect(self.db_path)
         cursor = db.cursor()
         query = '''SELECT COEFF_1, COEFF_2, COEFF_3, COEFF_4, COEFF_5, COEFF_6, COEFF_7
@@ -21,7 +43,10 @@ class ThermoDAO():
         db.close()
         return coeffs
 
+    @profiling.timed('ThermoDAO.get_species')
     def get_species(self, temp, temp_range):
+        if self.backend == 'store':
+            return self.store.get_species(temp, temp_range)
         db = sqlite3.connect(self.db_path)
         cursor = db.cursor()
         if temp_range == 'low': # temp_range == 'low'
@@ -35,6 +60,37 @@ class ThermoDAO():
         db.close()
         return species
 
+    @profiling.timed('ThermoDAO.get_all_coeffs')
+    def get_all_coeffs (self, temp_range):
+        """ Returns a dictionary mapping every species of temp_range ('low' or 'high') to its
+        (TLOW, THIGH, [COEFF_1, ..., COEFF_7]), in one query
+        """
+        if self.backend == 'store':
+            return self.store.get_all_coeffs(temp_range)
+        db = sqlite3.connect(self.db_path)
+        cursor = db.cursor()
+        query = '''SELECT SPECIES_NAME, TLOW, THIGH, COEFF_1, COEFF_2, COEFF_3, COEFF_4, COEFF_5, COEFF_6, COEFF_7
+                    FROM {}'''.format(temp_range.upper())
+        coeffs = {}
+        for row in cursor.execute(query).fetchall():
+            coeffs[row[0]] = (row[1], row[2], list(row[3:]))
+        db.close()
+        return coeffs
+
+    @profiling.timed('ThermoDAO.get_nasa_arrays')
+    def get_nasa_arrays (self, species):
+        """ Returns (nasa_low, nasa_high, t_low, t_high) of the species, arrays of shapes
+        (n, 7), (n, 7), (n,) and (n,), NaN for species not in the database
+        """
+        if self.backend == 'store':
+            return self.store.get_nasa_arrays(species)
+        low, high = self.get_all_coeffs('low'), self.get_all_coeffs('high')
+        missing = (np.nan, np.nan, [np.nan] * 7)
+        return (np.array([low.get(s, missing)[2] for s in species], dtype=float).reshape(-1, 7),
+                np.array([high.get(s, missing)[2] for s in species], dtype=float).reshape(-1, 7),
+                np.array([low.get(s, missing)[0] for s in species], dtype=float),
+                np.array([high.get(s, missing)[1] for s in species], dtype=float))
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod(verbose=True)
\ No newline at end of file
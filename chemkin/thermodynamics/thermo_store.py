@@ -0,0 +1,297 @@
+"""
+Contains the compiled thermo store: class ThermoStore memory-maps a binary
+file of NASA-7 polynomials, and import_nasa7() and import_sqlite() build one
+from NASA-7 text (e.g. thermo_all.txt) or from the tables of a sqlite
+database (e.g. NASA_coef.sqlite).
+
+The file holds, after a 64-byte header (magic, number of species, width of
+the names):
+
+    coeffs   float64 (n_species, 2, 7)   low, high range coefficients
+    bounds   float64 (n_species, 3)      T_low, T_mid, T_high
+    order    int64   (n_species,)        rows sorted by name
+    names    bytes   (n_species,)        species names, fixed width
+
+Opening a store only maps the file and reads the header, whatever the number
+of species; species are looked up by binary search over the sorted names. A
+range missing from the source has NaN coefficients and bound.
+"""
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+
+import numpy as np
+
+from chemkin.chemkin_errors import ChemKinError
+
+MAGIC = b'CKTHERM1'
+THERMO_STORE_EXT = '.thermo'
+
+_HEADER = struct.Struct('<8sqq')
+_HEADER_SIZE = 64
+
+
+class ThermoStore():
+    """Read-only, memory-mapped NASA-7 coefficients of many species.
+
+        store = ThermoStore.open('NASA_coef.thermo')
+        coeffs, bounds = store.coeffs, store.bounds     # (n, 2, 7), (n, 3)
+        rows = store.rows(['H2', 'O2'])
+
+    Attributes:
+        path (str): File of the store.
+        coeffs (numpy array, shape (n_species, 2, 7)): Coefficients of the
+            low ([:, 0]) and high ([:, 1]) temperature ranges.
+        bounds (numpy array, shape (n_species, 3)): T_low, T_mid and T_high
+            of each species; the low range is T_low to T_mid, the high range
+            T_mid to T_high.
+    """
+
+    def __init__ (self, path, buffer):
+        self.path = path
+        self._buffer = buffer
+        magic, n, width = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ChemKinError('ThermoStore.open()', '{} is not a thermo store.'.format(path))
+        offset = _HEADER_SIZE
+        self.coeffs = np.frombuffer(buffer, dtype='<f8', count=n * 14, offset=offset).reshape(n, 2, 7)
+        offset += n * 14 * 8
+        self.bounds = np.frombuffer(buffer, dtype='<f8', count=n * 3, offset=offset).reshape(n, 3)
+        offset += n * 3 * 8
+        self._order = np.frombuffer(buffer, dtype='<i8', count=n, offset=offset)
+        offset += n * 8
+        self._names = np.frombuffer(buffer, dtype='S{}'.format(max(width, 1)), count=n, offset=offset)
+        self._sorted_names = None
+
+    @classmethod
+    def open (cls, path):
+        """Returns the ThermoStore of the file path."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, buffer)
+
+    def __len__ (self):
+        return len(self._names)
+
+    def __contains__ (self, name):
+        try:
+            self.row(name)
+        except KeyError:
+            return False
+        return True
+
+    def __repr__ (self):
+        return 'ThermoStore({!r}, n_species={})'.format(self.path, len(self))
+
+    @property
+    def species (self):
+        """Names of the species, in the order of the rows."""
+        return [name.decode() for name in self._names]
+
+    def rows (self, names):
+        """Returns the rows of the species names (list of str), or raises a
+        KeyError naming the first species not in the store.
+        """
+        if self._sorted_names is None:
+            self._sorted_names = self._names[self._order]
+        names = list(names)
+        keys = np.array([name.encode() for name in names], dtype=self._names.dtype)
+        pos = np.searchsorted(self._sorted_names, keys)
+        for name, p, key in zip(names, pos, keys):
+            # keys longer than the names are truncated by their dtype
+            if p == len(self) or self._sorted_names[p] != key or key.decode() != name:
+                raise KeyError(name)
+        return self._order[pos]
+
+    def row (self, name):
+        return int(self.rows([name])[0])
+
+    def get_coeffs (self, species_name, temp_range):
+        """Returns the 7 coefficients of species_name in temp_range ('low' or
+        'high'), as ThermoDAO.get_coeffs().
+        """
+        return self.coeffs[self.row(species_name), _RANGES[temp_range]].tolist()
+
+    def get_species (self, temp, temp_range):
+        """Returns the species whose temp_range starts below temp ('low') or
+        ends above it ('high'), as ThermoDAO.get_species().
+        """
+        if temp_range == 'low':
+            rows = np.flatnonzero(self.bounds[:, 0] < temp)
+        else:
+            rows = np.flatnonzero(self.bounds[:, 2] > temp)
+        return [self._names[i].decode() for i in rows]
+
+    def get_all_coeffs (self, temp_range):
+        """Returns a dictionary mapping every species with a temp_range to its
+        (T_low, T_high, coefficients) in that range, as
+        ThermoDAO.get_all_coeffs().
+        """
+        r = _RANGES[temp_range]
+        coeffs = {}
+        for i in np.flatnonzero(~np.isnan(self.bounds[:, 2 * r])):
+            coeffs[self._names[i].decode()] = (float(self.bounds[i, r]), float(self.bounds[i, r + 1]),
+                                               self.coeffs[i, r].tolist())
+        return coeffs
+
+    def get_nasa_arrays (self, species):
+        """Returns (nasa_low, nasa_high, t_low, t_high) of species, arrays of
+        shapes (n, 7), (n, 7), (n,) and (n,), NaN for species not in the
+        store.
+        """
+        known = [s for s in species if s in self]
+        coeffs = np.full((len(species), 2, 7), np.nan)
+        bounds = np.full((len(species), 3), np.nan)
+        if known:
+            index = [i for i, s in enumerate(species) if s in self]
+            rows = self.rows(known)
+            coeffs[index] = self.coeffs[rows]
+            bounds[index] = self.bounds[rows]
+        return coeffs[:, 0], coeffs[:, 1], bounds[:, 0], bounds[:, 2]
+
+    def close (self):
+        self.coeffs = self.bounds = self._order = self._names = self._sorted_names = None
+        self._buffer.close()
+
+
+_RANGES = {'low': 0, 'high': 1}
+
+
+def write_store (path, records):
+    """Writes the thermo store of records, an iterable of (name, coeffs
+    (2, 7), bounds (3,)), to path. The first record of a species is kept.
+    Writes to a temporary file that replaces path once complete. Returns the
+    number of species.
+    """
+    names, coeffs, bounds = [], [], []
+    seen = set()
+    for name, coeff, bound in records:
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name.encode())
+        coeffs.append(coeff)
+        bounds.append(bound)
+    n = len(names)
+    width = max((len(name) for name in names), default=1)
+    names = np.array(names, dtype='S{}'.format(width))
+    arrays = (np.asarray(coeffs, dtype='<f8').reshape(n, 2, 7), np.asarray(bounds, dtype='<f8').reshape(n, 3),
+              np.argsort(names, kind='stable').astype('<i8'), names)
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, n, width).ljust(_HEADER_SIZE, b'\0'))
+        for values in arrays:
+            f.write(values.tobytes())
+    os.replace(tmp_path, path)
+    return n
+
+
+def _float (field):
+    return float(field.replace('D', 'E').replace('d', 'e'))
+
+
+def iter_nasa7 (lines):
+    """Yields the (name, coeffs (2, 7), bounds (3,)) of every species of the
+    NASA-7 text lines (a file or any iterable of str), one record of 4 lines
+    at a time. The default temperatures of a THERMO header are used where a
+    species leaves its bounds blank.
+    """
+    defaults = [np.nan, 1000.0, np.nan]
+    after_keyword = False
+    lines = iter(lines)
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('!'):
+            continue
+        keyword = stripped.split()[0].upper()
+        if keyword == 'END':
+            return
+        if keyword.startswith('THER'):
+            after_keyword = True
+            continue
+        if after_keyword:
+            after_keyword = False
+            try:
+                # T_low, T_mid, T_high
+                defaults = [_float(field) for field in stripped.split('!')[0].split()[:3]]
+                continue
+            except ValueError:
+                pass
+        if line.rstrip('\r\n')[79:80] != '1' and not stripped.endswith('1'):
+            continue
+        try:
+            fields = [line[45:55], line[65:73], line[55:65]]
+            bounds = [_float(field) if field.strip() else default for field, default in zip(fields, defaults)]
+            body = ''.join([next(lines).rstrip('\r\n')[:75].ljust(75) for _ in range(3)])
+            values = [_float(body[i:i + 15]) for i in range(0, 14 * 15, 15)]
+        except (StopIteration, ValueError) as err:
+            raise ChemKinError('iter_nasa7()', 'Invalid NASA-7 record {!r}: {}'.format(stripped, err))
+        # the high range comes first in NASA-7 records
+        yield stripped.split()[0], [values[7:], values[:7]], bounds
+
+
+def iter_sqlite (db_path):
+    """Yields the (name, coeffs (2, 7), bounds (3,)) of every species of the
+    LOW and HIGH tables of the sqlite database db_path, in order of first
+    appearance, with the ranges the sqlite backend of ThermoDAO reads: the
+    low range from the LOW table, the high range from the HIGH table (the
+    row ending highest, where a species has several). Species of one table
+    only, such as HCNO, HOCN and HNCO, have NaN for the range of the other.
+    """
+    db = sqlite3.connect(db_path)
+    try:
+        ranges = {}
+        for table in ('LOW', 'HIGH'):
+            query = '''SELECT SPECIES_NAME, TLOW, THIGH, COEFF_1, COEFF_2, COEFF_3, COEFF_4, COEFF_5, COEFF_6, COEFF_7
+                        FROM {} ORDER BY id'''.format(table)
+            for row in db.execute(query):
+                ranges.setdefault(row[0], {'LOW': [], 'HIGH': []})[table].append(row[1:])
+    finally:
+        db.close()
+    missing = (np.nan,) * 9
+    for name, tables in ranges.items():
+        low = min(tables['LOW'], key=lambda row: row[0]) if tables['LOW'] else missing
+        high = max(tables['HIGH'], key=lambda row: row[1]) if tables['HIGH'] else missing
+        t_mid = low[1] if tables['LOW'] else high[0]
+        yield name, [low[2:], high[2:]], [low[0], t_mid, high[1]]
+
+
+def import_nasa7 (source, path):
+    """Compiles the NASA-7 text file source into the thermo store path.
+    Returns the number of species.
+    """
+    with open(source) as f:
+        return write_store(path, iter_nasa7(f))
+
+
+def import_sqlite (db_path, path):
+    """Compiles the sqlite database db_path into the thermo store path.
+    Returns the number of species.
+    """
+    return write_store(path, iter_sqlite(db_path))
+
+
+def main (argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chemkin.thermodynamics.thermo_store',
+                                     description='Compile NASA-7 coefficients into a thermo store.')
+    parser.add_argument('source', help='NASA-7 text file, or sqlite database (.sqlite, .db)')
+    parser.add_argument('output', help='thermo store to write (e.g. NASA_coef{})'.format(THERMO_STORE_EXT))
+    args = parser.parse_args(argv)
+    try:
+        if os.path.splitext(args.source)[1] in ('.sqlite', '.sqlite3', '.db'):
+            n = import_sqlite(args.source, args.output)
+        else:
+            n = import_nasa7(args.source, args.output)
+    except (ChemKinError, OSError, sqlite3.Error) as err:
+        print('thermo_store: error: {}'.format(err), file=sys.stderr)
+        return 1
+    print('{} species written to {}'.format(n, args.output), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Contains class ArrheniusSampler to draw perturbed Arrhenius parameters,
+class RunningStats to accumulate summary statistics in constant memory, and
+class ArrheniusUQ to propagate the parameter uncertainty of a mechanism to its
+reaction rates and species concentrations by Monte Carlo sampling.
+"""
+import collections
+import concurrent.futures
+import os
+
+import numpy as np
+from scipy.special import ndtri
+
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import RxnType
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reaction.reaction_coefficients import arrhenius_coefficients, check_float_dtype, \
+    log_arrhenius_coefficients
+from chemkin.solver.ODEint_solver import ODE_int_solver
+from chemkin.solver.shared import SharedArrays
+
+
+class ArrheniusSampler():
+    """Draws perturbed sets of the Arrhenius parameters of a mechanism:
+    log-normal A (ln A normal with standard deviation sigma_lnA), normal b
+    and normal E around their nominal values.
+
+    Samples are drawn batch by batch from a seeded generator; with
+    method='random' the same seed gives the same sequence of samples whatever
+    the batch sizes. With method='lhs' every batch is a Latin hypercube: each parameter's normal
+    quantiles are split into as many equiprobable strata as samples in the
+    batch, with one sample per stratum.
+
+    Attributes:
+        A, b, E (numpy arrays of floats): Nominal parameters of each
+            reaction; constant coefficients have A = k and b = E = 0.
+        sigma_lnA, sigma_b, sigma_E (numpy arrays of floats): Standard
+            deviations of ln A, b and E of each reaction. b and E of constant
+            coefficients are never perturbed.
+        method (str, default 'random'): 'random' or 'lhs'.
+    """
+
+    def __init__ (self, rate_coeffs, sigma_lnA=0.1, sigma_b=0.0, sigma_E=0.0,
+                  seed=None, method='random'):
+        """
+        Args:
+            rate_coeffs (list): RxnData.rate_coeff of each reaction: [A, E],
+                [A, b, E] or k.
+            sigma_lnA, sigma_b, sigma_E (float or list of floats): Standard
+                deviations, for all reactions or for each reaction.
+            seed (int, optional): Seed of the random generator.
+            method (str, default 'random'): 'random' or 'lhs'.
+        """
+        if method not in ('random', 'lhs'):
+            raise ChemKinError('ArrheniusSampler()',
+                               'Unknown sampling method {}.'.format(method))
+        params = []
+        for coeff in rate_coeffs:
+            if isinstance(coeff, list):
+                params.append(coeff if len(coeff) == 3 else [coeff[0], 0.0, coeff[1]])
+            else:
+                params.append([coeff, 0.0, 0.0])
+        self.A, self.b, self.E = np.array(params, dtype=float).T
+        n_rxns = len(params)
+        constant = np.array([not isinstance(coeff, list) for coeff in rate_coeffs])
+        self.sigma_lnA = np.broadcast_to(np.asarray(sigma_lnA, dtype=float), (n_rxns,))
+        self.sigma_b = np.where(constant, 0.0, np.broadcast_to(np.asarray(sigma_b, dtype=float), (n_rxns,)))
+        self.sigma_E = np.where(constant, 0.0, np.broadcast_to(np.asarray(sigma_E, dtype=float), (n_rxns,)))
+        self.method = method
+        self._rng = np.random.default_rng(seed)
+
+    def sample (self, n_samples):
+        """Returns the next n_samples parameter sets as arrays A, b, E of
+        shape (n_samples, number of reactions).
+        """
+        n_rxns = len(self.A)
+        if self.method == 'lhs':
+            strata = np.argsort(self._rng.random((3 * n_rxns, n_samples)), axis=1).T
+            z = ndtri((strata + self._rng.random((n_samples, 3 * n_rxns))) / n_samples)
+        else:
+            z = self._rng.standard_normal((n_samples, 3 * n_rxns))
+        z_lnA, z_b, z_E = z[:, :n_rxns], z[:, n_rxns:2 * n_rxns], z[:, 2 * n_rxns:]
+        return (self.A * np.exp(self.sigma_lnA * z_lnA),
+                self.b + self.sigma_b * z_b,
+                self.E + self.sigma_E * z_E)
+
+    def batches (self, n_samples, batch_size):
+        """Yields (A, b, E) batches of at most batch_size samples, n_samples in
+        total.
+        """
+        for start in range(0, n_samples, batch_size):
+            yield self.sample(min(batch_size, n_samples - start))
+
+
+class RunningStats():
+    """Accumulates the count, mean, variance, min and max of a stream of
+    samples of any shape, batch by batch, in constant memory (parallel
+    variance update of Chan et al.).
+
+    >>> stats = RunningStats()
+    >>> stats.update(np.array([[1., 2.], [3., 4.]]))
+    >>> stats.update(np.array([[5., 6.]]))
+    >>> stats.n, stats.mean, stats.std
+    (3, array([3., 4.]), array([2., 2.]))
+    """
+
+    def __init__ (self):
+        self.n = 0
+        self.mean = None
+        self.min = None
+        self.max = None
+        self._m2 = None
+
+    def update (self, batch):
+        """Adds the samples of batch, stacked along its first axis."""
+        batch = np.asarray(batch, dtype=float)
+        n_batch = len(batch)
+        if n_batch == 0:
+            return
+        mean_batch = np.mean(batch, axis=0)
+        m2_batch = np.sum((batch - mean_batch) ** 2, axis=0)
+        if self.n == 0:
+            self.mean, self._m2 = mean_batch, m2_batch
+            self.min, self.max = np.min(batch, axis=0), np.max(batch, axis=0)
+        else:
+            n = self.n + n_batch
+            delta = mean_batch - self.mean
+            self.mean = self.mean + delta * n_batch / n
+            self._m2 = self._m2 + m2_batch + delta ** 2 * self.n * n_batch / n
+            self.min = np.minimum(self.min, np.min(batch, axis=0))
+            self.max = np.maximum(self.max, np.max(batch, axis=0))
+        self.n += n_batch
+
+    @property
+    def var (self):
+        """Sample variance (n - 1 degrees of freedom)."""
+        if self.n < 2:
+            return None if self.mean is None else np.full_like(self.mean, np.nan)
+        return self._m2 / (self.n - 1)
+
+    @property
+    def std (self):
+        var = self.var
+        return None if var is None else np.sqrt(var)
+
+    def __repr__ (self):
+        return 'RunningStats(n={})'.format(self.n)
+
+
+def _solve_batch (T, ki, b_ki, xi, vi_p, vi_dp, time_int, positivity):
+    """Returns the concentrations over time_int of each sample (row) of ki and
+    b_ki, shape (len(ki), len(time_int), len(xi)). Runs in a worker process.
+    """
+    sols = []
+    for ki_i, b_ki_i in zip(ki, b_ki):
+        rxn = ElementaryRxn(list(ki_i), list(b_ki_i), xi, vi_p, vi_dp)
+        sols.append(ODE_int_solver(T, rxn, positivity=positivity).solve(time_int)[0])
+    return np.array(sols)
+
+
+# State of a worker process of ArrheniusUQ.propagate_concentrations().
+_worker = {}
+
+
+def _init_worker (ring_handle, args):
+    _worker.update(ring=SharedArrays.attach(ring_handle, writable=True), args=args)
+
+
+def _solve_batch_into (slot, ki, b_ki):
+    """Writes the concentrations of the batch ki, b_ki into slot of the
+    shared output ring of the worker, and returns the batch size.
+    """
+    T, *args = _worker['args']
+    _worker['ring']['sol'][slot, :len(ki)] = _solve_batch(T, ki, b_ki, *args)
+    return len(ki)
+
+
+class ArrheniusUQ():
+    """Propagates the uncertainty of the Arrhenius parameters of a mechanism
+    at temperature T and concentrations xi by Monte Carlo sampling.
+
+    The mechanism is parsed once. The sampled forward coefficients of a whole
+    batch are evaluated in one vectorized pass, and the backward coefficients
+    follow from the equilibrium constants, which do not depend on the
+    Arrhenius parameters: b_ki = ki / ke. Results are accumulated batch by
+    batch in RunningStats, so memory does not grow with the number of
+    samples.
+
+    Attributes:
+        T (float): Temperature.
+        xi (list of floats): Concentrations of the species.
+        species (list of str): Species of the mechanism.
+        ki, b_ki (numpy arrays of floats): Nominal forward and backward
+            coefficients.
+        sampler (ArrheniusSampler): Sampler of the parameters.
+        dtype (numpy dtype): float64 or float32, floating-point type of the
+            reaction rates of propagate_rates().
+    """
+
+    def __init__ (self, xml_parser, T, xi, sigma_lnA=0.1, sigma_b=0.0, sigma_E=0.0,
+                  seed=None, method='random', dtype=np.float64):
+        """
+        Args:
+            xml_parser (XmlParser): Parser of the mechanism.
+            T (float): Temperature.
+            xi (list of floats): Concentrations of the species.
+            sigma_lnA, sigma_b, sigma_E, seed, method: See ArrheniusSampler.
+            dtype (numpy dtype): float32 evaluates the reaction rates of
+                propagate_rates() in float32 and in log space, as
+                CompiledMechanism does, for half the memory traffic.
+
+        Raises:
+            ChemKinError if the backward coefficients are not defined at T,
+            the mechanism has three-body or falloff reactions, or dtype is
+            not float32 or float64.
+        """
+        self.dtype = check_float_dtype(dtype, 'ArrheniusUQ()')
+        species, rxn_data_list = xml_parser.load()
+        if any(rxn_data.type != RxnType.Elementary for rxn_data in rxn_data_list):
+            raise ChemKinError('ArrheniusUQ()', 'Only elementary reactions can be sampled.')
+        parsed_data = xml_parser.parsed_data_list([T])[0]
+        if str(parsed_data['b_ki']) == 'Not Defined':
+            raise ChemKinError('ArrheniusUQ()',
+                               'Backward reaction coefficients not defined at T={}.'.format(T))
+        self.T = T
+        self.xi = xi
+        self.species = species
+        self.ki = np.array(parsed_data['ki'], dtype=float)
+        self.b_ki = np.array(parsed_data['b_ki'], dtype=float)
+        self._vi_p = parsed_data['sys_vi_p']
+        self._vi_dp = parsed_data['sys_vi_dp']
+        self._inv_ke = self.b_ki / self.ki
+        self.sampler = ArrheniusSampler([rxn_data.rate_coeff for rxn_data in rxn_data_list],
+                                        sigma_lnA, sigma_b, sigma_E, seed, method)
+
+    def coefficients (self, A, b, E):
+        """Returns the forward and backward coefficients (ki, b_ki) at T of
+        parameter arrays A, b, E of shape (n_samples, number of reactions).
+        """
+        ki = arrhenius_coefficients(A, b, E, self.T)
+        return ki, ki * self._inv_ke
+
+    def propagate_rates (self, n_samples, batch_size=10000):
+        """Returns the RunningStats of the reaction rates of the species at xi
+        over n_samples parameter sets, evaluated batch_size at a time, in
+        dtype; the statistics are accumulated in float64.
+        """
+        if self.dtype != np.float64:
+            return self._propagate_log_rates(n_samples, batch_size)
+        xi = np.asarray(self.xi, dtype=float)
+        vi_p = np.asarray(self._vi_p, dtype=float)
+        vi_dp = np.asarray(self._vi_dp, dtype=float)
+        f_prod = np.prod(np.power(xi, vi_p), axis=1)
+        b_prod = np.prod(np.power(xi, vi_dp), axis=1)
+
+        stats = RunningStats()
+        for A, b, E in self.sampler.batches(n_samples, batch_size):
+            ki, b_ki = self.coefficients(A, b, E)
+            stats.update(np.dot(ki * f_prod - b_ki * b_prod, vi_dp - vi_p))
+        return stats
+
+    def _propagate_log_rates (self, n_samples, batch_size):
+        """propagate_rates() in dtype and in log space: the logarithms of the
+        concentration products and of the inverse equilibrium constants are
+        computed once, and added to the logarithms of the sampled forward
+        coefficients before exponentiation.
+        """
+        dtype = self.dtype
+        xi = np.asarray(self.xi, dtype=dtype)
+        vi_p = np.asarray(self._vi_p, dtype=dtype)
+        vi_dp = np.asarray(self._vi_dp, dtype=dtype)
+        with np.errstate(divide='ignore'):
+            log_xi = np.log(xi)
+            # -inf for irreversible reactions
+            log_inv_ke = np.log(self._inv_ke).astype(dtype)
+        # finite, so that species absent from a reaction (vi = 0) add 0, not NaN
+        log_xi[xi == 0] = -np.finfo(dtype).max / 8
+        log_f_prod = np.dot(vi_p, log_xi)
+        log_b_prod = np.dot(vi_dp, log_xi) + log_inv_ke
+        nu = vi_dp - vi_p
+
+        stats = RunningStats()
+        for A, b, E in self.sampler.batches(n_samples, batch_size):
+            log_ki = log_arrhenius_coefficients(A, b, E, self.T, dtype=dtype)
+            with np.errstate(over='ignore'):
+                stats.update(np.dot(np.exp(log_ki + log_f_prod) - np.exp(log_ki + log_b_prod), nu))
+        return stats
+
+    def propagate_concentrations (self, n_samples, time_int, batch_size=10, n_workers=None,
+                                  positivity='zero'):
+        """Returns the RunningStats of the species concentrations over
+        time_int (shape (len(time_int), number of species)) over n_samples
+        parameter sets.
+
+        Batches of batch_size samples are integrated by ODE_int_solver in a
+        process pool of n_workers processes (default: number of CPUs;
+        n_workers=1 integrates in this process). At most 2 * n_workers batches
+        are in flight, and results are accumulated in sampling order, so the
+        statistics do not depend on n_workers. Workers write the
+        concentrations into a ring of 2 * n_workers batches in shared memory
+        rather than sending them back.
+        """
+        args = (self.T, self.xi, self._vi_p, self._vi_dp, time_int, positivity)
+        stats = RunningStats()
+        batches = self.sampler.batches(n_samples, batch_size)
+
+        if n_workers == 1:
+            for A, b, E in batches:
+                ki, b_ki = self.coefficients(A, b, E)
+                stats.update(_solve_batch(args[0], ki, b_ki, *args[1:]))
+            return stats
+
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        max_pending = 2 * n_workers
+        # batch i is written into slot i % max_pending, which is free again
+        # once batch i - max_pending has been accumulated
+        ring_shape = (max_pending, batch_size, len(time_int), len(self.xi))
+        with SharedArrays.create({'sol': np.zeros(ring_shape)}) as ring, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                                       initargs=(ring.handle, args)) as executor:
+            pending = collections.deque()
+
+            def accumulate ():
+                slot, future = pending.popleft()
+                stats.update(ring['sol'][slot, :future.result()])
+
+            for i, (A, b, E) in enumerate(batches):
+                ki, b_ki = self.coefficients(A, b, E)
+                slot = i % max_pending
+                pending.append((slot, executor.submit(_solve_batch_into, slot, ki, b_ki)))
+                if len(pending) >= max_pending:
+                    accumulate()
+            while pending:
+                accumulate()
+        return stats
@@ -0,0 +1,113 @@
+"""
+Tests for the monte_carlo.py module
+"""
+
+import numpy as np
+import pytest
+from scipy.special import ndtr
+from chemkin import pckg_xml_path
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reaction.reaction_coefficients import ArrheniusCoefficient, ModifiedArrheniusCoefficient
+from chemkin.uncertainty.monte_carlo import ArrheniusSampler, ArrheniusUQ, RunningStats, \
+    arrhenius_coefficients
+
+
+XI = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+
+
+def test_arrhenius_coefficients_match_scalar_classes():
+    ki = arrhenius_coefficients([[2.0, 3.0], [4.0, 5.0]], [[0.0, -0.5], [0.0, 1.2]],
+                                [[3.0, 1e4], [1e3, 2e4]], 900.0)
+    assert ki.shape == (2, 2)
+    assert np.isclose(ki[0, 0], ArrheniusCoefficient(2.0, 3.0, 900.0).get_coef())
+    assert np.isclose(ki[1, 1], ModifiedArrheniusCoefficient(5.0, 1.2, 2e4, 900.0).get_coef())
+    with pytest.raises(ValueError):
+        arrhenius_coefficients([-1.0], [0.0], [0.0], 900.0)
+
+
+def test_sampler_distributions_and_seeding():
+    rate_coeffs = [[1e7, 1e4], [2e3, 1.5, 5e3], 10.0]
+    sampler = ArrheniusSampler(rate_coeffs, sigma_lnA=0.2, sigma_b=0.1, sigma_E=100., seed=1)
+    A, b, E = sampler.sample(20000)
+    assert A.shape == b.shape == E.shape == (20000, 3)
+    assert np.allclose(np.std(np.log(A), axis=0), 0.2, rtol=0.05)
+    assert np.allclose(np.mean(np.log(A / sampler.A), axis=0), 0.0, atol=0.01)
+    assert np.allclose(np.std(E[:, :2], axis=0), 100., rtol=0.05)
+    assert np.all(E[:, 2] == 0.0) and np.all(b[:, 2] == 0.0)
+
+    # the same seed gives the same samples whatever the batch sizes
+    A_1 = ArrheniusSampler(rate_coeffs, seed=7).sample(10)[0]
+    A_2 = np.vstack([batch[0] for batch in ArrheniusSampler(rate_coeffs, seed=7).batches(10, 3)])
+    assert np.array_equal(A_1, A_2)
+
+    with pytest.raises(ChemKinError):
+        ArrheniusSampler(rate_coeffs, method='sobol')
+
+
+def test_sampler_latin_hypercube():
+    sampler = ArrheniusSampler([[1e7, 1e4]], sigma_lnA=1.0, seed=3, method='lhs')
+    A = sampler.sample(50)[0][:, 0]
+    # one sample in each of the 50 equiprobable strata of ln A
+    strata = np.floor(50 * ndtr(np.log(A / 1e7)))
+    assert sorted(strata) == list(range(50))
+
+
+def test_running_stats_matches_numpy():
+    data = np.random.default_rng(0).normal(size=(1000, 3, 2))
+    stats = RunningStats()
+    assert stats.mean is None and stats.std is None
+    for start in range(0, 1000, 37):
+        stats.update(data[start:start + 37])
+    assert stats.n == 1000
+    assert np.allclose(stats.mean, np.mean(data, axis=0))
+    assert np.allclose(stats.var, np.var(data, axis=0, ddof=1))
+    assert np.array_equal(stats.min, np.min(data, axis=0))
+    assert np.array_equal(stats.max, np.max(data, axis=0))
+
+
+def test_propagate_rates():
+    xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    uq = ArrheniusUQ(xml_parser, 1500, XI, sigma_lnA=0.1, sigma_E=1e3, seed=0)
+    nominal = ElementaryRxn(list(uq.ki), list(uq.b_ki), XI, uq._vi_p, uq._vi_dp).reaction_rate()
+
+    # zero uncertainty reproduces the nominal rates
+    ki, b_ki = uq.coefficients(uq.sampler.A[None, :], uq.sampler.b[None, :], uq.sampler.E[None, :])
+    assert np.allclose(ki[0], uq.ki) and np.allclose(b_ki[0], uq.b_ki)
+
+    stats = uq.propagate_rates(5000, batch_size=1000)
+    assert stats.n == 5000 and stats.mean.shape == (8,)
+    assert np.all(stats.std > 0)
+    assert np.allclose(stats.mean, nominal, rtol=0.05, atol=1e-3 * np.max(np.abs(nominal)))
+
+    with pytest.raises(ChemKinError):
+        ArrheniusUQ(xml_parser, 10, XI)
+
+
+def test_propagate_rates_float32():
+    xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    stats = ArrheniusUQ(xml_parser, 1500, XI, sigma_lnA=0.1, sigma_E=1e3, seed=0).propagate_rates(2000)
+    stats32 = ArrheniusUQ(xml_parser, 1500, XI, sigma_lnA=0.1, sigma_E=1e3, seed=0,
+                          dtype=np.float32).propagate_rates(2000)
+    assert stats32.n == 2000
+    atol = 1e-4 * np.max(np.abs(stats.max))
+    assert np.allclose(stats32.mean, stats.mean, rtol=1e-4, atol=atol)
+    assert np.allclose(stats32.std, stats.std, rtol=1e-3, atol=atol)
+
+    with pytest.raises(ChemKinError):
+        ArrheniusUQ(xml_parser, 1500, XI, dtype=np.float16)
+
+
+def test_propagate_concentrations_in_process_pool():
+    xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+    time_int = np.linspace(0, 1e-12, 5)
+    serial = ArrheniusUQ(xml_parser, 1500, XI, seed=2).propagate_concentrations(
+          6, time_int, batch_size=2, n_workers=1)
+    pooled = ArrheniusUQ(xml_parser, 1500, XI, seed=2).propagate_concentrations(
+          6, time_int, batch_size=2, n_workers=2)
+    assert serial.n == pooled.n == 6
+    assert serial.mean.shape == (5, 8)
+    assert np.array_equal(serial.mean, pooled.mean)
+    assert np.array_equal(serial.var, pooled.var)
+    assert np.allclose(serial.mean[0], XI) and np.all(serial.std[0] == 0)
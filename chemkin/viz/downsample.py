@@ -0,0 +1,94 @@
+"""
+Contains shape-preserving downsampling of time series for plotting: the
+largest triangle three buckets algorithm (lttb) and min/max bucketing
+(minmax). Both select points of the series rather than averaging them, so
+peaks and fast transients survive, and both process every column (species)
+of a trajectory at once.
+"""
+import numpy as np
+from chemkin.chemkin_errors import ChemKinError
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+
+def lttb (x, y, n_out):
+    """Returns the indices (shape (n_out, number of columns)) of the points of
+    each column of y kept by the largest triangle three buckets algorithm
+    (Steinarsson, 2013): the first and last points, and in each of n_out - 2
+    buckets of equal count, the point forming the largest triangle with the
+    point kept in the previous bucket and the average of the next bucket.
+
+    >>> x = np.arange(7.)
+    >>> lttb(x, np.array([0., 1., 0., 5., 0., 1., 0.]), 3).ravel()
+    array([0, 3, 6])
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        y = y[:, None]
+    n, n_cols = y.shape
+    if n_out >= n or n_out < 3:
+        return np.tile(np.arange(n)[:, None], (1, n_cols))
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    edges = np.append(edges, n)  # the last bucket holds the last point only
+    cols = np.arange(n_cols)
+    idx = np.empty((n_out, n_cols), dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = np.zeros(n_cols, dtype=int)
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        avg_x = np.mean(x[stop:edges[i + 2]])
+        avg_y = np.mean(y[stop:edges[i + 2]], axis=0)
+        x_a, y_a = x[a], y[a, cols]
+        area = np.abs((x_a - avg_x) * (y[start:stop] - y_a)
+                      - (x_a - x[start:stop, None]) * (avg_y - y_a))
+        a = start + np.argmax(area, axis=0)
+        idx[i + 1] = a
+    return idx
+
+
+def minmax (x, y, n_buckets):
+    """Returns the list of the indices of the points of each column of y kept
+    by min/max bucketing: the first and last points, and the minimum and the
+    maximum of each of n_buckets buckets of equal width in x (at most
+    2 * n_buckets + 2 points per column).
+
+    >>> x = np.arange(8.)
+    >>> minmax(x, np.array([0., 3., 1., 2., 5., 4., 7., 6.]), 2)
+    [array([0, 1, 5, 6, 7])]
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        y = y[:, None]
+    n, n_cols = y.shape
+    if 2 * n_buckets + 2 >= n:
+        return [np.arange(n) for _ in range(n_cols)]
+
+    span = x[-1] - x[0]
+    bucket = np.minimum((x - x[0]) * (n_buckets / span if span > 0 else 0), n_buckets - 1).astype(int)
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    counts = np.diff(np.append(starts, n))
+    positions = np.arange(n)[:, None]
+    first_min = np.minimum.reduceat(
+        np.where(y == np.repeat(np.minimum.reduceat(y, starts, axis=0), counts, axis=0), positions, n),
+        starts, axis=0)
+    first_max = np.minimum.reduceat(
+        np.where(y == np.repeat(np.maximum.reduceat(y, starts, axis=0), counts, axis=0), positions, n),
+        starts, axis=0)
+    ends = np.array([0, n - 1])
+    return [np.unique(np.concatenate((ends, first_min[:, j], first_max[:, j]))) for j in range(n_cols)]
+
+
+def downsample (x, y, n_out, method='lttb'):
+    """Returns the list of the indices of the points of each column of y kept
+    to draw about n_out points per column, by method 'lttb' or 'minmax' (the
+    latter keeps up to n_out + 2 points, from n_out / 2 buckets).
+    """
+    if method == 'lttb':
+        idx = lttb(x, y, n_out)
+        return [idx[:, j] for j in range(idx.shape[1])]
+    if method == 'minmax':
+        return minmax(x, y, max(n_out // 2, 1))
+    raise ChemKinError('downsample()', 'Unknown downsampling method {}.'.format(method))
@@ -0,0 +1,145 @@
+"""
+Contains the figures drawn by the plotting functions of the summary module.
+
+Each figure owns a single matplotlib Figure and Axes, created without pyplot
+so that no global state keeps it alive, and redraws them in place for every
+temperature of a sweep: lines are updated with set_data() and bars with
+set_height(), instead of building new artists. Long trajectories are
+downsampled before drawing (see the downsample module). Use the figures as
+context managers (or call close()) to release them deterministically:
+
+    with SpeciesConcentrationFigure() as figure:
+        for T, sol in results:
+            figure.draw(time_steps, sol, species)
+            figure.savefig('evolution_{}K.png'.format(T))
+"""
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from chemkin import profiling
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.viz.downsample import DOWNSAMPLE_METHODS, downsample
+
+
+class _ReusableFigure():
+    """Base class owning one Figure and Axes."""
+
+    def __init__ (self):
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
+        return False
+
+    def savefig (self, path):
+        with profiling.span('summary.savefig'):
+            self.figure.savefig(path)
+
+    def close (self):
+        """Releases the artists of the figure; it cannot be drawn again."""
+        if self.figure is not None:
+            self.figure.clear()
+            self.figure = None
+            self.ax = None
+
+
+class SpeciesConcentrationFigure(_ReusableFigure):
+    """Line plot of the evolution of species concentrations over time.
+
+    Long trajectories are downsampled per species to about one point per
+    pixel of the figure width, with a shape-preserving method of the
+    downsample module, so drawing time does not depend on the trajectory
+    length. With log_time, the time axis is logarithmic (t = 0 is left out)
+    and the points are bucketed in log-time, to match log-spaced output
+    grids.
+
+    Attributes:
+        downsample (str, default 'lttb'): 'lttb', 'minmax' or None (draw every
+            point).
+        log_time (bool, default False): Logarithmic time axis.
+    """
+
+    def __init__ (self, downsample='lttb', log_time=False):
+        super().__init__()
+        if downsample is not None and downsample not in DOWNSAMPLE_METHODS:
+            raise ChemKinError('SpeciesConcentrationFigure()',
+                               'Unknown downsampling method {}.'.format(downsample))
+        self.downsample = downsample
+        self.log_time = log_time
+        self._lines = None
+        self._species = None
+
+    def max_points (self):
+        """Returns the number of points drawn per species: the width of the
+        figure in pixels.
+        """
+        return int(round(self.figure.get_figwidth() * self.figure.dpi))
+
+    def draw (self, time_steps, evolution, species):
+        """Draws the concentrations evolution (shape (len(time_steps),
+        len(species))) of species over time_steps.
+        """
+        time_steps = np.asarray(time_steps, dtype=float)
+        evolution = np.asarray(evolution)
+        t, x = time_steps, evolution
+        if self.log_time:
+            t, x = time_steps[time_steps > 0], evolution[time_steps > 0]
+        if self.downsample is None:
+            idx = [slice(None)] * len(species)
+        else:
+            idx = downsample(np.log10(t) if self.log_time else t, x, self.max_points(), self.downsample)
+
+        if self._lines is None or list(species) != self._species:
+            self.ax.cla()
+            if self.log_time:
+                self.ax.set_xscale('log')
+            self._lines = [self.ax.plot(t[idx[i]], x[idx[i], i], label='{}'.format(s))[0]
+                           for i, s in enumerate(species)]
+            self._species = list(species)
+            self.ax.legend()
+            self.ax.set_xlabel('Time (sec)')
+            self.ax.set_ylabel('Species Concentration')
+            self.ax.set_title('Evolution of Species Concentration over Time')
+        else:
+            for i, line in enumerate(self._lines):
+                line.set_data(t[idx[i]], x[idx[i], i])
+            self.ax.relim()
+            self.ax.autoscale_view(scalex=True, scaley=False)
+        self.ax.set_ylim(0, np.max(evolution) + 1)
+
+
+class TimeToEquilibriumFigure(_ReusableFigure):
+    """Bar chart of the log-scale time to equilibrium of each reaction."""
+
+    def __init__ (self):
+        super().__init__()
+        self._bars = None
+        self._legend = None
+
+    def draw (self, yval, labels):
+        """Draws one bar of height yval[j] per reaction, labelled labels[j] in
+        the legend. All bars are drawn in one call.
+        """
+        if self._bars is None or len(self._bars.patches) != len(yval):
+            self.ax.cla()
+            xpos = np.arange(0, len(yval))
+            colors = ['C{}'.format(j % 10) for j in range(len(yval))]
+            self._bars = self.ax.bar(xpos, yval, width=0.5, bottom=0.0, align='center',
+                                     alpha=0.6, color=colors)
+            self._legend = self.ax.legend(self._bars.patches, labels, fontsize=9)
+            self.ax.set_xlabel('Reaction equation')
+            self.ax.set_ylabel('log(Time + 1)')
+            self.ax.set_xticks(xpos)
+            self.ax.set_title('Log-scale Time to Equilibrium')
+        else:
+            for bar, y in zip(self._bars.patches, yval):
+                bar.set_height(y)
+            for text, label in zip(self._legend.get_texts(), labels):
+                text.set_text(label)
+            self.ax.relim()
+            self.ax.autoscale_view()
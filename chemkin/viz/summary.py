@@ -1,10 +1,12 @@
+import concurrent.futures
 import os
 import os.path
 import numpy as np
-import matplotlib
-matplotlib.use('agg') # must be called before importing pyplot
-import matplotlib.pyplot as plt
-from chemkin.reaction.elementary_rxn import ElementaryRxn
+from chemkin.reaction.non_elementary_rxn import rxn_from_parsed_data
+from chemkin.solver.ODEint_solver import ODE_int_solver, POSITIVITY_STRATEGIES
+from chemkin.solver.solver_stats import SolverStats
+from chemkin.solver.sweep import EquilibriumSweep
+from chemkin.viz.render import SpeciesConcentrationFigure, TimeToEquilibriumFigure
 
 def print_reaction_rate(parsed_data_list, xi):
 	''' Function to print the reaction rates
@@ -14,9 +16,6 @@ def print_reaction_rate(parsed_data_list, xi):
 	for parsed_data in parsed_data_list:
 
 		species = parsed_data['species']
-		ki = parsed_data['ki']
-		sys_vi_p = parsed_data['sys_vi_p']
-		sys_vi_dp = parsed_data['sys_vi_dp']
 		T = parsed_data['T']
 
 		b_ki = parsed_data['b_ki']
@@ -28,7 +27,7 @@ def print_reaction_rate(parsed_data_list, xi):
 			print('--------------------------------')
 			continue
 
-		rxn_rates = ElementaryRxn(ki, b_ki, xi, sys_vi_p, sys_vi_dp).reaction_rate()
+		rxn_rates = rxn_from_parsed_data(parsed_data, xi).reaction_rate()
 
 		print('------At Temperature', T, 'K------')
 		for s, rate in zip(species, rxn_rates):
@@ -45,9 +44,6 @@ def print_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12):
 	for parsed_data in parsed_data_list:
 
 		species = parsed_data['species']
-		ki = parsed_data['ki']
-		sys_vi_p = parsed_data['sys_vi_p']
-		sys_vi_dp = parsed_data['sys_vi_dp']
 		T = parsed_data['T']
 		
 		b_ki = parsed_data['b_ki']
@@ -59,7 +55,7 @@ def print_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12):
 			print('--------------------------------\n')
 			continue
 
-		species_concentration = ElementaryRxn(ki, b_ki, xi, sys_vi_p, sys_vi_dp).species_concentration(T, end_t, n_steps)
+		species_concentration = rxn_from_parsed_data(parsed_data, xi).species_concentration(T, end_t, n_steps)
 		
 		# print(np.min(sol), np.max(sol))
 
@@ -72,16 +68,134 @@ def print_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12):
 	return test_flag
 
 
-def plot_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12):
+def print_equilibrium_concentration(parsed_data_list, xi):
+	''' Function to print the species concentration at equilibrium, solved for directly
+	'''
+	test_flag = 0 # equilibrium concentrations can be printed
+	# solved in order of temperature, each warm-started from its neighbours
+	equilibrium_concentrations = EquilibriumSweep(parsed_data_list, xi).solve()
+	for parsed_data, equilibrium_concentration in zip(parsed_data_list, equilibrium_concentrations):
+
+		species = parsed_data['species']
+		T = parsed_data['T']
+
+		b_ki = parsed_data['b_ki']
+		if str(b_ki) == 'Not Defined':
+			test_flag = 1 # equilibrium concentrations cannot be printed because T is not in some specie's temperature range
+
+			print('------At Temperature', T, 'K------')
+			print('Backward reaction coefficients not defined: T={} is not in some specie\'s temperature range.'.format(T))
+			print('--------------------------------\n')
+			continue
+
+		print('------At Temperature', T, 'K------')
+		print('Specie Concentration at equilibrium')
+		for i, s in enumerate(species):
+			print('  {}: start = {}, equilibrium = {}'.format(s, xi[i], equilibrium_concentration[i]))
+		print('--------------------------------\n')
+
+	return test_flag
+
+
+def print_solver_stats(parsed_data_list, xi, n_steps=101, end_t=1e-12, positivity='zero'):
+	''' Function to print the solver performance statistics of the evolution of species concentration
+	from start to an end time: end_t, at each temperature and aggregated over all temperatures,
+	with the non-negativity strategy positivity of ODE_int_solver
+	'''
+	test_flag = 0 # solver statistics can be printed
+	stats_list = []
+	for parsed_data in parsed_data_list:
+
+		T = parsed_data['T']
+
+		b_ki = parsed_data['b_ki']
+		if str(b_ki) == 'Not Defined':
+			test_flag = 1 # solver statistics cannot be printed because T is not in some specie's temperature range
+
+			print('------At Temperature', T, 'K------')
+			print('Backward reaction coefficients not defined: T={} is not in some specie\'s temperature range.'.format(T))
+			print('--------------------------------\n')
+			continue
+
+		time_steps = np.linspace(0, end_t, n_steps)
+		solver = ODE_int_solver(T, rxn_from_parsed_data(parsed_data, xi), positivity=positivity)
+		_, _, _, stats = solver.solve(time_steps, full_output=True)
+		stats_list.append(stats)
+
+		print('------At Temperature', T, 'K------')
+		_print_stats(stats)
+		print('--------------------------------\n')
+
+	if stats_list:
+		print('------Over All Temperatures------')
+		_print_stats(SolverStats.aggregate(stats_list))
+		print('--------------------------------\n')
+
+	return test_flag
+
+
+def print_positivity_benchmark(parsed_data_list, xi, n_steps=101, end_t=1e-12):
+	''' Function to compare the non-negativity strategies of ODE_int_solver on the evolution of species
+	concentration from start to an end time: end_t, at each temperature: steps, RHS and Jacobian
+	evaluations, wall time, and smallest concentration of the solution
+	'''
+	test_flag = 0 # strategies can be compared
+	for parsed_data in parsed_data_list:
+
+		T = parsed_data['T']
+
+		b_ki = parsed_data['b_ki']
+		if str(b_ki) == 'Not Defined':
+			test_flag = 1 # strategies cannot be compared because T is not in some specie's temperature range
+
+			print('------At Temperature', T, 'K------')
+			print('Backward reaction coefficients not defined: T={} is not in some specie\'s temperature range.'.format(T))
+			print('--------------------------------\n')
+			continue
+
+		time_steps = np.linspace(0, end_t, n_steps)
+		solver = ODE_int_solver(T, rxn_from_parsed_data(parsed_data, xi))
+
+		print('------At Temperature', T, 'K------')
+		print('  {:<10} {:>8} {:>8} {:>8} {:>14} {:>14}'.format('Strategy', 'Steps', 'RHS', 'Jacobian', 'Wall time (s)', 'Min conc.'))
+		for positivity in POSITIVITY_STRATEGIES:
+			sol, _, _, stats = solver.solve(time_steps, full_output=True, positivity=positivity)
+			print('  {:<10} {:>8} {:>8} {:>8} {:>14.4g} {:>14.4g}'.format(positivity, stats.n_steps, stats.n_rhs,
+				stats.n_jac, stats.wall_time, np.min(sol)))
+		print('--------------------------------\n')
+
+	return test_flag
+
+
+def _print_stats(stats):
+	print('  Solves: {}'.format(stats.n_solves))
+	print('  RHS evaluations: {}'.format(stats.n_rhs))
+	print('  Jacobian evaluations: {}'.format(stats.n_jac))
+	print('  LU decompositions: {}'.format(stats.n_lu))
+	print('  Accepted steps: {}'.format(stats.n_steps))
+	print('  Rejected steps: {}'.format('Not reported' if stats.n_rejected is None else stats.n_rejected))
+	print('  Step size: min = {}, mean = {}, max = {}'.format(stats.min_step, stats.mean_step, stats.max_step))
+	print('  Method switches: {}'.format(stats.n_method_switches))
+	print('  Wall time (sec): total = {}, RHS = {}, overhead = {}'.format(stats.wall_time, stats.rhs_time, stats.overhead_time))
+
+
+def plot_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12, n_workers=1,
+	log_time=False, start_t=None, downsample='lttb', grid=None):
 	''' Function to plot the evolution of species concentration from start to an end time: end_t
+
+	The temperatures are rendered by n_workers processes (None for one per CPU), each redrawing a single figure
+
+	With log_time, the concentrations are solved over a log-spaced grid from start_t to end_t (see
+	time_grid.log_grid()) and plotted on a logarithmic time axis. Each species is downsampled to about one
+	point per pixel by downsample ('lttb', 'minmax' or None to draw every point)
+
+	grid overrides the output grid ('linear', 'log', 'steps' or 'adaptive', see
+	RxnBase.species_concentration_evolution()); n_steps is then the number of output times, or their maximum
 	'''
 	test_flag = 0 # species_concentrations can be plotted
+	jobs = []
 	for parsed_data in parsed_data_list:
 
-		species = parsed_data['species']
-		ki = parsed_data['ki']
-		sys_vi_p = parsed_data['sys_vi_p']
-		sys_vi_dp = parsed_data['sys_vi_dp']
 		T = parsed_data['T']
 		
 		b_ki = parsed_data['b_ki']
@@ -93,40 +207,37 @@ def plot_species_concentration(parsed_data_list, xi, n_steps=101, end_t=1e-12):
 			print('--------------------------------\n')
 			continue
 
-		time_steps = np.linspace(0, end_t, n_steps)
-		species_concentration_evolution = ElementaryRxn(ki, b_ki, xi, sys_vi_p, sys_vi_dp).species_concentration_evolution(T, end_t, n_steps)
-		
-
-		f1, ax1 = plt.subplots(1, 1)
-		for i, s in enumerate(species):
-			# Plot the evolution of all species' concentration
-			ax1.plot(time_steps, species_concentration_evolution[:, i], label='{}'.format(s))
-		
-		ax1.legend()
-		ax1.set_ylim(0, np.max(species_concentration_evolution)+1)
-		ax1.set_xlabel('Time (sec)')
-		ax1.set_ylabel('Species Concentration')
-		ax1.set_title('Evolution of Species Concentration over Time')
-
-		BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-		image_dir = os.path.join(BASE_DIR, 'examples')
-		if not os.path.exists(image_dir):
-			os.makedirs(image_dir)
-		img_path = os.path.join(image_dir, 'evolution_{}K.png'.format(T))
-		f1.savefig(img_path)
+		jobs.append((parsed_data, xi, n_steps, end_t, grid or ('log' if log_time else 'linear'), start_t))
 
+	_render(_plot_species_concentration_jobs, jobs, n_workers, downsample=downsample, log_time=log_time)
 	return test_flag
 
 
-def print_time_to_equilibrium(parsed_data_list, xi, n_steps=101):
+def _plot_species_concentration_jobs(jobs, **figure_kwargs):
+	with SpeciesConcentrationFigure(**figure_kwargs) as figure:
+		for parsed_data, xi, n_steps, end_t, grid, start_t in jobs:
+
+			species = parsed_data['species']
+			b_ki = parsed_data['b_ki']
+			T = parsed_data['T']
+
+			time_steps, species_concentration_evolution = rxn_from_parsed_data(parsed_data, xi).species_concentration_evolution(
+				T, end_t, n_steps, grid=grid, start_t=start_t, return_time=True)
+
+			# Plot the evolution of all species' concentration
+			figure.draw(time_steps, species_concentration_evolution, species)
+			figure.savefig(_image_path('evolution_{}K.png'.format(T)))
+
+
+def print_time_to_equilibrium(parsed_data_list, xi, n_steps=101, checkpoint_dir=None):
 	''' Function to print the time to equilibrium of all reactions
+
+	If checkpoint_dir is given, each temperature is checkpointed there, so that a restarted sweep only
+	integrates the temperatures that have not finished
 	'''
 	test_flag = 0 # time_to_equilibrium can be printed
 	for parsed_data in parsed_data_list:
 
-		ki = parsed_data['ki']
-		sys_vi_p = parsed_data['sys_vi_p']
-		sys_vi_dp = parsed_data['sys_vi_dp']
 		T = parsed_data['T']
 		
 		b_ki = parsed_data['b_ki']
@@ -138,7 +249,8 @@ def print_time_to_equilibrium(parsed_data_list, xi, n_steps=101):
 			print('--------------------------------\n')
 			continue
 
-		end_t, critical_t, overall_critical_t = ElementaryRxn(ki, b_ki, xi, sys_vi_p, sys_vi_dp).time_to_equilibrium(T, n_steps)
+		end_t, critical_t, overall_critical_t = rxn_from_parsed_data(parsed_data, xi).time_to_equilibrium(
+			T, n_steps, _checkpoint_path(checkpoint_dir, T))
 		time_steps = np.linspace(0, end_t, n_steps)
 
 		print('------At Temperature', T, 'K------')
@@ -158,15 +270,26 @@ def print_time_to_equilibrium(parsed_data_list, xi, n_steps=101):
 
 
 
-def plot_time_to_equilibrium(parsed_data_list, xi, n_steps=101):
+def _checkpoint_path(checkpoint_dir, T):
+	if checkpoint_dir is None:
+		return None
+	if not os.path.exists(checkpoint_dir):
+		os.makedirs(checkpoint_dir)
+	return os.path.join(checkpoint_dir, 'time_to_equilibrium_{}K.npz'.format(T))
+
+
+def plot_time_to_equilibrium(parsed_data_list, xi, n_steps=101, checkpoint_dir=None, n_workers=1):
 	''' Function to plot the time to equilibrium of all reactions
+
+	If checkpoint_dir is given, each temperature is checkpointed there, so that a restarted sweep only
+	integrates the temperatures that have not finished
+
+	The temperatures are rendered by n_workers processes (None for one per CPU), each redrawing a single figure
 	'''
 	test_flag = 0 # time_to_equilibrium can be plotted
+	jobs = []
 	for parsed_data in parsed_data_list:
 
-		ki = parsed_data['ki']
-		sys_vi_p = parsed_data['sys_vi_p']
-		sys_vi_dp = parsed_data['sys_vi_dp']
 		T = parsed_data['T']
 		
 		b_ki = parsed_data['b_ki']
@@ -178,39 +301,51 @@ def plot_time_to_equilibrium(parsed_data_list, xi, n_steps=101):
 			print('--------------------------------\n')
 			continue
 
-		end_t, critical_t, overall_critical_t = ElementaryRxn(ki, b_ki, xi, sys_vi_p, sys_vi_dp).time_to_equilibrium(T, n_steps)
-		time_steps = np.linspace(0, end_t, n_steps)
-		
-		# Plot Log-scale Time to Equilibrium
-		f2, ax2 = plt.subplots(1, 1)
-		xpos = np.arange(0, len(parsed_data['equations']))
-		
-		# Take Log-transform of each rxn's time-to-equilibrium
-		yval = np.copy(critical_t)
-		for j, v in enumerate(yval):
-			if v == -100:
-				yval[j] = 0
-			else:
-				yval[j] = np.log10(v+1)
-		labels = parsed_data['equations']
-
-		for j, (x, y) in enumerate(zip(xpos, yval)):
-			ax2.bar(x, y, width=0.5, bottom=0.0, align='center', alpha=0.6, label=labels[j]+':'+str('{:0.3e}'.format(y)))
-		
-		ax2.legend(fontsize=9)
-		ax2.set_xlabel('Reaction equation')
-		ax2.set_ylabel('log(Time + 1)')
-		ax2.set_xticks(np.arange(0, len(parsed_data['equations'])))
-		ax2.set_title('Log-scale Time to Equilibrium')
-
-		BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-		image_dir = os.path.join(BASE_DIR, 'examples')
-		if not os.path.exists(image_dir):
-			os.makedirs(image_dir)
-		img_path = os.path.join(image_dir, 'Time_to_Equilibrium_{}K.png'.format(T))
-		f2.savefig(img_path)
+		jobs.append((parsed_data, xi, n_steps, _checkpoint_path(checkpoint_dir, T)))
 
+	_render(_plot_time_to_equilibrium_jobs, jobs, n_workers)
 	return test_flag
 
 
+def _plot_time_to_equilibrium_jobs(jobs, **figure_kwargs):
+	with TimeToEquilibriumFigure(**figure_kwargs) as figure:
+		for parsed_data, xi, n_steps, checkpoint_path in jobs:
+
+			b_ki = parsed_data['b_ki']
+			T = parsed_data['T']
+
+			end_t, critical_t, overall_critical_t = rxn_from_parsed_data(parsed_data, xi).time_to_equilibrium(
+				T, n_steps, checkpoint_path)
 
+			# Take Log-transform of each rxn's time-to-equilibrium
+			critical_t = np.asarray(critical_t, dtype=float)
+			yval = np.where(critical_t == -100, 0, np.log10(np.abs(critical_t) + 1))
+			labels = [label + ':' + '{:0.3e}'.format(y) for label, y in zip(parsed_data['equations'], yval)]
+
+			# Plot Log-scale Time to Equilibrium, all bars in one call
+			figure.draw(yval, labels)
+			figure.savefig(_image_path('Time_to_Equilibrium_{}K.png'.format(T)))
+
+
+def _image_path(filename):
+	BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+	image_dir = os.path.join(BASE_DIR, 'examples')
+	if not os.path.exists(image_dir):
+		os.makedirs(image_dir, exist_ok=True)
+	return os.path.join(image_dir, filename)
+
+
+def _render(plot_jobs, jobs, n_workers=1, **figure_kwargs):
+	''' Runs plot_jobs over jobs in this process, or over n_workers worker processes (None for one per CPU)
+	with one share of the jobs each, so that every process reuses one figure for its whole share
+	'''
+	if n_workers is None:
+		n_workers = os.cpu_count() or 1
+	n_workers = min(n_workers, len(jobs))
+	if n_workers <= 1:
+		plot_jobs(jobs, **figure_kwargs)
+		return
+	with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+		futures = [executor.submit(plot_jobs, jobs[i::n_workers], **figure_kwargs) for i in range(n_workers)]
+		for future in futures:
+			future.result()
@@ -0,0 +1,34 @@
+###############################################################################
+# Tests for chemkin.viz.downsample module
+###############################################################################
+
+import numpy as np
+import pytest
+from chemkin.chemkin_errors import ChemKinError
+from chemkin.viz.downsample import downsample, lttb, minmax
+
+def test_lttb_keeps_spikes_and_ends():
+	x = np.linspace(0, 1, 100001)
+	y = np.zeros((len(x), 2))
+	y[31234, 0] = 5.
+	y[77777, 1] = -3.
+	idx = lttb(x, y, 500)
+	assert idx.shape == (500, 2)
+	assert np.all(np.diff(idx, axis=0) > 0)
+	assert 31234 in idx[:, 0] and 77777 in idx[:, 1]
+	assert idx[0, 0] == 0 and idx[-1, 0] == len(x) - 1
+
+def test_lttb_short_series_unchanged():
+	idx = lttb(np.arange(10.), np.arange(10.), 20)
+	assert np.all(idx[:, 0] == np.arange(10))
+
+def test_minmax_keeps_bucket_extremes():
+	x = np.linspace(0, 1, 10000)
+	y = np.sin(40 * x) + np.cos(3 * x)
+	idx = minmax(x, y, 100)[0]
+	assert len(idx) <= 202
+	assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+def test_downsample_unknown_method():
+	with pytest.raises(ChemKinError):
+		downsample(np.arange(10.), np.arange(10.), 5, 'mean')
@@ -0,0 +1,43 @@
+###############################################################################
+# Tests for chemkin.viz.render module
+###############################################################################
+
+import numpy as np
+from chemkin.viz.render import SpeciesConcentrationFigure, TimeToEquilibriumFigure
+
+def test_species_concentration_figure_reuses_lines():
+	time_steps = np.linspace(0, 1, 11)
+	with SpeciesConcentrationFigure() as figure:
+		figure.draw(time_steps, np.ones((11, 2)), ['H', 'O'])
+		lines = list(figure.ax.get_lines())
+		figure.draw(time_steps, 2 * np.ones((11, 2)), ['H', 'O'])
+		assert figure.ax.get_lines() == lines
+		assert np.all(lines[0].get_ydata() == 2)
+		assert figure.ax.get_ylim() == (0, 3)
+	assert figure.figure is None
+
+def test_time_to_equilibrium_figure_draws_bars_in_one_container():
+	with TimeToEquilibriumFigure() as figure:
+		figure.draw([1., 2., 3.], ['a', 'b', 'c'])
+		bars = figure.ax.patches[:]
+		figure.draw([3., 2., 1.], ['d', 'e', 'f'])
+		assert figure.ax.patches[:] == bars
+		assert len(figure.ax.containers) == 1
+		assert [bar.get_height() for bar in bars] == [3., 2., 1.]
+		assert [text.get_text() for text in figure.ax.get_legend().get_texts()] == ['d', 'e', 'f']
+
+def test_species_concentration_figure_downsamples_to_pixels():
+	time_steps = np.linspace(0, 1, 100001)
+	evolution = np.column_stack((np.sin(30 * time_steps), np.cos(30 * time_steps)))
+	for method in ['lttb', 'minmax']:
+		with SpeciesConcentrationFigure(downsample=method) as figure:
+			figure.draw(time_steps, evolution, ['H', 'O'])
+			for line in figure.ax.get_lines():
+				assert len(line.get_xdata()) <= figure.max_points() + 2
+
+def test_species_concentration_figure_log_time():
+	time_steps = np.concatenate(([0.], np.logspace(-12, 2, 1000)))
+	with SpeciesConcentrationFigure(log_time=True) as figure:
+		figure.draw(time_steps, np.ones((len(time_steps), 1)), ['H'])
+		assert figure.ax.get_xscale() == 'log'
+		assert np.min(figure.ax.get_lines()[0].get_xdata()) == 1e-12
@@ -2,9 +2,12 @@
 # Tests for chemkin.viz.summary module
 ###############################################################################
 
+import os
 import matplotlib.pyplot as plt
+import numpy as np
 from chemkin import pckg_xml_path
 from chemkin.preprocessing.parse_xml import XmlParser
+from chemkin.reaction.compiled_mechanism import CompiledMechanism
 from chemkin.viz import summary
 
 def test_print_normal_irreversible():
@@ -31,6 +34,20 @@ def test_print_abnormal_reversible():
 	test_flag = summary.print_reaction_rate(parsed_data_list, xi)
 	assert test_flag == 1
 
+def test_print_falloff(capsys):
+	Ti = [1500]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_falloff.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_falloff'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_reaction_rate(parsed_data_list, xi)
+	assert test_flag == 0
+	lines = capsys.readouterr().out.splitlines()[1:-1]
+	printed = [float(line.split(':')[1]) for line in lines]
+	expected = CompiledMechanism.from_parser(xml_parser).reaction_rates(Ti, xi)[0]
+	assert np.allclose(printed, expected, rtol=1e-10)
+	test_flag = summary.print_species_concentration(parsed_data_list, [1e-6 * x for x in xi])
+	assert test_flag == 0
+
 def test_print_species_concentration_normal():
 	Ti = [2500]
 	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
@@ -56,6 +73,15 @@ def test_plot_species_concentration_normal():
 	test_flag = summary.plot_species_concentration(parsed_data_list, xi)
 	assert test_flag == 0
 
+def test_plot_species_concentration_log_time():
+	Ti = [2500]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.plot_species_concentration(parsed_data_list, xi, n_steps=2001, log_time=True, start_t=1e-18,
+		downsample='minmax')
+	assert test_flag == 0
+
 def test_plot_species_concentration_abnormal():
 	Ti = [10]
 	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
@@ -95,3 +121,81 @@ def test_plot_time_to_equilibrium_abnormal():
 	parsed_data_list = xml_parser.parsed_data_list(Ti)
 	test_flag = summary.plot_time_to_equilibrium(parsed_data_list, xi)
 	assert test_flag == 1
+
+def test_print_equilibrium_concentration_normal():
+	Ti = [2500]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_equilibrium_concentration(parsed_data_list, xi)
+	assert test_flag == 0
+
+def test_print_equilibrium_concentration_abnormal():
+	Ti = [10]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_equilibrium_concentration(parsed_data_list, xi)
+	assert test_flag == 1
+
+def test_print_solver_stats_normal(capsys):
+	Ti = [1500, 2500]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_solver_stats(parsed_data_list, xi)
+	assert test_flag == 0
+	assert 'Over All Temperatures' in capsys.readouterr().out
+
+def test_print_solver_stats_abnormal():
+	Ti = [10]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_solver_stats(parsed_data_list, xi)
+	assert test_flag == 1
+
+def test_print_positivity_benchmark_normal(capsys):
+	Ti = [1500]
+	xi = [1., 0., 0., 2., 0., 1., 0., 0.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_positivity_benchmark(parsed_data_list, xi)
+	assert test_flag == 0
+	out = capsys.readouterr().out
+	assert all(positivity in out for positivity in ['zero', 'clip', 'log', 'project'])
+
+def test_print_positivity_benchmark_abnormal():
+	Ti = [10]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	test_flag = summary.print_positivity_benchmark(parsed_data_list, xi)
+	assert test_flag == 1
+
+def test_plot_time_to_equilibrium_leaves_no_open_figures():
+	Ti = [2500]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	n_figures = len(plt.get_fignums())
+	test_flag = summary.plot_time_to_equilibrium(parsed_data_list, xi)
+	assert test_flag == 0
+	assert len(plt.get_fignums()) == n_figures
+
+def test_plot_species_concentration_in_worker_processes():
+	Ti = [1500, 3000]
+	xi = [2., 1., .5, 1., 1., 1., .5, 1.] # specie concentrations 'rxns_reversible.xml'
+	xml_parser = XmlParser(pckg_xml_path('rxns_reversible'))
+	parsed_data_list = xml_parser.parsed_data_list(Ti)
+	image_dir = os.path.join(os.path.dirname(summary.__file__), 'examples')
+	for T in Ti:
+		img_path = os.path.join(image_dir, 'evolution_{}K.png'.format(T))
+		if os.path.exists(img_path):
+			os.remove(img_path)
+	test_flag = summary.plot_species_concentration(parsed_data_list, xi, n_workers=2)
+	assert test_flag == 0
+	for T in Ti:
+		img_path = os.path.join(image_dir, 'evolution_{}K.png'.format(T))
+		assert os.path.exists(img_path)
+		os.remove(img_path)
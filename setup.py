@@ -8,16 +8,28 @@ setup(name='chemkin',
       author_email='nathaniel_stein@g.harvard.edu',
       license='Harvard',
       packages=['chemkin',
+                'chemkin.tests',
+                'chemkin.distributed',
+                'chemkin.distributed.tests',
                 'chemkin.preprocessing',
                 'chemkin.preprocessing.tests',
                 'chemkin.reaction',
                 'chemkin.reaction.tests',
+                'chemkin.reduction',
+                'chemkin.reduction.tests',
+                'chemkin.service',
+                'chemkin.service.tests',
                 'chemkin.thermodynamics',
                 'chemkin.thermodynamics.tests',
                 'chemkin.viz',
                 'chemkin.viz.tests',
                 'chemkin.solver',
-                'chemkin.solver.tests'],
+                'chemkin.solver.tests',
+                'chemkin.uncertainty',
+                'chemkin.uncertainty.tests'],
       package_data={'chemkin':['thermodynamics/*.sqlite',
-                               'xml-files/*.xml']})
+                               'thermodynamics/*.thermo',
+                               'thermodynamics/*.txt',
+                               'xml-files/*.xml']},
+      entry_points={'console_scripts': ['chemkin = chemkin.cli:main']})
 